@@ -0,0 +1,83 @@
+"""
+Pathological-input benchmark for the !html[...] scanner.
+Times process_enhanced_html_tags on inputs built to make bracket matching
+expensive (unterminated tags, deep nesting, long unclosed groups, escaped
+brackets, tags inside a large code block) at doubling sizes, next to the
+single-regex implementation it replaced. The growth column is the time
+ratio between the two largest sizes: about 2 means linear time.
+
+Usage:
+    python benchmarks/bench_html_tags.py
+    python benchmarks/bench_html_tags.py --sizes 50000 100000 200000 400000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler.main import process_enhanced_html_tags
+
+# The pattern process_enhanced_html_tags used before the scanner
+# (one level of nested brackets, no fenced code handling)
+LEGACY_PATTERN = re.compile(r'!html\[((?:[^\[\]]|\[[^\[\]]*\])*)\]')
+
+
+def legacy_process(content):
+    return LEGACY_PATTERN.sub(lambda match: match.group(1).replace('\\[', '[').replace('\\]', ']'), content)
+
+
+def repeat_to(unit, size):
+    return unit * max(1, size // len(unit))
+
+
+# Generators of pathological inputs of about size characters
+INPUTS = {
+    "unterminated_long_tail": lambda size: "!html[" + "a" * size,
+    "many_unterminated": lambda size: repeat_to("!html[a ", size),
+    "unclosed_nested_groups": lambda size: repeat_to("!html[[" + "a" * 50, size),
+    "groups_without_close": lambda size: "!html[" + repeat_to("[a] ", size),
+    "deep_nesting": lambda size: "!html[" + "[" * (size // 2) + "]" * (size // 2) + "]",
+    "escaped_brackets": lambda size: "!html[" + repeat_to("\\[x\\] ", size) + "]",
+    "tags_in_code_block": lambda size: "```\n" + repeat_to("!html[<b>x</b>]\n", size) + "```\n",
+}
+
+
+def time_call(function, content, repeat):
+    """Best wall time in milliseconds of function(content) over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(content)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the !html[...] scanner on pathological inputs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000, 200000],
+                        help="Input sizes in characters.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (the best is kept).")
+    args = parser.parse_args()
+
+    for name, make_input in INPUTS.items():
+        print(name)
+        print(f"  {'size':>8} {'legacy ms':>10} {'scanner ms':>11}")
+        legacy_times = []
+        scanner_times = []
+        for size in args.sizes:
+            content = make_input(size)
+            legacy_times.append(time_call(legacy_process, content, args.repeat))
+            scanner_times.append(time_call(process_enhanced_html_tags, content, args.repeat))
+            print(f"  {len(content):>8} {legacy_times[-1]:>10.2f} {scanner_times[-1]:>11.2f}")
+        if len(args.sizes) > 1:
+            print(f"  {'growth':>8} {legacy_times[-1] / legacy_times[-2]:>9.1f}x "
+                  f"{scanner_times[-1] / scanner_times[-2]:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
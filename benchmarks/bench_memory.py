@@ -0,0 +1,82 @@
+"""
+Memory benchmark for the Power Python Compiler.
+Compiles generated reference pages of growing size with and without
+--stream and reports the peak memory allocated (via tracemalloc) next to
+the size of the output.
+
+Usage:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --scales 1 4 16 64
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler.main import compile_markdown
+from benchmarks.corpora import FRONTMATTER
+
+
+def reference_page(scale):
+    """A long generated reference page: headings, prose, tables and code."""
+    parts = [FRONTMATTER]
+    for section in range(50 * scale):
+        parts.append(f"## Function `api_{section}` {{#api-{section} .reference}}\n\n")
+        parts.append(f"Returns the value for item {section}. See [the index](#api-0) for details. "
+                     "This paragraph has **bold**, *emphasis* and `inline code` to render.\n\n")
+        parts.append("| Parameter | Type | Description |\n|---|---|---|\n")
+        for row in range(5):
+            parts.append(f"| arg{row} | `int` | Argument {row} of api_{section} |\n")
+        parts.append(f"\n```python\nresult = api_{section}(1, 2, 3)\nprint(result)\n```\n\n")
+    return "".join(parts)
+
+
+def measure(source_path, output_path, stream):
+    """Compile once and return the peak number of bytes allocated."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_markdown(source_path, output_path, stream=stream)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak compile memory with and without streaming.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16], help="Reference page sizes to compile.")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'input MB':>10} {'output MB':>10} {'buffered MB':>12} {'streamed MB':>12} {'saved':>7}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = os.path.join(work_dir, "reference.md")
+        output_path = os.path.join(work_dir, "reference.html")
+
+        # Compile once first so the lazily imported modules aren't counted
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(reference_page(1))
+        measure(source_path, output_path, stream=False)
+
+        for scale in args.scales:
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write(reference_page(scale))
+
+            buffered = measure(source_path, output_path, stream=False)
+            streamed = measure(source_path, output_path, stream=True)
+            input_mb = os.path.getsize(source_path) / 1e6
+            output_mb = os.path.getsize(output_path) / 1e6
+            saved = 1 - streamed / buffered
+            print(f"{scale:>6} {input_mb:>10.2f} {output_mb:>10.2f} {buffered / 1e6:>12.2f} "
+                  f"{streamed / 1e6:>12.2f} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
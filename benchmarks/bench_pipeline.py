@@ -0,0 +1,190 @@
+"""
+Compiler pipeline benchmark for the Power Python Compiler.
+Times each stage of compile_markdown separately over the benchmark corpora
+and writes the results as JSON so runs can be compared across versions.
+
+Usage:
+    python benchmarks/bench_pipeline.py -o results.json
+    python benchmarks/bench_pipeline.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import frontmatter
+from compiler.main import (create_markdown_parser, fill_template, load_template,
+                           process_enhanced_html_tags, process_html_attributes)
+from benchmarks.corpora import SIZES, load_corpora
+
+# Stages in pipeline order
+STAGES = [
+    "frontmatter_load",
+    "process_enhanced_html_tags",
+    "md_render",
+    "process_html_attributes",
+    "template_substitute",
+    "write",
+]
+
+# A stage is reported as a regression when it gets this much slower
+REGRESSION_THRESHOLD = 1.10
+
+
+def run_pipeline(source_path, output_path, html_template):
+    """Run the compile pipeline once, returning the seconds spent in each stage."""
+    timings = {}
+
+    start = time.perf_counter()
+    with open(source_path, "r", encoding="utf-8") as f:
+        post = frontmatter.load(f)
+    timings["frontmatter_load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processed_content = process_enhanced_html_tags(post.content)
+    timings["process_enhanced_html_tags"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    md = create_markdown_parser()
+    env = {}
+    html_content = md.render(processed_content, env)
+    timings["md_render"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    html_content = process_html_attributes(html_content)
+    timings["process_html_attributes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    final_html = fill_template(html_template, post, html_content, env)
+    timings["template_substitute"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(final_html)
+    timings["write"] = time.perf_counter() - start
+
+    return timings
+
+
+def summarize(samples):
+    """Summary statistics (in milliseconds) for a list of timings in seconds."""
+    samples_ms = [sample * 1000 for sample in samples]
+    return {
+        "min_ms": round(min(samples_ms), 4),
+        "median_ms": round(statistics.median(samples_ms), 4),
+        "mean_ms": round(statistics.mean(samples_ms), 4),
+    }
+
+
+def benchmark_corpus(source, repeat, html_template, work_dir):
+    """Benchmark one document, returning per-stage and total statistics."""
+    source_path = os.path.join(work_dir, "input.md")
+    output_path = os.path.join(work_dir, "output.html")
+    with open(source_path, "w", encoding="utf-8") as f:
+        f.write(source)
+
+    # Warm-up run so imports and regex compilation aren't measured
+    run_pipeline(source_path, output_path, html_template)
+
+    samples = {stage: [] for stage in STAGES}
+    totals = []
+    for _ in range(repeat):
+        timings = run_pipeline(source_path, output_path, html_template)
+        for stage in STAGES:
+            samples[stage].append(timings[stage])
+        totals.append(sum(timings.values()))
+
+    return {
+        "input_bytes": len(source.encode("utf-8")),
+        "output_bytes": os.path.getsize(output_path),
+        "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+        "total": summarize(totals),
+    }
+
+
+def git_revision():
+    """The current git commit, if available."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print median stage times against a baseline run and return the regressions found."""
+    regressions = []
+    print(f"\n{'corpus / stage':<55} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, corpus in results["corpora"].items():
+        base_corpus = baseline["corpora"].get(name)
+        if not base_corpus:
+            continue
+        for stage in STAGES + ["total"]:
+            current = corpus["total"] if stage == "total" else corpus["stages"][stage]
+            base = base_corpus["total"] if stage == "total" else base_corpus["stages"].get(stage)
+            if not base or not base["median_ms"]:
+                continue
+            ratio = current["median_ms"] / base["median_ms"]
+            flag = ""
+            # Ignore noise on stages that take next to no time
+            if ratio > REGRESSION_THRESHOLD and current["median_ms"] > 0.5:
+                flag = "  <-- slower"
+                regressions.append((name, stage, ratio))
+            print(f"{name + ' / ' + stage:<55} {base['median_ms']:>10.3f} {current['median_ms']:>10.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiler pipeline stage by stage.")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="medium", help="Size of the synthetic corpora.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per corpus.")
+    parser.add_argument("--only", nargs="+", metavar="CORPUS", help="Only run these corpora.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier results file.")
+    args = parser.parse_args()
+
+    corpora = load_corpora(args.size)
+    if args.only:
+        corpora = {name: source for name, source in corpora.items() if name in args.only}
+
+    html_template = load_template()
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "corpora": {},
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, source in corpora.items():
+            result = benchmark_corpus(source, args.repeat, html_template, work_dir)
+            results["corpora"][name] = result
+            slowest = max(STAGES, key=lambda stage: result["stages"][stage]["median_ms"])
+            print(f"{name:<45} {result['total']['median_ms']:>10.2f} ms  (slowest stage: {slowest})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
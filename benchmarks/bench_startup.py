@@ -0,0 +1,129 @@
+"""
+CLI startup benchmark for the Power Python Compiler.
+Reports the import cost of compiler.main (from python -X importtime) and
+the end-to-end wall time of compiling a small file, both in-process and
+through the compile daemon where Unix sockets are available.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --top 15
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+COMPILER = os.path.join(PROJECT_ROOT, "compiler", "main.py")
+DAEMON = os.path.join(PROJECT_ROOT, "compiler", "daemon.py")
+
+SAMPLE = """---
+title: Startup Benchmark
+---
+
+# Hello {#hello}
+
+Some *text* and a [link](#hello).
+
+```python-power
+print("<b>ok</b>")
+```
+"""
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into [(module, self us, cumulative us, depth)]."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def import_profile(statement):
+    """Run statement under -X importtime and return the parsed import times."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def time_command(command, repeat, env=None):
+    """Median wall time in milliseconds of running command repeat times."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def wait_for_daemon(socket_path, timeout=10.0):
+    """Wait until the daemon accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(socket_path)
+                return True
+            except OSError:
+                pass
+        time.sleep(0.05)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiler CLI startup.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list.")
+    args = parser.parse_args()
+
+    modules = import_profile("import compiler.main")
+    top_level = [module for module in modules if module[3] == 0]
+    main_module = next(module for module in top_level if module[0] == "compiler.main")
+    print(f"import compiler.main: {main_module[2] / 1000:.1f} ms "
+          f"({sum(module[2] for module in top_level) / 1000:.1f} ms including interpreter startup imports)")
+    print("\nSlowest imports (cumulative):")
+    for name, self_us, cumulative_us, depth in sorted(modules, key=lambda module: -module[2])[:args.top]:
+        print(f"  {'  ' * depth + name:<50} {cumulative_us / 1000:>8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(work_dir, "sample.md")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(SAMPLE)
+
+        baseline = time_command([sys.executable, "-c", "pass"], args.repeat)
+        in_process = time_command([sys.executable, COMPILER, source], args.repeat)
+        print(f"\n{'python -c pass':<30} {baseline:>8.1f} ms")
+        print(f"{'compile in-process':<30} {in_process:>8.1f} ms")
+
+        if not hasattr(socket, "AF_UNIX"):
+            print("Unix sockets unavailable; skipping the daemon measurement")
+            return
+
+        env = dict(os.environ, POWER_COMPILER_SOCKET=os.path.join(work_dir, "daemon.sock"),
+                   POWER_COMPILER_DAEMON="1")
+        daemon = subprocess.Popen([sys.executable, DAEMON, "start"], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_for_daemon(env["POWER_COMPILER_SOCKET"]):
+                print("The compile daemon didn't start; skipping the daemon measurement")
+                return
+            via_daemon = time_command([sys.executable, COMPILER, source], args.repeat, env)
+            print(f"{'compile via daemon':<30} {via_daemon:>8.1f} ms")
+        finally:
+            subprocess.run([sys.executable, DAEMON, "stop"], env=env, capture_output=True)
+            daemon.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark corpora for the Power Python Compiler.
+Synthetic documents that stress one feature each, plus the real-world
+markdown files shipped with the repository.
+"""
+
+import glob
+import os
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Multiplier applied to the synthetic corpus sizes for each --size
+SIZES = {"small": 1, "medium": 4, "large": 16}
+
+FRONTMATTER = """---
+title: Benchmark Document
+css: [style.css]
+js: [app.js]
+---
+
+"""
+
+
+def attribute_blocks(scale):
+    """Headings and paragraphs carrying {#id .class key=value} attribute blocks."""
+    parts = [FRONTMATTER]
+    for i in range(100 * scale):
+        parts.append(f"## Section {i} {{#section-{i} .section}}\n\n")
+        parts.append(f"Paragraph {i} with some text. {{.note data-index=\"{i}\"}}\n\n")
+    return "".join(parts)
+
+
+def huge_table(scale):
+    """One large pipe table."""
+    columns = 8
+    parts = [FRONTMATTER]
+    parts.append("| " + " | ".join(f"Column {c}" for c in range(columns)) + " |\n")
+    parts.append("|" + "---|" * columns + "\n")
+    for row in range(500 * scale):
+        parts.append("| " + " | ".join(f"r{row}c{c} *x*" for c in range(columns)) + " |\n")
+    return "".join(parts)
+
+
+def python_power_blocks(scale):
+    """Many small python-power blocks."""
+    parts = [FRONTMATTER]
+    for i in range(20 * scale):
+        parts.append(f"Block {i}:\n\n```python-power\ntotal = sum(range({i * 10}))\nprint(f'<b>{{total}}</b>')\n```\n\n")
+    return "".join(parts)
+
+
+def deep_nesting(scale):
+    """Deeply nested lists and blockquotes."""
+    depth = 10 * scale
+    parts = [FRONTMATTER]
+    for level in range(depth):
+        parts.append("  " * level + f"- item at depth {level} with `code` and **bold**\n")
+    parts.append("\n")
+    for level in range(1, depth + 1):
+        parts.append(">" * level + f" quote at depth {level}\n")
+    parts.append("\n")
+    return "".join(parts) * 5
+
+
+def footnote_heavy(scale):
+    """Paragraphs full of footnote references, with the definitions at the end."""
+    count = 100 * scale
+    parts = [FRONTMATTER]
+    for i in range(count):
+        parts.append(f"Claim number {i} needs a source[^note{i}] and another[^note{(i + 1) % count}].\n\n")
+    for i in range(count):
+        parts.append(f"[^note{i}]: Footnote {i} with *emphasis*.\n")
+    return "".join(parts)
+
+
+def enhanced_html_tags(scale):
+    """Lots of !html[...] snippets with nested brackets."""
+    parts = [FRONTMATTER]
+    for i in range(200 * scale):
+        parts.append(f'!html[<div class="card" data-list="[{i}]"><span>Card {i}</span></div>]\n\n')
+    return "".join(parts)
+
+
+SYNTHETIC_CORPORA = {
+    "attribute_blocks": attribute_blocks,
+    "huge_table": huge_table,
+    "python_power_blocks": python_power_blocks,
+    "deep_nesting": deep_nesting,
+    "footnote_heavy": footnote_heavy,
+    "enhanced_html_tags": enhanced_html_tags,
+}
+
+
+def real_world_corpora():
+    """Markdown files shipped with the repository, keyed by relative path."""
+    corpora = {}
+    for pattern in ("examples/*.md", "docs/*.md", "tests/*.md"):
+        for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, pattern))):
+            with open(path, "r", encoding="utf-8") as f:
+                corpora[os.path.relpath(path, PROJECT_ROOT).replace(os.sep, "/")] = f.read()
+    return corpora
+
+
+def load_corpora(size="medium"):
+    """Return {name: markdown source} for every corpus."""
+    scale = SIZES[size]
+    corpora = {name: generate(scale) for name, generate in SYNTHETIC_CORPORA.items()}
+    corpora.update(real_world_corpora())
+    return corpora
@@ -0,0 +1,122 @@
+"""
+Externalized python-power output for the Power Python Compiler.
+
+Large block outputs and the images blocks embed as data: URIs make pages
+big and mean the browser downloads them again whenever the page changes.
+PageAssets writes them as files named by a hash of their content into an
+asset directory next to the page (page.html -> page_assets/), and the page
+loads them lazily: images with <img loading="lazy">, large outputs in a
+lazily loaded <iframe>. Unchanged outputs keep their file names from one
+build to the next, so browsers and CDNs can cache them.
+"""
+
+import base64
+import binascii
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+# Block outputs bigger than this many characters are written to a file
+INLINE_LIMIT = 64 * 1024
+
+# data: URIs of at least this many characters are written to a file,
+# whatever the size of the output they are in
+DATA_URI_MIN = 2048
+
+DATA_URI = re.compile(r'data:([a-zA-Z0-9.+-]+/[a-zA-Z0-9.+-]+);base64,([A-Za-z0-9+/=]+)')
+
+# Asset file names: a hash of the content and an extension
+ASSET_NAME = re.compile(r'[0-9a-f]{16}\.[a-z0-9]+$')
+
+FRAGMENT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<base target="_parent">
+</head>
+<body>
+{output}
+</body>
+</html>
+"""
+
+# Grows the frame to its content where the browser allows it (not for file: URLs)
+IFRAME_ONLOAD = "this.contentDocument&&(this.style.height=this.contentDocument.documentElement.scrollHeight+'px')"
+
+
+class PageAssets:
+    """Writes the externalized outputs of one page into its asset directory."""
+
+    def __init__(self, page_path, inline_limit=INLINE_LIMIT):
+        self.directory = os.path.splitext(page_path)[0] + "_assets"
+        # Asset URLs are relative to the page
+        self.url_prefix = quote(os.path.basename(self.directory)) + "/"
+        self.inline_limit = inline_limit
+        self.names = set()  # Assets the page refers to
+
+    def write(self, data, extension):
+        """Write data (bytes) as a content-hashed asset and return its file name."""
+        name = hashlib.sha256(data).hexdigest()[:16] + extension
+        path = os.path.join(self.directory, name)
+        # The name is the content, so an existing file is already right
+        if name not in self.names and not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        self.names.add(name)
+        return name
+
+    def externalize(self, output):
+        """Return the HTML to put in the page for the python-power block output."""
+        inline = self.externalize_data_uris(output, self.url_prefix)
+        if len(inline) <= self.inline_limit:
+            return inline
+
+        # Assets are next to each other, so the fragment refers to them by name alone
+        fragment = FRAGMENT_TEMPLATE.format(output=self.externalize_data_uris(output, ""))
+        name = self.write(fragment.encode("utf-8"), ".html")
+        return (f'<iframe class="python-power-asset" src="{self.url_prefix}{name}" '
+                f'loading="lazy" title="python-power output" onload="{IFRAME_ONLOAD}"></iframe>')
+
+    def externalize_data_uris(self, html, prefix):
+        """Replace large data: URIs in html by URLs of asset files (prefix + file name).
+
+        <img> tags that get a file URL are also made to load lazily.
+        """
+        parts = []
+        cursor = 0
+        for match in DATA_URI.finditer(html):
+            if match.end() - match.start() < DATA_URI_MIN:
+                continue
+            try:
+                data = base64.b64decode(match.group(2), validate=True)
+            except binascii.Error:
+                continue
+            name = self.write(data, mimetypes.guess_extension(match.group(1).lower()) or ".bin")
+
+            # Only back to the previous URI, which also skips tags already handled
+            tag_start = html.rfind("<", cursor, match.start())
+            if (tag_start >= 0 and html[tag_start:tag_start + 5].lower() == "<img "
+                    and "loading=" not in html[tag_start:match.start()].lower()):
+                parts.append(html[cursor:tag_start + 4])
+                parts.append(' loading="lazy"')
+                cursor = tag_start + 4
+            parts.append(html[cursor:match.start()])
+            parts.append(prefix + name)
+            cursor = match.end()
+        if not parts:
+            return html
+        parts.append(html[cursor:])
+        return "".join(parts)
+
+    def remove_stale(self):
+        """Delete the asset files from earlier builds that the page no longer refers to."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if ASSET_NAME.match(name) and name not in self.names:
+                os.remove(os.path.join(self.directory, name))
+        if not os.listdir(self.directory):
+            os.rmdir(self.directory)
@@ -0,0 +1,73 @@
+"""
+Bounded capture of python-power block output.
+
+A block that prints in a loop shouldn't be able to use up the compiler's
+memory. BoundedOutput keeps what a block prints in memory up to
+SPILL_SIZE characters and in a temporary file after that, and stops
+keeping it at a maximum size, ending the output with a notice that it was
+truncated.
+
+The kept output goes into the page, so getvalue() reads it back into
+memory: the spill file only bounds memory while the block runs, and
+max_chars bounds it afterwards.
+"""
+
+import io
+
+# Most characters of output kept per block. All of it is read back into
+# memory to build the page.
+MAX_OUTPUT = 2 * 1024 * 1024
+
+# Output is moved from memory to a temporary file past this many characters
+SPILL_SIZE = 1024 * 1024
+
+TRUNCATION_NOTICE = '\n<p class="python-power-truncated"><em>Output truncated after {limit} characters.</em></p>\n'
+
+
+class BoundedOutput(io.TextIOBase):
+    """A write-only text stream that keeps at most max_chars characters."""
+
+    def __init__(self, max_chars=MAX_OUTPUT, spill_size=SPILL_SIZE):
+        # tempfile is slow to import, so only once a block runs
+        import tempfile
+
+        self.max_chars = max_chars
+        self.chars = 0
+        self.truncated = False
+        # newline="" so that output is kept as printed
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=spill_size, mode="w+", encoding="utf-8",
+                                                     newline="", errors="surrogatepass")
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        length = len(text)
+        if self.closed:
+            # A thread the block started may still print after the block is
+            # done; its output is dropped rather than raising in that thread
+            return length
+        room = self.max_chars - self.chars
+        if length > room:
+            self.truncated = True
+            text = text[:max(room, 0)]
+        if text:
+            self._buffer.write(text)
+            self.chars += len(text)
+        return length
+
+    def getvalue(self):
+        """Return the kept output, with the truncation notice if it was truncated."""
+        self._buffer.seek(0)
+        output = self._buffer.read()
+        self._buffer.seek(0, io.SEEK_END)
+        if self.truncated:
+            output += TRUNCATION_NOTICE.format(limit=self.max_chars)
+        return output
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._buffer.close()
+        super().close()
@@ -0,0 +1,197 @@
+"""
+Chunked reading of large markdown sources for the Power Python Compiler.
+Reads the frontmatter header on its own and cuts the body into chunks made
+of whole top-level blocks, so that a page can be parsed and rendered a
+chunk at a time (see render_body_stream in compiler/main.py).
+
+The body is scanned line by line as bytes, so it can be an mmap of the
+source file and is never decoded as a whole.
+"""
+
+import re
+
+# A chunk is cut at the first safe block boundary after this many bytes
+# (markdown-it tokens take up around a hundred times the size of their source)
+CHUNK_SIZE = 64 * 1024
+
+FRONTMATTER_BOUNDARY = re.compile(rb'-{3,}\s*$')
+BLANK_LINE = re.compile(rb'[ \t]*$')
+INDENT = re.compile(rb' *')
+FENCE_OPEN = re.compile(rb' {0,3}(`{3,}|~{3,})(.*)$')
+FENCE_CLOSE = re.compile(rb' {0,3}(`{3,}|~{3,})[ \t]*$')
+LIST_ITEM = re.compile(rb'(?:[-+*]|\d{1,9}[.)])(?:[ \t]|$)')
+FOOTNOTE_DEF = re.compile(rb' {0,3}\[\^([^\]\s]+)\]:')
+REFERENCE_DEF = re.compile(rb' {0,3}\[[^\]^][^\]]*\]:')
+
+# HTML blocks that can contain blank lines, and the text that ends each of them
+HTML_BLOCKS = [
+    (re.compile(rb' {0,3}<(?:script|pre|style|textarea)(?:[ \t>]|$)', re.IGNORECASE),
+     re.compile(rb'</(?:script|pre|style|textarea)>', re.IGNORECASE)),
+    (re.compile(rb' {0,3}<!--'), re.compile(rb'-->')),
+    (re.compile(rb' {0,3}<\?'), re.compile(rb'\?>')),
+    (re.compile(rb' {0,3}<!\[CDATA\['), re.compile(rb'\]\]>')),
+    (re.compile(rb' {0,3}<![A-Za-z]'), re.compile(rb'>')),
+]
+
+
+def read_frontmatter(f):
+    """Read the YAML frontmatter header from the start of the binary file f.
+
+    Returns the metadata, the byte offset of the body and the line offset of
+    the body. Only the header is read, however large the file is.
+    """
+    import frontmatter
+
+    offset = 0
+    lines = 0
+    line = f.readline()
+    # frontmatter.loads ignores leading blank lines
+    while line and BLANK_LINE.match(line.rstrip(b"\r\n")):
+        offset += len(line)
+        lines += 1
+        line = f.readline()
+
+    if not FRONTMATTER_BOUNDARY.match(line):
+        return {}, offset, lines
+
+    header = [line]
+    while True:
+        line = f.readline()
+        if not line:
+            # No closing boundary, so the whole file is body
+            return {}, offset, lines
+        header.append(line)
+        if FRONTMATTER_BOUNDARY.match(line):
+            break
+
+    metadata = frontmatter.loads(b"".join(header).decode("utf-8")).metadata
+    return metadata, offset + sum(len(line) for line in header), lines + len(header)
+
+
+def scan_lines(data, start=0):
+    """Yield (start, end, next start, kind) for each line of data from start.
+
+    end excludes the line break. kind is "blank", "text", or for lines that
+    are part of a fenced code block "fence_open", "fence" and "fence_close",
+    or "html" for lines of an HTML block that can contain blank lines.
+    Only blocks that start at the top level (indented at most three spaces)
+    are recognized; an indented code fence is taken to be inside a list item
+    and so to end at the first non-blank line that is indented less.
+    """
+    size = len(data)
+    pos = start
+    fence = None  # (marker character, marker length, indent) of the open code block
+    html_end = None  # Pattern that closes the open HTML block
+    while pos < size:
+        end = data.find(b"\n", pos)
+        if end < 0:
+            end = next_pos = size
+        else:
+            next_pos = end + 1
+        if end > pos and data[end - 1] == 13:  # "\r"
+            end -= 1
+
+        if fence is not None and fence[2] and not BLANK_LINE.match(data, pos, end) \
+                and INDENT.match(data, pos, end).end() - pos < fence[2]:
+            fence = None
+
+        if fence is not None and fence[2] and BLANK_LINE.match(data, pos, end):
+            # Blank either way: in the code block, or after the list item that held it
+            kind = "blank"
+        elif fence is not None:
+            match = FENCE_CLOSE.match(data, pos, end)
+            if match and match.group(1)[:1] == fence[0] and len(match.group(1)) >= fence[1]:
+                kind = "fence_close"
+                fence = None
+            else:
+                kind = "fence"
+        elif html_end is not None:
+            kind = "html"
+            if html_end.search(data, pos, end):
+                html_end = None
+        elif BLANK_LINE.match(data, pos, end):
+            kind = "blank"
+        else:
+            kind = "text"
+            match = FENCE_OPEN.match(data, pos, end)
+            # Backtick fences can't have backticks in their info string
+            if match and not (match.group(1)[:1] == b"`" and b"`" in match.group(2)):
+                kind = "fence_open"
+                fence = (match.group(1)[:1], len(match.group(1)), match.start(1) - pos)
+            else:
+                for open_pattern, end_pattern in HTML_BLOCKS:
+                    if open_pattern.match(data, pos, end):
+                        kind = "html"
+                        if not end_pattern.search(data, pos, end):
+                            html_end = end_pattern
+                        break
+
+        yield pos, end, next_pos, kind
+        pos = next_pos
+
+
+def scan_definitions(data, start=0):
+    """Find what has to be known before the first chunk of a body is rendered.
+
+    Returns the labels of the footnote definitions and the lines of the link
+    reference definitions (so that references to definitions further down
+    resolve), and the contents of the css-power blocks (which go in the
+    page head).
+    """
+    footnotes = []
+    references = []
+    styles = []
+    style = None
+    previous = "blank"
+    for pos, end, next_pos, kind in scan_lines(data, start):
+        if kind == "fence_open":
+            info = FENCE_OPEN.match(data, pos, end).group(2).strip()
+            style = [] if info == b"css-power" else None
+        elif kind in ("fence", "blank"):
+            if style is not None:
+                style.append(data[pos:next_pos])
+        elif kind == "fence_close":
+            if style is not None:
+                styles.append(b"".join(style).decode("utf-8"))
+                style = None
+        elif kind == "text":
+            match = FOOTNOTE_DEF.match(data, pos, end)
+            if match:
+                footnotes.append(match.group(1).decode("utf-8"))
+            # Reference definitions can't interrupt a paragraph
+            elif previous in ("blank", "reference") and REFERENCE_DEF.match(data, pos, end):
+                references.append(data[pos:next_pos].decode("utf-8"))
+                kind = "reference"
+        previous = kind
+
+    # A code block left open runs to the end of the document
+    if style is not None:
+        styles.append(b"".join(style).decode("utf-8"))
+    return footnotes, references, styles
+
+
+def iter_body_chunks(data, start=0, chunk_size=CHUNK_SIZE):
+    """Yield (text, line) for chunks of whole top-level blocks of data from start.
+
+    line is the line number of the chunk's first line, counted from start.
+    Chunks are cut at a blank line followed by an unindented line that can't
+    continue the block before it (so not in a code or HTML block, and not
+    between list items).
+    """
+    chunk_start = start
+    chunk_line = 0
+    line = 0
+    previous = "blank"
+    for pos, end, next_pos, kind in scan_lines(data, start):
+        if (previous == "blank" and kind in ("text", "fence_open", "html")
+                and pos - chunk_start >= chunk_size
+                and data[pos] not in (32, 9)  # " ", "\t"
+                and not LIST_ITEM.match(data, pos, end)):
+            yield data[chunk_start:pos].decode("utf-8"), chunk_line
+            chunk_start = pos
+            chunk_line = line
+        previous = kind
+        line += 1
+
+    if chunk_start < len(data):
+        yield data[chunk_start:].decode("utf-8"), chunk_line
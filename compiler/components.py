@@ -0,0 +1,143 @@
+"""
+Reusable HTML components for the Power Python Compiler.
+
+    !component[card](title="My Card", content="Card content")
+
+is replaced by the component file card.html from the page's components
+directory, with $title and $content replaced by the arguments. Component
+files are templates like page layouts (see compiler/templates.py), so they
+are compiled once and can include partials. The HTML rendered for a
+component and its arguments is remembered for the rest of the build, so a
+component used the same way on every page is only rendered once.
+
+Arguments are name=value pairs separated by commas; values are quoted with
+" or ' (with backslash escapes) or, without spaces or commas, unquoted. A
+component call has to fit on one line.
+"""
+
+import html
+import os
+import re
+from collections import OrderedDict
+
+from compiler.templates import TemplateError
+
+COMPONENT_OPENER = re.compile(r'!component\[([A-Za-z0-9_-]+)\]\(')
+ARGUMENT_NAME = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*')
+QUOTED_VALUE = re.compile(r'"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'')
+BARE_VALUE = re.compile(r'[^\s,)"\']*')
+ESCAPE = re.compile(r'\\(.)')
+SPACE = re.compile(r'\s*')
+
+# Rendered components remembered at most
+MEMO_SIZE = 4096
+
+
+class ComponentError(ValueError):
+    """A component call that can't be parsed."""
+
+
+def parse_arguments(text, start, end):
+    """Parse the arguments of a component call from text[start:end].
+
+    start is just after the "(". Returns the arguments as a dict and the
+    position after the closing ")".
+    """
+    args = {}
+    pos = SPACE.match(text, start, end).end()
+    if text.startswith(")", pos, end):
+        return args, pos + 1
+    while True:
+        name = ARGUMENT_NAME.match(text, pos, end)
+        if not name:
+            raise ComponentError("expected name=value")
+        quoted = QUOTED_VALUE.match(text, name.end(), end)
+        if quoted:
+            value = ESCAPE.sub(r'\1', quoted.group(1) if quoted.group(1) is not None else quoted.group(2))
+            pos = quoted.end()
+        else:
+            bare = BARE_VALUE.match(text, name.end(), end)
+            value = bare.group()
+            pos = bare.end()
+        args[name.group(1)] = value
+
+        pos = SPACE.match(text, pos, end).end()
+        if text.startswith(")", pos, end):
+            return args, pos + 1
+        if not text.startswith(",", pos, end):
+            raise ComponentError("expected , or )")
+        pos += 1
+
+
+class ComponentRegistry:
+    """Component templates and the components rendered from them, shared by all pages of a build."""
+
+    def __init__(self, templates, memo_size=MEMO_SIZE):
+        self.templates = templates
+        self.memo_size = memo_size
+        # (template, arguments) -> HTML, least recently used first
+        self.memo = OrderedDict()
+        self.renders = 0
+
+    def render(self, directory, name, args):
+        """Return the HTML of component name from directory with args.
+
+        Raises FileNotFoundError if there's no such component and
+        TemplateError if it can't be rendered with args.
+        """
+        # A changed component file is compiled into a new template, which
+        # leaves the renders of the old one behind
+        template = self.templates.load(os.path.join(directory, name + ".html"))
+        key = (template, tuple(sorted(args.items())))
+        rendered = self.memo.get(key)
+        if rendered is not None:
+            self.memo.move_to_end(key)
+            return rendered
+
+        rendered = template.render(args)
+        # Blank lines would end the HTML block the component is in
+        rendered = "\n".join(line for line in rendered.splitlines() if line.strip())
+        self.renders += 1
+        self.memo[key] = rendered
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return rendered
+
+    def replace_components(self, text, directory):
+        """Replace each component call in text with the component from directory.
+
+        Calls that can't be parsed are left as they are; components that
+        don't exist or can't be rendered are replaced by an error message.
+        """
+        parts = []
+        cursor = 0
+        for match in COMPONENT_OPENER.finditer(text):
+            if match.start() < cursor:
+                continue
+            line_end = text.find("\n", match.end())
+            if line_end < 0:
+                line_end = len(text)
+            try:
+                args, end = parse_arguments(text, match.end(), line_end)
+            except ComponentError:
+                continue
+
+            name = match.group(1)
+            try:
+                rendered = self.render(directory, name, args)
+            except FileNotFoundError:
+                rendered = self.error(name, f"no {name}.html in {directory}")
+            except TemplateError as e:
+                rendered = self.error(name, str(e))
+            parts.append(text[cursor:match.start()])
+            parts.append(rendered)
+            cursor = end
+
+        if not parts:
+            return text
+        parts.append(text[cursor:])
+        return "".join(parts)
+
+    @staticmethod
+    def error(name, message):
+        return f'<span class="power-component-error">Error in component {html.escape(name)}: {html.escape(message)}</span>'
@@ -0,0 +1,293 @@
+"""
+Compile daemon for the Power Python Compiler.
+Keeps the compiler and its dependencies loaded in a long-running process that
+listens on a Unix socket, so repeated command line compiles skip Python and
+library startup. compiler/main.py forwards to it when POWER_COMPILER_DAEMON is
+set, and compiles in-process if no daemon is running.
+
+Where fork() is available, the daemon works as a zygote: each compile runs
+in a child forked from it, which starts with everything the daemon has
+imported (shared copy-on-write) and takes whatever its python-power blocks
+did to the process with it when it exits. Modules that pages list in their
+preload frontmatter key are then imported by the daemon itself, so that
+later compiles find them loaded.
+
+Usage:
+    python compiler/daemon.py start      # serve in the foreground
+    python compiler/daemon.py start --preload numpy pandas
+    python compiler/daemon.py status
+    python compiler/daemon.py stop
+"""
+
+import json
+import os
+import socket
+import sys
+
+# Seconds the client waits for a compile before giving up
+CLIENT_TIMEOUT = 600
+
+
+def default_socket_path():
+    """Per-user socket path, overridable with POWER_COMPILER_SOCKET."""
+    path = os.environ.get("POWER_COMPILER_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        # tempfile is slow to import, so only when there's no runtime directory
+        import tempfile
+        runtime_dir = tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"power-python-compiler-{os.getuid()}.sock")
+
+
+def source_mtimes():
+    """Modification times of the compiler sources, to notice when the daemon is stale."""
+    compiler_dir = os.path.dirname(os.path.abspath(__file__))
+    mtimes = {}
+    for name in sorted(os.listdir(compiler_dir)):
+        if name.endswith((".py", ".html")):
+            mtimes[name] = os.path.getmtime(os.path.join(compiler_dir, name))
+    return mtimes
+
+
+def send_request(request, socket_path=None):
+    """Send one JSON request to the daemon and return its JSON reply.
+
+    Raises OSError if no daemon is listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps(request).encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+def forward_to_daemon(argv, socket_path=None):
+    """Run a compiler command line in the daemon.
+
+    Relays the daemon's output and returns the exit code, or None when no
+    (up to date) daemon is available and the caller should compile itself.
+    Other failures are reported as errors rather than compiled again, since
+    the daemon may already be running the compile, python-power side effects
+    and all.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        reply = send_request({"command": "compile", "argv": list(argv), "cwd": os.getcwd()}, socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # No daemon, or a socket left over from one that didn't shut down cleanly
+        return None
+    except socket.timeout:
+        print(f"Error: the compile daemon didn't reply within {CLIENT_TIMEOUT} seconds", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"Error: compiling in the daemon failed: {e}", file=sys.stderr)
+        return 1
+    if reply.get("stale"):
+        return None
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    return reply.get("exit_code", 1)
+
+
+def run_command(argv, cwd):
+    """Run run_cli(argv) in cwd, capturing its output and exit code."""
+    import io
+    from contextlib import redirect_stderr, redirect_stdout
+    from compiler.main import run_cli
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                run_cli(argv)
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    exit_code = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception as e:
+                print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+                exit_code = 1
+    except OSError as e:
+        stderr.write(f"Error: {e}\n")
+        exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+def run_forked(argv, cwd):
+    """Run run_command(argv, cwd) in a child forked from the daemon and return its reply.
+
+    The reply also lists the modules the compiled pages asked to preload,
+    under "preload".
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child must never return into the daemon's accept loop
+        try:
+            os.close(read_fd)
+            from compiler import preload
+            reply = run_command(argv, cwd)
+            reply["preload"] = sorted(preload.requested)
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(json.dumps(reply).encode("utf-8"))
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    try:
+        return json.loads(data.decode("utf-8"))
+    except ValueError:
+        # A python-power block crashed or killed the compile process
+        return {"stdout": "", "exit_code": 1,
+                "stderr": f"Error: compile process exited unexpectedly (exit code {os.waitstatus_to_exitcode(status)})\n"}
+
+
+def preload_into_daemon(names, tried):
+    """Import the modules in names that haven't been tried yet, and print the import times."""
+    from compiler.preload import format_preload_stats, preload_modules
+
+    names = [name for name in names if name not in tried and name not in sys.modules]
+    tried.update(names)
+    if names:
+        print(format_preload_stats(preload_modules(names)), flush=True)
+
+
+def serve(socket_path, preload=()):
+    """Accept and handle requests one at a time until asked to stop.
+
+    preload is a list of modules to import before the first compile.
+    """
+    from compiler.main import create_markdown_parser, load_post
+
+    # Load the heavy dependencies once, up front
+    create_markdown_parser()
+    load_post("---\ntitle: warm-up\n---\n")
+    mtimes = source_mtimes()
+    # Modules the daemon has imported (or failed to import) for pages' preload keys
+    preload_tried = set()
+    preload_into_daemon(preload, preload_tried)
+
+    if os.path.exists(socket_path):
+        try:
+            send_request({"command": "status"}, socket_path)
+        except OSError:
+            # Left over from a daemon that didn't shut down cleanly
+            os.unlink(socket_path)
+        else:
+            print(f"A compile daemon is already listening on {socket_path}", file=sys.stderr)
+            sys.exit(1)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Create the socket accessible to its owner only, so no one else can
+    # connect between bind() and a chmod()
+    previous_umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(previous_umask)
+    server.listen()
+    print(f"Compile daemon listening on {socket_path}")
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                chunks = []
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                try:
+                    request = json.loads(b"".join(chunks).decode("utf-8"))
+                except ValueError:
+                    continue
+
+                command = request.get("command")
+                stop = False
+                preload = []
+                if command == "compile":
+                    if source_mtimes() != mtimes:
+                        # The compiler changed since startup; let the client compile itself
+                        reply = {"stale": True}
+                        stop = True
+                    elif hasattr(os, "fork"):
+                        reply = run_forked(request.get("argv", []), request.get("cwd", os.getcwd()))
+                        preload = reply.pop("preload", [])
+                    else:
+                        reply = run_command(request.get("argv", []), request.get("cwd", os.getcwd()))
+                elif command == "stop":
+                    reply = {"stopped": True}
+                    stop = True
+                else:
+                    reply = {"pid": os.getpid()}
+
+                conn.sendall(json.dumps(reply).encode("utf-8"))
+            if stop:
+                break
+            # After replying, so the client doesn't wait for it
+            preload_into_daemon(preload, preload_tried)
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    print("Compile daemon stopped")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the compiler as a long-lived daemon on a Unix socket.")
+    parser.add_argument("command", choices=["start", "status", "stop"])
+    parser.add_argument("--preload", nargs="+", default=[], metavar="module",
+                        help="Modules to import when the daemon starts (with start).")
+    parser.add_argument("--socket", dest="socket_path", default=None,
+                        help="Socket path (default: $POWER_COMPILER_SOCKET or a per-user file in the runtime or temp directory).")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("The compile daemon needs Unix domain sockets, which this platform doesn't support.", file=sys.stderr)
+        sys.exit(1)
+
+    socket_path = args.socket_path or default_socket_path()
+    if args.command == "start":
+        serve(socket_path, args.preload)
+        return
+
+    try:
+        reply = send_request({"command": args.command}, socket_path)
+    except OSError:
+        print(f"No compile daemon is listening on {socket_path}")
+        sys.exit(1)
+    if args.command == "stop":
+        print("Compile daemon stopped")
+    else:
+        print(f"Compile daemon running (pid {reply['pid']}) on {socket_path}")
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    main()
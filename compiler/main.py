@@ -3,49 +3,178 @@ Main compiler module for the Power Python Compiler.
 Handles parsing markdown files with embedded Python code and rendering HTML output.
 """
 
-import argparse
 import sys
 import os
-import frontmatter
-from markdown_it import MarkdownIt
-from mdit_py_plugins.footnote import footnote_plugin
-from string import Template
 import re
+# markdown-it, mdit-py-plugins and frontmatter (which pulls in yaml) are
+# imported where they are first used so that starting the CLI stays cheap
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from compiler.symbols import (build_symbol_index, check_links, collect_token_symbols,
+                              new_page_symbols, write_symbol_index)
+from compiler.profiling import CompileProfile, profile_stage
+from compiler.chunking import CHUNK_SIZE, iter_body_chunks, read_frontmatter, scan_definitions, scan_lines
+from compiler.scanning import find_attribute_blocks, find_opening_tags, next_opening_tag, remove_attribute_blocks
+from compiler.parallel import BlockPool, block_result
+from compiler.preload import format_preload_stats, page_preloads, preload_modules
+from compiler.assets import INLINE_LIMIT, PageAssets
+from compiler.capture import MAX_OUTPUT, BoundedOutput
+from compiler.templates import TemplateCache, TemplateError, layout_path
+from compiler.components import ComponentRegistry
 
-def execute_python_code(code):
-    """Executes Python code and captures its output."""
-    import io
+HTML_TAG_OPENER = re.compile(r'!html\[')
+# A bracket, or a backslash-escaped bracket (which doesn't count)
+BRACKET = re.compile(r'\\[\[\]]|[\[\]]')
+TAG_START = re.compile(r'<[a-zA-Z0-9]')
+
+# Compiled page layouts and components, shared by all the compiles of this process
+TEMPLATES = TemplateCache()
+COMPONENTS = ComponentRegistry(TEMPLATES)
+
+
+def execute_python_code(code, max_output=MAX_OUTPUT):
+    """Executes Python code and captures its output.
+
+    At most max_output characters of output are kept (see compiler/capture.py).
+    """
     from contextlib import redirect_stdout
 
-    f = io.StringIO()
+    f = BoundedOutput(max_output)
     try:
         with redirect_stdout(f):
             exec(code)
         return f.getvalue()
     except Exception as e:
         return f"Error executing Python code:\n<pre>{e}</pre>"
+    finally:
+        f.close()
+
+
+def block_executor(env):
+    """Return execute_python_code with the output limit of the render env, for one argument (the code)."""
+    from functools import partial
+
+    return partial(execute_python_code, max_output=env.get("max_output", MAX_OUTPUT))
 
 
 def process_enhanced_html_tags(content):
-    """Process enhanced HTML tag syntax: !html[<div class="custom">Content</div>]"""
-    # Pattern to match !html[content] where content can contain nested brackets
-    pattern = r'!html\[((?:[^\[\]]|\[[^\[\]]*\])*)\]'
-    
-    def replace_html_tag(match):
-        html_content = match.group(1)
+    """Process enhanced HTML tag syntax: !html[<div class="custom">Content</div>]
+
+    The content can contain brackets nested to any depth, and brackets
+    escaped with a backslash, which don't count towards the nesting.
+    Fenced code blocks are left as they are.
+    """
+    if "!html[" not in content:
+        return content
+    return replace_outside_code(content, replace_html_tags)
+
+
+def process_components(content, directory):
+    """Replace component calls, !component[card](title="My Card"), with components from directory.
+
+    Fenced code blocks are left as they are (see compiler/components.py).
+    """
+    if "!component[" not in content:
+        return content
+    return replace_outside_code(content, lambda text: COMPONENTS.replace_components(text, directory))
+
+
+def components_directory(metadata, base_dir=None):
+    """The components directory of a page: its components frontmatter key, or components/.
+
+    The path is relative to base_dir, the directory of the page.
+    """
+    return os.path.join(base_dir or os.getcwd(), str(metadata.get("components") or "components"))
+
+
+def replace_outside_code(content, replace):
+    """Return content with replace(text) applied to the text outside fenced code blocks."""
+    if "```" not in content and "~~~" not in content:
+        return replace(content)
+
+    # Replace in the runs of lines between fenced code blocks
+    data = content.encode("utf-8")
+    parts = []
+    segment_start = 0
+    in_code = False
+    for pos, end, next_pos, kind in scan_lines(data):
+        line_in_code = kind in ("fence_open", "fence", "fence_close")
+        if line_in_code != in_code:
+            segment = data[segment_start:pos].decode("utf-8")
+            parts.append(segment if in_code else replace(segment))
+            segment_start = pos
+            in_code = line_in_code
+    segment = data[segment_start:].decode("utf-8")
+    parts.append(segment if in_code else replace(segment))
+    return "".join(parts)
+
+
+def match_tag_brackets(text, start):
+    """Match brackets from the [ at start until it is closed or the text ends.
+
+    Returns {position of [: position of its ]} for the [ of each !html[
+    that was closed.
+    """
+    closing = {}
+    stack = []
+    for match in BRACKET.finditer(text, start):
+        position = match.start()
+        bracket = text[position]
+        if bracket == "[":
+            stack.append(position)
+        elif bracket == "]":
+            opening = stack.pop()
+            if text.startswith("!html", opening - len("!html")):
+                closing[opening] = position
+            if not stack:
+                break
+    return closing
+
+
+def replace_html_tags(text):
+    """Replace each !html[...] in text with its content, in time linear in the length of text.
+
+    A tag that is never closed is left as it is. The bracket matching for
+    it has then run to the end of the text, and has found the end of every
+    later tag on the way, so the text is never scanned twice.
+    """
+    parts = []
+    cursor = 0
+
+    def replace(opening, closing):
+        parts.append(text[cursor:opening - len("!html")])
+        html_content = text[opening + 1:closing]
         # Unescape any escaped brackets
-        html_content = html_content.replace('\\[', '[').replace('\\]', ']')
-        return html_content
-    
-    return re.sub(pattern, replace_html_tag, content)
+        parts.append(html_content.replace('\\[', '[').replace('\\]', ']'))
+        return closing + 1
+
+    while True:
+        opener = HTML_TAG_OPENER.search(text, cursor)
+        if opener is None:
+            break
+        opening = opener.end() - 1
+        closing = match_tag_brackets(text, opening)
+        if opening in closing:
+            cursor = replace(opening, closing[opening])
+            continue
+
+        for later in HTML_TAG_OPENER.finditer(text, opener.end()):
+            opening = later.end() - 1
+            # Tags inside a replaced tag are part of its content
+            if opening >= cursor and opening in closing:
+                cursor = replace(opening, closing[opening])
+        break
+
+    parts.append(text[cursor:])
+    return "".join(parts)
 
 
 def custom_fence_plugin(md):
     """A markdown-it-py plugin to handle custom code blocks."""
 
     # Store the original fence renderer
-    _default_fence_renderer = md.renderer.rules.get("fence", lambda tokens, idx, options, env, self: self.renderToken(tokens, idx, options))
+    # (rules are bound methods of the renderer, so they don't take `self`)
+    _default_fence_renderer = md.renderer.rules.get("fence", lambda tokens, idx, options, env: md.renderer.renderToken(tokens, idx, options, env))
 
     def custom_fence_renderer(self, tokens, idx, options, env):
         token = tokens[idx]
@@ -53,7 +182,19 @@ def custom_fence_plugin(md):
 
         if info == "python-power":
             code = token.content
-            output = execute_python_code(code)
+            # Line of the opening fence in the source file, for profiling
+            line = env.get("line_offset", 0) + token.map[0] + 1 if token.map else None
+            # Started on a BlockPool before rendering, if it's independent of the other blocks
+            future = env.get("python_power_futures", {}).pop(id(token), None)
+            execute = block_executor(env)
+            with profile_stage(env.get("profile"), "python-power", "python-power", line=line,
+                               pooled=future is not None):
+                if future is None:
+                    output = execute(code)
+                else:
+                    output = block_result(future, execute, code)
+            if env.get("assets") is not None:
+                output = env["assets"].externalize(output)
             return f'<div class="python-power-output">{output}</div>'
         
         elif info == "css-power":
@@ -68,172 +209,298 @@ def custom_fence_plugin(md):
             return f'<script>{code}</script>'
 
         # Fallback to the default renderer for all other languages
-        return _default_fence_renderer(tokens, idx, options, env, self)
+        return _default_fence_renderer(tokens, idx, options, env)
 
     md.add_render_rule("fence", custom_fence_renderer)
 
 
-def process_html_attributes(html_content):
-    """Process custom attribute syntax in HTML content with enhanced support."""
-    # Enhanced regex pattern to match more flexible attribute syntax
-    # Supports: {#id .class1 .class2} or {#id} or {.class1 .class2} or {key=value key2="value"}
-    attr_pattern = r'\{([^}]+)\}'
-    
-    def parse_attributes(attr_string):
-        """Parse attribute string into id, classes, and other attributes."""
-        attrs = {"id": "", "class": [], "other": {}}
-        
-        # Split by spaces but respect quoted strings
-        parts = []
-        current_part = ""
-        in_quotes = False
-        quote_char = None
-        
-        i = 0
-        while i < len(attr_string):
-            char = attr_string[i]
-            
-            if char in ['"', "'"] and (i == 0 or attr_string[i-1] != '\\'):
-                if not in_quotes:
-                    in_quotes = True
-                    quote_char = char
-                elif char == quote_char:
-                    in_quotes = False
-                    quote_char = None
-                current_part += char
-            elif char == ' ' and not in_quotes:
-                if current_part:
-                    parts.append(current_part)
-                    current_part = ""
-            else:
-                current_part += char
-            i += 1
-        
-        if current_part:
-            parts.append(current_part)
-        
-        # Process each part
-        for part in parts:
-            if part.startswith('#'):
-                attrs["id"] = part[1:]
-            elif part.startswith('.'):
-                attrs["class"].append(part[1:])
-            elif '=' in part:
-                # Handle key=value pairs
-                key, value = part.split('=', 1)
-                # Remove quotes if present
-                if value.startswith('"') and value.endswith('"') and len(value) > 1:
-                    value = value[1:-1]
-                elif value.startswith("'") and value.endswith("'") and len(value) > 1:
-                    value = value[1:-1]
-                attrs["other"][key] = value
-            else:
-                # Handle bare classes (without dot prefix)
-                attrs["class"].append(part)
-        
-        return attrs
-    
-    def build_attributes_string(attrs_dict, existing_attrs=""):
-        """Build attribute string from parsed attributes."""
-        attr_str = existing_attrs
-        
-        # Add ID if present
-        if attrs_dict["id"]:
-            attr_str += f' id="{attrs_dict["id"]}"'
-        
-        # Add classes
-        if attrs_dict["class"]:
-            class_str = " ".join(attrs_dict["class"])
-            # Check if a class attribute already exists
-            if 'class="' in attr_str:
-                # Append new classes
-                attr_str = re.sub(r'class="([^"]*)"', rf'class="\1 {class_str}"', attr_str)
-            else:
-                attr_str += f' class="{class_str}"'
-        
-        # Add other attributes
-        for key, value in attrs_dict["other"].items():
-            attr_str += f' {key}="{value}"'
-        
-        return attr_str
-    
-    # First, handle paragraphs with embedded attribute blocks
+def parse_attributes(attr_string):
+    """Parse attribute string into id, classes, and other attributes."""
+    # Attribute blocks ({...}, see compiler/scanning.py) support:
+    # {#id .class1 .class2} or {#id} or {.class1 .class2} or {key=value key2="value"}
+    attrs = {"id": "", "class": [], "other": {}}
+
+    # Split by spaces but respect quoted strings
+    parts = []
+    current_part = ""
+    in_quotes = False
+    quote_char = None
+
+    i = 0
+    while i < len(attr_string):
+        char = attr_string[i]
+
+        if char in ['"', "'"] and (i == 0 or attr_string[i-1] != '\\'):
+            if not in_quotes:
+                in_quotes = True
+                quote_char = char
+            elif char == quote_char:
+                in_quotes = False
+                quote_char = None
+            current_part += char
+        elif char == ' ' and not in_quotes:
+            if current_part:
+                parts.append(current_part)
+                current_part = ""
+        else:
+            current_part += char
+        i += 1
+
+    if current_part:
+        parts.append(current_part)
+
+    # Process each part
+    for part in parts:
+        if part.startswith('#'):
+            attrs["id"] = part[1:]
+        elif part.startswith('.'):
+            attrs["class"].append(part[1:])
+        elif '=' in part:
+            # Handle key=value pairs
+            key, value = part.split('=', 1)
+            # Remove quotes if present
+            if value.startswith('"') and value.endswith('"') and len(value) > 1:
+                value = value[1:-1]
+            elif value.startswith("'") and value.endswith("'") and len(value) > 1:
+                value = value[1:-1]
+            attrs["other"][key] = value
+        else:
+            # Handle bare classes (without dot prefix)
+            attrs["class"].append(part)
+
+    return attrs
+
+def build_attributes_string(attrs_dict, existing_attrs="", ids=None):
+    """Build attribute string from parsed attributes, appending the id to ids if it is a list."""
+    attr_str = existing_attrs
+
+    # Add ID if present
+    if attrs_dict["id"]:
+        attr_str += f' id="{attrs_dict["id"]}"'
+        if ids is not None:
+            ids.append(attrs_dict["id"])
+
+    # Add classes
+    if attrs_dict["class"]:
+        class_str = " ".join(attrs_dict["class"])
+        # Check if a class attribute already exists
+        if 'class="' in attr_str:
+            # Append new classes
+            # (a function, so backslashes in class_str aren't read as escapes)
+            attr_str = re.sub(r'class="([^"]*)"', lambda m: f'class="{m.group(1)} {class_str}"', attr_str)
+        else:
+            attr_str += f' class="{class_str}"'
+
+    # Add other attributes
+    for key, value in attrs_dict["other"].items():
+        attr_str += f' {key}="{value}"'
+
+    return attr_str
+
+
+def process_html_attributes(html_content, ids=None):
+    """Process custom attribute syntax in HTML content with enhanced support.
+
+    If ids is a list, every id assigned from an attribute block is appended to it.
+    """
+    html_content = apply_paragraph_attributes(html_content, ids)
+    html_content = apply_standalone_attributes(html_content, ids)
+    # Remove the attribute blocks from the HTML
+    return remove_attribute_blocks(html_content)
+
+
+def apply_paragraph_attributes(html_content, ids=None):
+    """Give each <p> the attributes of the first attribute block in it, removing its blocks."""
     # Find all <p> tags that contain attribute blocks in their text
-    for p_match in re.finditer(r'<p([^>]*)>(.*?)</p>', html_content, re.DOTALL):
-        p_attrs = p_match.group(1)  # Attributes of the paragraph tag
-        p_content = p_match.group(2)  # Content of the paragraph
+    # (each <p> is paired with the first </p> after it; the scans only move
+    # forward, so this is linear in the length of the HTML)
+    parts = []
+    cursor = 0
+    tag = next_opening_tag(html_content)
+    while tag is not None:
+        start, end, tag_name, p_attrs = tag
+        if tag_name != "p":
+            tag = next_opening_tag(html_content, end)
+            continue
+        close = html_content.find("</p>", end)
+        if close < 0:
+            break
+        p_content = html_content[end:close]
         
         # Check if the paragraph content contains an attribute block
-        attr_match = re.search(attr_pattern, p_content)
+        attr_match = next(find_attribute_blocks(p_content), None)
         if attr_match:
-            attr_string = attr_match.group(1)
-            attrs = parse_attributes(attr_string)
+            attrs = parse_attributes(attr_match[2])
             
             # Construct new attributes for the paragraph tag
-            new_attrs = build_attributes_string(attrs, p_attrs)
+            new_attrs = build_attributes_string(attrs, p_attrs, ids)
             
             # Remove the attribute block from the paragraph content
-            clean_content = re.sub(attr_pattern, '', p_content)
-            
-            # Create the new paragraph tag
-            new_p_tag = f"<p{new_attrs}>{clean_content}</p>"
-            
-            # Replace the old paragraph with the new one
-            start, end = p_match.span()
-            html_content = html_content[:start] + new_p_tag + html_content[end:]
-    
-    # Then, handle standalone attribute blocks (for headings, etc.)
-    # Find all attribute blocks
-    # Create a list to store all matches to process them in reverse order
-    matches = list(re.finditer(attr_pattern, html_content))
-    
-    # Process matches in reverse order to avoid index shifting issues
-    for match in reversed(matches):
-        attr_string = match.group(1)
-        attrs = parse_attributes(attr_string)
-        
-        # Find the last HTML tag before the attribute block
-        preceding_html = html_content[:match.start()]
-        
-        # Find the tag immediately before the attribute block
-        # Look for the last opening tag in the preceding HTML
-        last_tag_match = None
-        for tag_match in re.finditer(r'<([a-zA-Z0-9]+)([^>]*?)>', preceding_html):
-            last_tag_match = tag_match
-        
-        if last_tag_match:
-            # With our new regex, group(1) is the tag name and group(2) are the existing attributes
-            tag_name = last_tag_match.group(1)
-            existing_attrs = last_tag_match.group(2)
+            clean_content = remove_attribute_blocks(p_content)
             
-            # Construct the new attributes string
-            new_attrs = build_attributes_string(attrs, existing_attrs)
-            
-            # Replace the old tag with the new one
-            start, end = last_tag_match.span()
-            new_tag = f"<{tag_name}{new_attrs}>"
-            # Fix: Properly reconstruct the HTML with the new tag and content after the attribute block
-            html_content = html_content[:start] + new_tag + html_content[end:match.start()] + html_content[match.end():]
+            # Replace the paragraph with the new one
+            parts.append(html_content[cursor:start])
+            parts.append(f"<p{new_attrs}>{clean_content}</p>")
+            cursor = close + len("</p>")
+        tag = next_opening_tag(html_content, close + len("</p>"))
+    if parts:
+        parts.append(html_content[cursor:])
+        html_content = "".join(parts)
+    return html_content
+
+
+def apply_standalone_attributes(html_content, ids=None):
+    """Give each opening tag the attributes of the attribute blocks after it, up to the next opening tag.
+
+    The attribute blocks are left in place.
+    """
+    # Standalone attribute blocks (for headings, etc.):
+    # Each block applies to the last opening tag that ends before it. Walk the
+    # tags and the blocks together, collecting the blocks for each tag.
+    tags = list(find_opening_tags(html_content))
+    blocks_by_tag = {}
+    tag_index = -1
+    for block_start, block_end, attr_string in find_attribute_blocks(html_content):
+        while tag_index + 1 < len(tags) and tags[tag_index + 1][1] <= block_start:
+            tag_index += 1
+        if tag_index >= 0:
+            blocks_by_tag.setdefault(tag_index, []).append(parse_attributes(attr_string))
     
-    # Remove any remaining attribute blocks from the HTML
-    html_content = re.sub(attr_pattern, '', html_content)
+    # Rebuild each tag that has blocks, with the attributes of all of them
+    edits = []
+    for tag_index, attrs_list in blocks_by_tag.items():
+        attrs = {"id": "", "class": [], "other": {}}
+        for block_attrs in attrs_list:
+            attrs["id"] = block_attrs["id"] or attrs["id"]
+            attrs["class"].extend(block_attrs["class"])
+            attrs["other"].update(block_attrs["other"])
+        start, end, tag_name, existing_attrs = tags[tag_index]
+        edits.append((start, end, f"<{tag_name}{build_attributes_string(attrs, existing_attrs, ids)}>"))
     
+    if edits:
+        edits.sort()
+        parts = []
+        cursor = 0
+        for start, end, new_tag in edits:
+            parts.append(html_content[cursor:start])
+            parts.append(new_tag)
+            cursor = end
+        parts.append(html_content[cursor:])
+        html_content = "".join(parts)
     return html_content
 
 
-def compile_markdown(input_file, output_file=None):
-    """Compile a markdown file to HTML."""
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            post = frontmatter.load(f)
-        # Use absolute path for template
-        template_path = os.path.join(os.path.dirname(__file__), "template.html")
-        with open(template_path, "r", encoding="utf-8") as f:
-            template_str = f.read()
-            html_template = Template(template_str)
-    except FileNotFoundError as e:
-        print(f"Error: File not found - {e}", file=sys.stderr)
-        sys.exit(1)
+def has_unclosed_paragraph(html_content):
+    """Whether apply_paragraph_attributes would stop at a <p> or tag in html_content that HTML after it closes."""
+    tag = next_opening_tag(html_content)
+    while tag is not None:
+        if tag[2] != "p":
+            tag = next_opening_tag(html_content, tag[1])
+            continue
+        close = html_content.find("</p>", tag[1])
+        if close < 0:
+            return True
+        tag = next_opening_tag(html_content, close + len("</p>"))
+    return ends_inside_tag(html_content)
+
+
+def ends_inside_tag(html_content):
+    """Whether html_content ends in an opening tag without its ">"."""
+    return TAG_START.search(html_content, html_content.rfind(">") + 1) is not None
+
+
+def ends_inside_attribute_block(html_content):
+    """Whether html_content ends in a "{" without its "}"."""
+    return html_content.rfind("{") > html_content.rfind("}")
+
+
+def starts_with_tag(html_content):
+    """Whether an opening tag in html_content ends before its first attribute block.
+
+    If so, no attribute block in it or after it applies to HTML before it.
+    """
+    tag = next_opening_tag(html_content)
+    if tag is None:
+        return False
+    block = next(find_attribute_blocks(html_content), None)
+    return block is None or tag[1] <= block[0]
+
+
+class AttributeStream:
+    """Processes the attribute blocks of HTML written to out a block at a time,
+    with the same result as process_html_attributes on all of it.
+
+    An attribute block can change HTML well before it: a <p> takes the
+    attributes of a block before the next </p>, wherever that is, and a
+    standalone block applies to the last opening tag before it, which can be
+    several blocks back. So blocks are held until the HTML after them can't
+    change them any more: paragraphs are processed once the blocks have
+    no <p> still open, and standalone blocks once a block starting with an
+    opening tag follows.
+    """
+
+    def __init__(self, out, ids=None):
+        self.out = out
+        self.ids = ids
+        self.paragraphs = []  # Blocks with a <p> that is still open
+        self.pending = []  # Blocks with their paragraphs processed, waiting for an opening tag
+
+    def write(self, html_content):
+        self.paragraphs.append(html_content)
+        paragraphs = "".join(self.paragraphs)
+        if not has_unclosed_paragraph(paragraphs):
+            self.paragraphs.clear()
+            self.add(apply_paragraph_attributes(paragraphs, self.ids))
+
+    def add(self, html_content):
+        if self.pending and starts_with_tag(html_content):
+            ids = []
+            pending = apply_standalone_attributes("".join(self.pending), ids)
+            # A tag or block left open would be closed by the HTML that follows
+            if not ends_inside_tag(pending) and not ends_inside_attribute_block(pending):
+                if self.ids is not None:
+                    self.ids.extend(ids)
+                self.out.write(remove_attribute_blocks(pending))
+                self.pending.clear()
+        self.pending.append(html_content)
+
+    def close(self):
+        """Process and write the blocks still held."""
+        if self.paragraphs:
+            self.pending.append(apply_paragraph_attributes("".join(self.paragraphs), self.ids))
+            self.paragraphs.clear()
+        if self.pending:
+            self.out.write(remove_attribute_blocks(apply_standalone_attributes("".join(self.pending), self.ids)))
+            self.pending.clear()
+
+
+def load_template():
+    """Load the default HTML page template."""
+    # Use absolute path for template
+    template_path = os.path.join(os.path.dirname(__file__), "template.html")
+    return TEMPLATES.load(template_path)
+
+
+def page_template(metadata, base_dir=None):
+    """Load the template for a page: the layout its frontmatter names, or the default one.
+
+    Layout paths are relative to base_dir, the directory of the page.
+    Raises TemplateError if the layout uses a placeholder the page has no value for.
+    """
+    layout = metadata.get("layout")
+    if not layout:
+        return load_template()
+    template = TEMPLATES.load(layout_path(str(layout), base_dir or os.getcwd()))
+    missing = template.names - set(template_values(metadata, {})) - {"html_content"}
+    if missing:
+        raise TemplateError(f"{template.path}: no value for " + ", ".join(f"${name}" for name in sorted(missing)))
+    return template
+
+
+def create_markdown_parser():
+    """Create the markdown-it parser with the compiler's plugins enabled."""
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.footnote import footnote_plugin
 
     md = MarkdownIt(
         options_update={
@@ -241,47 +508,478 @@ def compile_markdown(input_file, output_file=None):
         }
     ).use(footnote_plugin).enable("table")
     md.use(custom_fence_plugin)
+    return md
+
+
+def keep_footnote_ids(footnote_def):
+    """Wrap the footnote_def block rule so that a definition doesn't reset the
+    id of a footnote that an earlier chunk has already referenced."""
+    def rule(state, startLine, endLine, silent):
+        refs = state.env.get("footnotes", {}).get("refs", {})
+        start = state.bMarks[startLine] + state.tShift[startLine]
+        label_end = state.src.find("]", start, state.eMarks[startLine])
+        key = ":" + state.src[start + 2:label_end]
+        footnote_id = refs.get(key, -1)
+
+        found = footnote_def(state, startLine, endLine, silent)
+        if found and footnote_id >= 0:
+            refs[key] = footnote_id
+        return found
+    return rule
+
+
+def create_chunk_parser():
+    """Create a markdown parser for rendering a page a chunk at a time.
+
+    Footnotes are left in place instead of being moved to the end of each
+    chunk; render_body_stream collects them and renders them after the last
+    chunk.
+    """
+    from mdit_py_plugins.footnote.index import footnote_def
+
+    md = create_markdown_parser()
+    md.core.ruler.disable("footnote_tail")
+    md.block.ruler.at("footnote_def", keep_footnote_ids(footnote_def), {"alt": ["paragraph", "reference"]})
+    return md
+
+
+def defer_footnotes(tokens, deferred):
+    """Remove the footnote definitions from tokens, storing their tokens in deferred by label."""
+    kept = []
+    current = None
+    for token in tokens:
+        if token.type == "footnote_reference_open":
+            current = deferred[":" + token.meta["label"]] = []
+        elif token.type == "footnote_reference_close":
+            current = None
+        elif current is not None:
+            current.append(token)
+        else:
+            kept.append(token)
+    return kept
 
-    # Process enhanced HTML tag syntax before markdown conversion
-    processed_content = process_enhanced_html_tags(post.content)
-    
-    env = {}
-    html_content = md.render(processed_content, env)
-    
-    # Process custom HTML attributes
-    html_content = process_html_attributes(html_content)
 
+def footnote_tokens(md, env, deferred):
+    """Tokens of the footnote list that ends the page (what footnote_tail adds)."""
+    from markdown_it.rules_core import StateCore
+    from markdown_it.token import Token
+    from mdit_py_plugins.footnote.index import footnote_tail
+
+    state = StateCore("", md, env)
+    for footnote in env.get("footnotes", {}).get("list", {}).values():
+        key = ":" + footnote["label"] if "label" in footnote else None
+        if key is not None and key not in deferred:
+            # Referenced but the definition wasn't parsed as one
+            deferred[key] = []
+    for key, tokens in deferred.items():
+        open_token = Token("footnote_reference_open", "", 1)
+        open_token.meta = {"label": key[1:]}
+        state.tokens.append(open_token)
+        state.tokens.extend(tokens)
+        state.tokens.append(Token("footnote_reference_close", "", -1))
+    footnote_tail(state)
+    return state.tokens
+
+
+def template_values(metadata, env):
+    """Template values for a page, apart from the rendered body.
+
+    Layouts can also use the page's other frontmatter values ($author for author: ...).
+    """
+    values = {key: str(value) for key, value in metadata.items()
+              if isinstance(key, str) and key.isidentifier() and isinstance(value, (str, int, float))}
     custom_styles = "\n".join(env.get("css_power_styles", []))
     
     css_links = "\n".join([f'<link rel="stylesheet" href="{css_file}">'
- for css_file in post.metadata.get("css", [])])
+ for css_file in metadata.get("css", [])])
     js_links = "\n".join([f'<script src="{js_file}"></script>'
- for js_file in post.metadata.get("js", [])])
+ for js_file in metadata.get("js", [])])
+
+    values.update({
+        "title": metadata.get("title", "Rendered Page"),
+        "css_links": css_links,
+        "custom_styles": custom_styles,
+        "js_links": js_links,
+    })
+    return values
+
+
+def fill_template(html_template, post, html_content, env):
+    """Substitute the rendered body and the page metadata into the HTML template."""
+    values = template_values(post.metadata, env)
+    values["html_content"] = html_content
+    return html_template.render(values)
+
+
+def split_template(html_template):
+    """Split the page template around $html_content into head and tail templates."""
+    return html_template.split("html_content")
+
+
+def top_level_blocks(tokens):
+    """Return (start, end) token ranges of the top-level blocks of a document."""
+    blocks = []
+    start = 0
+    depth = 0
+    for i, token in enumerate(tokens):
+        depth += token.nesting
+        if depth == 0:
+            blocks.append((start, i + 1))
+            start = i + 1
+    if start < len(tokens):
+        blocks.append((start, len(tokens)))
+    return blocks
+
+
+def render_post(post, html_template, symbols=None, profile=None, line_offset=0, pool=None, assets=None,
+                max_output=MAX_OUTPUT, base_dir=None):
+    """Render a frontmatter post into a complete HTML page.
+
+    If symbols is a dict (see compiler.symbols.new_page_symbols), the page's
+    title, ids, headings and links are recorded in it as a byproduct of rendering.
+    If profile is a CompileProfile, each stage and python-power block is timed;
+    line_offset is the line number of the body within the source file.
+    If pool is a compiler.parallel.BlockPool, independent python-power blocks
+    run on it while the page renders. If assets is a compiler.assets.PageAssets,
+    large python-power outputs and embedded images are written to it.
+    Each block's output is cut off after max_output characters.
+    base_dir is the directory of the page, which its components are looked
+    up from (the current directory if it's None).
+    """
+    md = create_markdown_parser()
+
+    # Process enhanced HTML tag syntax before markdown conversion
+    with profile_stage(profile, "process_enhanced_html_tags"):
+        processed_content = process_enhanced_html_tags(post.content)
+    if "!component[" in processed_content:
+        with profile_stage(profile, "process_components"):
+            processed_content = process_components(processed_content,
+                                                   components_directory(post.metadata, base_dir))
+    
+    env = {"profile": profile, "line_offset": line_offset, "assets": assets, "max_output": max_output}
+    with profile_stage(profile, "md_render"):
+        tokens = md.parse(processed_content, env)
+        if pool is not None:
+            env["python_power_futures"] = pool.submit_independent(block_executor(env), tokens)
+        html_content = md.renderer.render(tokens, md.options, env)
+    
+    if symbols is not None:
+        symbols["title"] = post.metadata.get("title", "Rendered Page")
+        collect_token_symbols(tokens, symbols)
+    
+    # Process custom HTML attributes
+    with profile_stage(profile, "process_html_attributes"):
+        html_content = process_html_attributes(html_content, symbols["ids"] if symbols is not None else None)
+
+    with profile_stage(profile, "template_substitute"):
+        return fill_template(html_template, post, html_content, env)
+
 
-    final_html = html_template.substitute(
-        title=post.metadata.get("title", "Rendered Page"),
-        css_links=css_links,
-        custom_styles=custom_styles,
-        html_content=html_content,
-        js_links=js_links
-    )
+def render_post_stream(post, html_template, out, symbols=None, profile=None, line_offset=0,
+                       chunk_size=CHUNK_SIZE, pool=None, assets=None, max_output=MAX_OUTPUT, base_dir=None):
+    """Render a frontmatter post into a complete HTML page, writing it to out as it goes.
 
-    output_file = output_file or input_file.rsplit(".", 1)[0] + ".html"
+    Produces the same page as render_post (see render_body_stream).
+    """
+    render_body_stream(post.metadata, post.content.encode("utf-8"), 0, html_template, out,
+                       symbols, profile, line_offset, chunk_size, pool, assets, max_output, base_dir)
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(final_html)
+
+def render_body_stream(metadata, data, start, html_template, out, symbols=None, profile=None,
+                       line_offset=0, chunk_size=CHUNK_SIZE, pool=None, assets=None, max_output=MAX_OUTPUT,
+                       base_dir=None):
+    """Render the markdown body data[start:] (bytes or an mmap) into a page written to out.
+
+    Only one chunk of the body (see iter_body_chunks) is held as text and
+    tokens at a time: the template head is written first, then each
+    top-level block of each chunk as soon as it is rendered and has its
+    attributes processed, then the footnotes of the whole page and the
+    template tail. Footnote and link reference definitions and css-power
+    blocks are found by a scan of the body before the first chunk, so they
+    work across chunks. With a pool, independent python-power blocks of
+    each chunk run on it while the chunk renders.
+
+    The page is the same as render_post's: attribute blocks are processed
+    by an AttributeStream, which holds rendered blocks back while a block
+    after them can still change them. Everything after a raw HTML <p> that
+    is never closed is held until the end of the page.
+    """
+    md = create_chunk_parser()
+    env = {"profile": profile, "line_offset": line_offset, "assets": assets, "max_output": max_output}
+
+    with profile_stage(profile, "scan_definitions"):
+        footnote_labels, references, styles = scan_definitions(data, start)
+    refs = env.setdefault("footnotes", {}).setdefault("refs", {})
+    for label in footnote_labels:
+        refs[":" + label] = -1
+    if references:
+        md.parse("".join(references), env)
+
+    if symbols is not None:
+        symbols["title"] = metadata.get("title", "Rendered Page")
+    ids = symbols["ids"] if symbols is not None else None
+
+    head, tail = split_template(html_template)
+    values = template_values(metadata, {"css_power_styles": styles})
+    deferred = {}
+    components = components_directory(metadata, base_dir)
+    attributes = AttributeStream(out, ids)
+
+    with profile_stage(profile, "stream_body"):
+        out.write(head.render(values))
+        for text, chunk_line in iter_body_chunks(data, start, chunk_size):
+            env["line_offset"] = line_offset + chunk_line
+            text = process_components(process_enhanced_html_tags(text), components)
+            tokens = defer_footnotes(md.parse(text, env), deferred)
+            del text
+            if pool is not None:
+                env["python_power_futures"] = pool.submit_independent(block_executor(env), tokens)
+            if symbols is not None:
+                collect_token_symbols(tokens, symbols)
+
+            for block_start, block_end in top_level_blocks(tokens):
+                chunk = md.renderer.render(tokens[block_start:block_end], md.options, env)
+                # The block's tokens aren't needed any more
+                tokens[block_start:block_end] = [None] * (block_end - block_start)
+                attributes.write(chunk)
+
+        if env["footnotes"].get("list"):
+            tokens = footnote_tokens(md, env, deferred)
+            if symbols is not None:
+                collect_token_symbols(tokens, symbols)
+            attributes.write(md.renderer.render(tokens, md.options, env))
+        attributes.close()
+        out.write(tail.render(values))
+
+
+def load_post(content):
+    """Parse frontmatter, returning the post and the line offset of its body."""
+    import frontmatter
+
+    post = frontmatter.loads(content)
+    body_start = content.find(post.content) if post.content else -1
+    return post, content.count("\n", 0, body_start) if body_start > 0 else 0
+
+
+def preload_page(metadata, profile=None):
+    """Import the modules in the page's preload frontmatter key (see compiler/preload.py).
+
+    Returns the import stats, which are empty if the page has no preloads.
+    """
+    names = page_preloads(metadata)
+    if not names:
+        return []
+    with profile_stage(profile, "preload"):
+        return preload_modules(names, profile)
+
+
+def compile_string(content, profile=None, base_dir=None):
+    """Compile markdown source text (including frontmatter) and return the HTML page.
+
+    base_dir is the directory the page's layout and components are looked up
+    in. Without one, the page's layout key is ignored and the default
+    template is used, since there is nothing to resolve the layout against.
+    Raises TemplateError or FileNotFoundError for a layout that can't be used.
+    """
+    with profile_stage(profile, "compile"):
+        with profile_stage(profile, "frontmatter_load"):
+            post, line_offset = load_post(content)
+        html_template = page_template(post.metadata, base_dir) if base_dir else load_template()
+        preload_page(post.metadata, profile)
+        return render_post(post, html_template, profile=profile, line_offset=line_offset, base_dir=base_dir)
+
+
+def compile_markdown(input_file, output_file=None, symbols=None, profile=None, stream=False, pool=None,
+                     inline_limit=INLINE_LIMIT, max_output=MAX_OUTPUT):
+    """Compile a markdown file to HTML and return the output path.
+
+    symbols and profile are passed on to render_post to collect the page's
+    symbols and stage timings, and pool to run independent python-power
+    blocks in parallel (see compiler/parallel.py). With stream, the source is read and the page
+    written a chunk at a time (see render_body_stream) instead of both being
+    held in memory, for very large pages.
+    python-power outputs longer than inline_limit characters, and the
+    images they embed, are written to files next to the output (see
+    compiler/assets.py); an inline_limit of None keeps them all in the page.
+    Each block's output is cut off after max_output characters.
+    """
+    if stream:
+        return compile_markdown_stream(input_file, output_file, symbols, profile, pool, inline_limit, max_output)
+
+    with profile_stage(profile, "compile", file=input_file):
+        output_file = output_file or input_file.rsplit(".", 1)[0] + ".html"
+        assets = PageAssets(output_file, inline_limit) if inline_limit is not None else None
+        # Rendering is covered too: partials chosen per page are only loaded then
+        try:
+            with profile_stage(profile, "frontmatter_load"):
+                with open(input_file, "r", encoding="utf-8") as f:
+                    post, line_offset = load_post(f.read())
+            base_dir = os.path.dirname(os.path.abspath(input_file))
+            html_template = page_template(post.metadata, base_dir)
+
+            preloads = preload_page(post.metadata, profile)
+            if preloads:
+                print(format_preload_stats(preloads))
+
+            final_html = render_post(post, html_template, symbols, profile, line_offset, pool, assets, max_output,
+                                     base_dir)
+        except FileNotFoundError as e:
+            print(f"Error: File not found - {e}", file=sys.stderr)
+            sys.exit(1)
+        except TemplateError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        with profile_stage(profile, "write"):
+            with open(output_file, "w", encoding="utf-8") as f:
+                f.write(final_html)
+            if assets is not None:
+                assets.remove_stale()
+
+    print(f"Successfully compiled {input_file} to {output_file}")
+    return output_file
+
+
+def compile_markdown_stream(input_file, output_file=None, symbols=None, profile=None, pool=None,
+                            inline_limit=INLINE_LIMIT, max_output=MAX_OUTPUT):
+    """Compile a markdown file to HTML a chunk at a time and return the output path.
+
+    The frontmatter header is read on its own and the body is mapped into
+    memory with mmap, so memory use doesn't grow with the size of the file.
+    """
+    import mmap
+
+    with profile_stage(profile, "compile", file=input_file):
+        try:
+            source = open(input_file, "rb")
+        except FileNotFoundError as e:
+            print(f"Error: File not found - {e}", file=sys.stderr)
+            sys.exit(1)
+
+        output_file = output_file or input_file.rsplit(".", 1)[0] + ".html"
+
+        with source:
+            with profile_stage(profile, "frontmatter_load"):
+                metadata, body_start, line_offset = read_frontmatter(source)
+            base_dir = os.path.dirname(os.path.abspath(input_file))
+            # Empty files can't be mapped
+            if os.fstat(source.fileno()).st_size > body_start:
+                data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = b""
+            assets = PageAssets(output_file, inline_limit) if inline_limit is not None else None
+            try:
+                html_template = page_template(metadata, base_dir)
+                preloads = preload_page(metadata, profile)
+                if preloads:
+                    print(format_preload_stats(preloads))
+                with open(output_file, "w", encoding="utf-8") as f:
+                    render_body_stream(metadata, data, body_start, html_template, f,
+                                       symbols, profile, line_offset, pool=pool, assets=assets,
+                                       max_output=max_output, base_dir=base_dir)
+            except FileNotFoundError as e:
+                print(f"Error: File not found - {e}", file=sys.stderr)
+                sys.exit(1)
+            except TemplateError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            finally:
+                if data:
+                    data.close()
+            if assets is not None:
+                assets.remove_stale()
 
     print(f"Successfully compiled {input_file} to {output_file}")
+    return output_file
+
+
+def main(argv=None):
+    """Main function to compile the markdown files.
+
+    With POWER_COMPILER_DAEMON set, the command is handed to a running compile
+    daemon (see compiler/daemon.py) and only runs here if none is available.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if os.environ.get("POWER_COMPILER_DAEMON", "") not in ("", "0"):
+        from compiler.daemon import forward_to_daemon
+        exit_code = forward_to_daemon(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    run_cli(argv)
+
+
+def run_cli(argv):
+    """Parse the command line arguments and compile in this process."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="compiler/main.py",description="Compile special Markdown files to HTML.")
+    parser.add_argument("input_files", nargs="+", metavar="input_file", help="The path to an input Markdown file.")
+    parser.add_argument("-o", "--output", dest="output_file", help="The path to the output HTML file (single input only).")
+    parser.add_argument("--symbols", dest="symbols_file",
+                        help="Write a JSON index of the ids, headings and links of every page to this file.")
+    parser.add_argument("--check-links", action="store_true",
+                        help="Check for duplicate ids and broken intra- and cross-page links.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read and write each page a chunk at a time instead of holding it in memory (for very large pages).")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Run python-power blocks that don't depend on each other in this many processes.")
+    parser.add_argument("--inline-limit", type=int, default=INLINE_LIMIT, metavar="CHARS",
+                        help=f"Write python-power outputs longer than this to files next to the page (default {INLINE_LIMIT}, "
+                             "0 keeps everything in the page).")
+    parser.add_argument("--max-output", type=int, default=MAX_OUTPUT, metavar="CHARS",
+                        help=f"Cut off the output of each python-power block after this many characters (default {MAX_OUTPUT}).")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print wall time and memory allocated per stage and python-power block.")
+    parser.add_argument("--profile", dest="profile_file",
+                        help="Write the stage timings to this file as Chrome trace JSON (chrome://tracing, Perfetto).")
+    args = parser.parse_args(argv)
+
+    if args.output_file and len(args.input_files) > 1:
+        parser.error("-o/--output can only be used with a single input file")
+    if args.jobs < 1:
+        parser.error("-j/--jobs must be at least 1")
+    if args.max_output < 0:
+        parser.error("--max-output can't be negative")
+
+    profile = CompileProfile() if args.timings or args.profile_file else None
+    collect_symbols = bool(args.symbols_file or args.check_links)
+    pages = {}
+    pool = BlockPool(args.jobs) if args.jobs > 1 else None
+    try:
+        for input_file in args.input_files:
+            symbols = new_page_symbols() if collect_symbols else None
+            output_file = compile_markdown(input_file, args.output_file, symbols, profile, args.stream, pool,
+                                           args.inline_limit or None, args.max_output)
+            if collect_symbols:
+                pages[(input_file, output_file)] = symbols
+    finally:
+        if pool is not None:
+            pool.close()
+
+    if args.timings:
+        print(profile.report())
+    if args.profile_file:
+        profile.write_chrome_trace(args.profile_file)
+        print(f"Wrote profile to {args.profile_file}")
 
+    if not collect_symbols:
+        return
 
-def main():
-    """Main function to compile the markdown file."""
-    parser = argparse.ArgumentParser(description="Compile a special Markdown file to HTML.")
-    parser.add_argument("input_file", help="The path to the input Markdown file.")
-    parser.add_argument("-o", "--output", dest="output_file", help="The path to the output HTML file.")
-    args = parser.parse_args()
+    # Page paths in the index are relative to the index file (or the current directory)
+    base_dir = os.path.dirname(os.path.abspath(args.symbols_file)) if args.symbols_file else os.getcwd()
+    index = build_symbol_index(pages, base_dir)
+    if args.symbols_file:
+        write_symbol_index(index, args.symbols_file)
+        print(f"Wrote symbol index to {args.symbols_file}")
 
-    compile_markdown(args.input_file, args.output_file)
+    if args.check_links:
+        problems = check_links(index, base_dir)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        if problems:
+            print(f"Link check failed: {len(problems)} problem(s)", file=sys.stderr)
+            sys.exit(1)
+        print("Link check passed")
 
 
 if __name__ == "__main__":
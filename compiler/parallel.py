@@ -0,0 +1,176 @@
+"""
+Parallel execution of python-power blocks for the Power Python Compiler.
+
+Each python-power block is exec'd in a namespace of its own, so blocks only
+affect each other through names they declare global (which end up in the
+compiler module's globals) and through side effects: files, the process
+environment, the state of imported modules. The AST of each block is
+analysed for both, and blocks that can't affect or be affected by any
+other block run on a process pool while the page renders; the others run
+in order in the compiler's own process, as before. Outputs are stitched
+back in document order by the renderer, so the page is the same as with
+sequential execution.
+
+The check is conservative: a block only runs on the pool if every name it
+reads from outside itself is a builtin in SAFE_BUILTINS, it only imports
+modules in PURE_MODULES, and it changes no object it didn't create.
+Anything else (a name from the compiler's globals such as os, other
+modules, relative imports) keeps it in order.
+"""
+
+import ast
+import builtins
+import symtable
+
+# Builtins without side effects
+SAFE_BUILTINS = frozenset([
+    "abs", "all", "any", "ascii", "bin", "bool", "bytearray", "bytes", "callable", "chr",
+    "classmethod", "complex", "dict", "divmod", "enumerate", "filter", "float", "format",
+    "frozenset", "getattr", "hasattr", "hash", "hex", "id", "int", "isinstance", "issubclass",
+    "iter", "len", "list", "map", "max", "memoryview", "min", "next", "object", "oct", "ord",
+    "pow", "print", "property", "range", "repr", "reversed", "round", "set", "slice", "sorted",
+    "staticmethod", "str", "sum", "super", "tuple", "type", "zip", "Ellipsis", "NotImplemented",
+]) | frozenset(name for name, value in vars(builtins).items()
+                if isinstance(value, type) and issubclass(value, BaseException))
+
+# Modules that keep no state a block could change for other blocks
+PURE_MODULES = frozenset([
+    "array", "base64", "binascii", "bisect", "cmath", "collections", "colorsys", "copy",
+    "dataclasses", "datetime", "difflib", "enum", "fractions", "functools", "hashlib", "heapq",
+    "html", "itertools", "json", "math", "numbers", "operator", "pprint", "re", "statistics",
+    "string", "textwrap", "typing", "unicodedata",
+])
+
+
+class BlockAnalysis:
+    """What one python-power block reads and writes, from its AST."""
+
+    __slots__ = ("reads", "writes", "stateful")
+
+    def __init__(self, reads, writes, stateful):
+        self.reads = reads  # Names read from the compiler's globals or the builtins
+        self.writes = writes  # Names declared global or nonlocal
+        self.stateful = stateful  # Whether the block may have side effects
+
+    @property
+    def independent(self):
+        """Whether the block can run in another process on its own."""
+        return not self.stateful and not self.writes
+
+
+def root_name(node):
+    """The name at the root of an attribute or subscript chain, or None."""
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def free_names(table):
+    """The names the code of a symbol table and its children read from outside the block.
+
+    Blocks are exec'd with a namespace of their own for locals, so functions
+    in a block look up names they don't bind in the compiler's globals, not
+    in the block.
+    """
+    names = set()
+    for symbol in table.get_symbols():
+        if not symbol.is_referenced():
+            continue
+        if table.get_type() == "module":
+            if not (symbol.is_assigned() or symbol.is_imported()):
+                names.add(symbol.get_name())
+        elif symbol.is_global():
+            names.add(symbol.get_name())
+    for child in table.get_children():
+        names |= free_names(child)
+    return names
+
+
+def analyze_block(code):
+    """Return the BlockAnalysis of the python-power block code."""
+    try:
+        tree = ast.parse(code)
+        reads = free_names(symtable.symtable(code, "<python-power>", "exec"))
+    except SyntaxError:
+        # Let it fail in order, like any other block
+        return BlockAnalysis(set(), set(), True)
+
+    writes = set()
+    stateful = not reads <= SAFE_BUILTINS
+    bound = set()  # Names the block binds itself (other than imports)
+    mutated = set()  # Roots of attributes and items the block assigns or deletes
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if not isinstance(node.ctx, ast.Load):
+                bound.add(node.id)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            writes.update(node.names)
+        elif isinstance(node, ast.Import):
+            stateful = stateful or any(alias.name.split(".")[0] not in PURE_MODULES for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            stateful = stateful or node.level > 0 or node.module.split(".")[0] not in PURE_MODULES
+        elif isinstance(node, (ast.Attribute, ast.Subscript)) and not isinstance(node.ctx, ast.Load):
+            mutated.add(root_name(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+
+    # Changing an object the block didn't create changes shared state
+    # (an imported module, or something from the compiler's globals)
+    stateful = stateful or bool(mutated - bound)
+    return BlockAnalysis(reads, writes, stateful)
+
+
+class BlockPool:
+    """Runs independent python-power blocks on a pool of worker processes.
+
+    One pool can be used for a whole run of compiles. The worker processes
+    are started when the first block is submitted.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def submit_independent(self, function, tokens):
+        """Start function(code) in the pool for each independent python-power block in tokens.
+
+        Returns {id(token): future} for the blocks started; the others have
+        to be run in order by the caller.
+        """
+        futures = {}
+        for token in tokens:
+            if token.type != "fence" or token.info.strip() != "python-power":
+                continue
+            if analyze_block(token.content).independent:
+                if self._executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+                futures[id(token)] = self._executor.submit(function, token.content)
+        return futures
+
+
+def block_result(future, function, code):
+    """The result of a block started by BlockPool.submit_independent.
+
+    If the pool broke (a worker process died), the block is run with
+    function in this process instead.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return function(code)
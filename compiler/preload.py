@@ -0,0 +1,69 @@
+"""
+Module preloading for python-power blocks.
+
+A page lists the modules its blocks import in a `preload` frontmatter key:
+
+    ---
+    preload: [numpy, pandas]
+    ---
+
+They are imported once before the page's blocks run, with the time each
+import takes recorded, so that it shows up as import time instead of as
+time spent in the first block that imports it. The compile daemon (see
+compiler/daemon.py) keeps the modules its compiles preloaded imported and
+forks each compile from itself, so later compiles start with them loaded.
+"""
+
+import importlib
+import sys
+import time
+
+from compiler.profiling import profile_stage
+
+# Every module name a page has asked to preload in this process
+requested = set()
+
+
+def page_preloads(metadata):
+    """Return the module names in a page's preload key (a list or a comma-separated string)."""
+    names = metadata.get("preload") or []
+    if isinstance(names, str):
+        names = names.split(",")
+    return [name.strip() for name in names if isinstance(name, str) and name.strip()]
+
+
+def preload_modules(names, profile=None):
+    """Import each of names, returning [(name, seconds, error)].
+
+    seconds is None for modules that were already imported, and error the
+    message of a failed import (which is otherwise ignored: the block that
+    imports the module reports it).
+    """
+    stats = []
+    for name in names:
+        requested.add(name)
+        if name in sys.modules:
+            stats.append((name, None, None))
+            continue
+        start = time.perf_counter()
+        error = None
+        with profile_stage(profile, name, "preload"):
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        stats.append((name, time.perf_counter() - start, error))
+    return stats
+
+
+def format_preload_stats(stats):
+    """Return a one-line summary of preload_modules' result."""
+    parts = []
+    for name, seconds, error in stats:
+        if error:
+            parts.append(f"{name} (failed: {error})")
+        elif seconds is None:
+            parts.append(f"{name} (already loaded)")
+        else:
+            parts.append(f"{name} ({seconds * 1000:.1f} ms)")
+    return "Preloaded " + ", ".join(parts)
@@ -0,0 +1,146 @@
+"""
+Compile profiling for the Power Python Compiler.
+Records wall time and memory allocations per pipeline stage and per
+python-power block, and reports them as text, Chrome trace events or
+Server-Timing headers.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class ProfileRecord:
+    """One timed span: a pipeline stage or a python-power block."""
+
+    __slots__ = ("name", "category", "depth", "start", "duration", "peak_bytes", "net_bytes", "args")
+
+    def __init__(self, name, category, depth, start, args):
+        self.name = name
+        self.category = category
+        self.depth = depth
+        self.start = start
+        self.duration = 0.0
+        self.peak_bytes = None
+        self.net_bytes = None
+        self.args = args
+
+
+class CompileProfile:
+    """Collects ProfileRecords for one or more compiles.
+
+    Pass an instance to compile_markdown / compile_string / render_post to
+    profile them. With track_allocations, tracemalloc measures the peak and
+    net memory allocated inside each span (which slows compiles down).
+    """
+
+    def __init__(self, track_allocations=True):
+        self.track_allocations = track_allocations
+        self.records = []
+        self.origin = time.perf_counter()
+        # Open spans as [record, traced memory at start, highest peak seen]
+        self._stack = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name, category="stage", **args):
+        """Time the enclosed block as a span called name."""
+        # Imported here to keep it out of the compiler's startup time
+        import tracemalloc
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        record = ProfileRecord(name, category, len(self._stack), time.perf_counter() - self.origin, args)
+        self.records.append(record)
+
+        if self.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak for this span would lose it for the enclosing spans
+            for entry in self._stack:
+                entry[2] = max(entry[2], peak)
+            tracemalloc.reset_peak()
+            self._stack.append([record, current, current])
+        else:
+            self._stack.append([record, 0, 0])
+
+        try:
+            yield record
+        finally:
+            entry = self._stack.pop()
+            record.duration = time.perf_counter() - self.origin - record.start
+            if self.track_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(entry[2], peak)
+                record.peak_bytes = peak - entry[1]
+                record.net_bytes = current - entry[1]
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], peak)
+            if not self._stack and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def report(self):
+        """Return a human-readable table of all spans."""
+        lines = [f"{'stage':<48} {'wall ms':>10} {'peak KB':>10} {'net KB':>10}"]
+        for record in self.records:
+            name = "  " * record.depth + record.name
+            if "line" in record.args:
+                # A pooled block ran in another process; its span is the wait for its output
+                name += f" (line {record.args['line']}, pooled)" if record.args.get("pooled") else f" (line {record.args['line']})"
+            elif "file" in record.args:
+                name += f" {record.args['file']}"
+            peak = f"{record.peak_bytes / 1024:.1f}" if record.peak_bytes is not None else "-"
+            net = f"{record.net_bytes / 1024:.1f}" if record.net_bytes is not None else "-"
+            lines.append(f"{name:<48} {record.duration * 1000:>10.2f} {peak:>10} {net:>10}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Return the spans as a Chrome trace-event document (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+        for record in self.records:
+            args = dict(record.args)
+            if record.peak_bytes is not None:
+                args["peak_bytes"] = record.peak_bytes
+                args["net_bytes"] = record.net_bytes
+            events.append({
+                "name": record.name,
+                "cat": record.category,
+                "ph": "X",
+                "ts": round(record.start * 1e6, 3),
+                "dur": round(record.duration * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """Write the Chrome trace-event JSON to a file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def server_timing(self):
+        """Return the top-level stages and python-power blocks as a Server-Timing header value."""
+        metrics = []
+        for record in self.records:
+            if record.category == "python-power":
+                name = f"python-power-line-{record.args.get('line', 0)}"
+            elif record.depth <= 1 and record.category == "stage":
+                name = record.name
+            else:
+                continue
+            metrics.append(f"{name};dur={record.duration * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+def profile_stage(profile, name, category="stage", **args):
+    """Return profile.stage(...) or a no-op context manager when profile is None."""
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name, category, **args)
@@ -0,0 +1,71 @@
+"""
+Linear-time scanners for the Power Python Compiler's HTML post-processing.
+
+The compiler used to find attribute blocks and HTML tags with regexes like
+\\{([^}]+)\\} and <([a-zA-Z0-9]+)([^>]*?)>. When the closing character is
+missing, such a regex scans to the end of the text from every opening
+character, which is quadratic on inputs like "{{{{..." or "<a <a <a ...".
+These scanners find the same matches, but stop at the first opening
+character that has no closing one after it, since no later one can have
+one either.
+"""
+
+import re
+
+TAG_NAME = re.compile(r'[a-zA-Z0-9]+')
+
+
+def find_attribute_blocks(text, start=0):
+    """Yield (start, end, content) for each {...} attribute block in text.
+
+    Finds what re.finditer(r'\\{([^}]+)\\}', text) would.
+    """
+    pos = text.find("{", start)
+    while pos >= 0:
+        close = text.find("}", pos + 1)
+        if close < 0:
+            return
+        if close == pos + 1:
+            # {} isn't an attribute block
+            pos = text.find("{", close)
+            continue
+        yield pos, close + 1, text[pos + 1:close]
+        pos = text.find("{", close + 1)
+
+
+def remove_attribute_blocks(text):
+    """Return text without its attribute blocks."""
+    parts = []
+    cursor = 0
+    for start, end, _ in find_attribute_blocks(text):
+        parts.append(text[cursor:start])
+        cursor = end
+    if not parts:
+        return text
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+def next_opening_tag(text, start=0):
+    """Return (start, end, name, attributes) of the first opening tag at or after start, or None.
+
+    Finds what re.search(r'<([a-zA-Z0-9]+)([^>]*?)>', text, start) would.
+    """
+    pos = text.find("<", start)
+    while pos >= 0:
+        name = TAG_NAME.match(text, pos + 1)
+        if name:
+            close = text.find(">", name.end())
+            if close < 0:
+                return None
+            return pos, close + 1, name.group(), text[name.end():close]
+        pos = text.find("<", pos + 1)
+    return None
+
+
+def find_opening_tags(text):
+    """Yield (start, end, name, attributes) for each opening tag in text."""
+    tag = next_opening_tag(text)
+    while tag is not None:
+        yield tag
+        tag = next_opening_tag(text, tag[1])
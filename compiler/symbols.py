@@ -0,0 +1,170 @@
+"""
+Symbol index and link checker for the Power Python Compiler.
+Collects the ids, headings and links of each page while it is rendered and
+validates intra- and cross-page links from that index without re-parsing HTML.
+"""
+
+import json
+import os
+import posixpath
+import re
+from collections import Counter
+
+from compiler.scanning import find_attribute_blocks, next_opening_tag, remove_attribute_blocks
+
+# Bump when the JSON layout changes
+SYMBOL_INDEX_VERSION = 1
+
+# The id inside an {#id ...} attribute block
+ATTR_ID_PATTERN = re.compile(r'(?:^|\s)#([^\s}]+)')
+
+# id="..." and href="..." attributes in raw HTML blocks
+RAW_ID_PATTERN = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+# (href is looked for inside each <a> tag, see find_raw_hrefs)
+RAW_HREF_START_PATTERN = re.compile(r'\bhref\s*=\s*["\']', re.IGNORECASE)
+RAW_HREF_VALUE_PATTERN = re.compile(r'([^"\']*)["\']')
+
+# Links with a scheme (http:, mailto:, ...) or protocol-relative links aren't checked
+EXTERNAL_LINK_PATTERN = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)')
+
+
+def new_page_symbols():
+    """Return an empty symbol record for one page."""
+    return {"title": "", "ids": [], "headings": [], "links": []}
+
+
+def collect_token_symbols(tokens, symbols):
+    """Record headings, links and raw-HTML ids from markdown-it tokens."""
+    heading_level = None
+    for token in tokens:
+        if token.type == "heading_open":
+            heading_level = int(token.tag[1:])
+        elif token.type == "heading_close":
+            heading_level = None
+        elif token.type in ("html_block", "html_inline"):
+            collect_raw_html_symbols(token.content, symbols)
+
+        if token.type != "inline":
+            continue
+
+        if heading_level is not None:
+            attr_match = next(find_attribute_blocks(token.content), None)
+            id_match = ATTR_ID_PATTERN.search(attr_match[2]) if attr_match else None
+            symbols["headings"].append({
+                "level": heading_level,
+                "text": remove_attribute_blocks(token.content).strip(),
+                "id": id_match.group(1) if id_match else None,
+            })
+
+        children = token.children or []
+        for i, child in enumerate(children):
+            if child.type == "link_open":
+                # The link text is everything up to the matching link_close
+                text = []
+                for following in children[i + 1:]:
+                    if following.type == "link_close":
+                        break
+                    text.append(following.content)
+                symbols["links"].append({"href": child.attrGet("href") or "", "text": "".join(text)})
+            elif child.type == "html_inline":
+                collect_raw_html_symbols(child.content, symbols)
+
+
+def collect_raw_html_symbols(html, symbols):
+    """Record ids and links written as raw HTML."""
+    symbols["ids"].extend(RAW_ID_PATTERN.findall(html))
+    for href in find_raw_hrefs(html):
+        symbols["links"].append({"href": href, "text": ""})
+
+
+def find_raw_hrefs(html):
+    """Return the href values of the <a> tags in html.
+
+    Scans tag by tag rather than with one <a ...href="..." regex, which
+    would rescan to the end of the text from every <a that has no href.
+    """
+    hrefs = []
+    tag = next_opening_tag(html)
+    while tag is not None:
+        start, end, tag_name, _ = tag
+        if tag_name.lower() == "a":
+            href = RAW_HREF_START_PATTERN.search(html, start + 2, end)
+            value = RAW_HREF_VALUE_PATTERN.match(html, href.end()) if href else None
+            if value:
+                hrefs.append(value.group(1))
+                # A quoted value can contain ">"
+                end = max(end, value.end())
+        tag = next_opening_tag(html, end)
+    return hrefs
+
+
+def to_index_path(path, base_dir):
+    """Path relative to the index base directory, with forward slashes."""
+    return os.path.relpath(os.path.abspath(path), base_dir).replace(os.sep, "/")
+
+
+def build_symbol_index(pages, base_dir):
+    """Build the site symbol index.
+
+    pages maps (source file, output file) pairs to the symbol records
+    collected while rendering them. Page keys in the index are output paths
+    relative to base_dir.
+    """
+    base_dir = os.path.abspath(base_dir)
+    index = {"version": SYMBOL_INDEX_VERSION, "pages": {}}
+    for (source_file, output_file), symbols in pages.items():
+        index["pages"][to_index_path(output_file, base_dir)] = dict(symbols, source=to_index_path(source_file, base_dir))
+    return index
+
+
+def write_symbol_index(index, path):
+    """Write the symbol index as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+
+def load_symbol_index(path):
+    """Load a symbol index written by write_symbol_index."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_links(index, base_dir):
+    """Validate ids and links across all pages of a symbol index.
+
+    Reports duplicate ids within a page, links to pages that don't exist and
+    links to anchors that aren't defined on their target page. Returns a list
+    of problem descriptions.
+    """
+    pages = index["pages"]
+    page_ids = {page: set(info["ids"]) for page, info in pages.items()}
+    # Links may point at the markdown source instead of the rendered page
+    page_by_source = {info["source"]: page for page, info in pages.items()}
+
+    problems = []
+    for page, info in sorted(pages.items()):
+        for element_id, count in sorted(Counter(info["ids"]).items()):
+            if count > 1:
+                problems.append(f"{page}: duplicate id '{element_id}' ({count} times)")
+
+        for link in info["links"]:
+            href = link["href"]
+            if not href or EXTERNAL_LINK_PATTERN.match(href):
+                continue
+
+            path, _, fragment = href.partition("#")
+            path = path.split("?", 1)[0]
+            if not path:
+                target = page
+            else:
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+                target = page_by_source.get(target, target)
+                if target not in pages:
+                    if not os.path.exists(os.path.join(base_dir, target)):
+                        problems.append(f"{page}: broken link '{href}' (no such page)")
+                    # Anchors of pages outside the build can't be checked
+                    continue
+
+            if fragment and fragment not in page_ids[target]:
+                problems.append(f"{page}: broken link '{href}' (no id '{fragment}' in {target})")
+    return problems
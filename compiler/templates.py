@@ -0,0 +1,193 @@
+"""
+Page layouts for the Power Python Compiler.
+
+A layout is an HTML file with string.Template style placeholders ($title,
+${html_content}, $$ for a dollar sign) that can include partials:
+
+    <!--#include file="partials/header.html" -->
+
+Include paths are relative to the file that includes them, and can use
+placeholders (file="partials/$sidebar.html") to pick a partial per page.
+Pages choose their layout with the `layout` frontmatter key; pages without
+one use compiler/template.html.
+
+Each file is compiled once into a list of literal text and placeholders,
+with its static includes inlined, and kept in a TemplateCache. A cached
+layout is used again as long as the modification times of its files are
+unchanged, or, if they changed, their contents hash the same.
+"""
+
+import hashlib
+import os
+import re
+
+# Same syntax as string.Template
+PLACEHOLDER = re.compile(r'\$(?:(?P<escaped>\$)|(?P<named>[_a-z][_a-z0-9]*)|\{(?P<braced>[_a-z][_a-z0-9]*)\}|(?P<invalid>))',
+                         re.IGNORECASE | re.ASCII)
+INCLUDE = re.compile(r'<!--#include\s+file="([^"]*)"\s*-->')
+
+
+class TemplateError(ValueError):
+    """A layout or partial that can't be compiled or rendered."""
+
+
+class CompiledTemplate:
+    """A layout or partial compiled into literal text and placeholders.
+
+    parts holds strings, which are literal text, and tuples:
+    ("value", name) for a placeholder and ("include", parts, base_dir) for
+    an include whose path depends on placeholders.
+    """
+
+    def __init__(self, path, parts, cache):
+        self.path = path
+        self.parts = parts
+        self.cache = cache
+
+    @property
+    def names(self):
+        """The placeholder names used, apart from those in partials chosen per page."""
+        names = set()
+        for part in self.parts:
+            if isinstance(part, str):
+                continue
+            if part[0] == "value":
+                names.add(part[1])
+            else:
+                # The placeholders in the include path
+                names.update(path_part[1] for path_part in part[1] if not isinstance(path_part, str))
+        return names
+
+    def render(self, values):
+        """Return the text with the placeholders replaced from the values dict."""
+        return "".join(self._render(self.parts, values))
+
+    def _render(self, parts, values):
+        for part in parts:
+            if isinstance(part, str):
+                yield part
+            elif part[0] == "value":
+                try:
+                    yield str(values[part[1]])
+                except KeyError:
+                    raise TemplateError(f"{self.path}: no value for ${part[1]}") from None
+            else:
+                path = "".join(self._render(part[1], values))
+                yield self.cache.load(os.path.join(part[2], path)).render(values)
+
+    def split(self, name="html_content"):
+        """Split the template around the placeholder name into head and tail templates."""
+        for i, part in enumerate(self.parts):
+            if part == ("value", name):
+                return (CompiledTemplate(self.path, self.parts[:i], self.cache),
+                        CompiledTemplate(self.path, self.parts[i + 1:], self.cache))
+        raise TemplateError(f"{self.path}: no ${name} placeholder")
+
+
+def compile_text(text, path):
+    """Split text into literal strings and ("value", name) parts."""
+    parts = []
+    cursor = 0
+    for match in PLACEHOLDER.finditer(text):
+        if match.group("invalid") is not None:
+            line = text.count("\n", 0, match.start()) + 1
+            raise TemplateError(f"{path}, line {line}: invalid placeholder")
+        literal = text[cursor:match.start()]
+        if match.group("escaped"):
+            literal += "$"
+        if literal:
+            if parts and isinstance(parts[-1], str):
+                parts[-1] += literal
+            else:
+                parts.append(literal)
+        if not match.group("escaped"):
+            parts.append(("value", match.group("named") or match.group("braced")))
+        cursor = match.end()
+    if cursor < len(text):
+        if parts and isinstance(parts[-1], str):
+            parts[-1] += text[cursor:]
+        else:
+            parts.append(text[cursor:])
+    return parts
+
+
+class TemplateCache:
+    """Compiled layouts and partials by path, checked against their files on each load."""
+
+    def __init__(self):
+        # path -> (CompiledTemplate, [[file, mtime_ns, size, sha256]] for it and its static includes)
+        self._entries = {}
+        self.compiles = 0  # Files compiled, for checking that each is only compiled once
+
+    def load(self, path):
+        """Return the compiled template for the file at path.
+
+        Raises FileNotFoundError if it or a static include doesn't exist,
+        and TemplateError if it can't be compiled.
+        """
+        return self._load(os.path.abspath(path), [])[0]
+
+    def _load(self, path, including):
+        """Return the (template, files) cache entry for path, compiling it if needed.
+
+        including is the list of files that include path, innermost last.
+        """
+        if path in including:
+            raise TemplateError(f"{path}: includes itself (through {' -> '.join(including)})")
+        entry = self._entries.get(path)
+        if entry is None or not self._unchanged(entry[1]):
+            files = []
+            parts = self._compile_file(path, files, including)
+            entry = (CompiledTemplate(path, parts, self), files)
+            self._entries[path] = entry
+        return entry
+
+    def _unchanged(self, files):
+        """Whether none of files changed, bringing the recorded times up to date if only those did."""
+        for record in files:
+            try:
+                stat = os.stat(record[0])
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) == (record[1], record[2]):
+                continue
+            with open(record[0], "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() != record[3]:
+                    return False
+            # Touched or copied over with the same content
+            record[1], record[2] = stat.st_mtime_ns, stat.st_size
+        return True
+
+    def _compile_file(self, path, files, including):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        files.append([path, stat.st_mtime_ns, stat.st_size, hashlib.sha256(data).hexdigest()])
+        self.compiles += 1
+        text = data.decode("utf-8")
+
+        base_dir = os.path.dirname(path)
+        parts = []
+        cursor = 0
+        for match in INCLUDE.finditer(text):
+            parts.extend(compile_text(text[cursor:match.start()], path))
+            include_parts = compile_text(match.group(1), path)
+            if all(isinstance(part, str) for part in include_parts):
+                include_path = os.path.normpath(os.path.join(base_dir, "".join(include_parts)))
+                # Partials shared by several layouts are compiled once too
+                partial, partial_files = self._load(include_path, including + [path])
+                parts.extend(partial.parts)
+                files.extend(partial_files)
+            else:
+                parts.append(("include", include_parts, base_dir))
+            cursor = match.end()
+        parts.extend(compile_text(text[cursor:], path))
+        return parts
+
+
+def layout_path(layout, base_dir):
+    """Path of the layout file named by a page's layout key (.html can be left out)."""
+    path = os.path.join(base_dir, layout)
+    if not os.path.splitext(path)[1]:
+        path += ".html"
+    return path
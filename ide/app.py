@@ -3,8 +3,18 @@ Main Flask application for the Power Python IDE.
 Provides a web-based interface for editing and compiling markdown files.
 """
 
+import hashlib
 import os
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import sys
+import threading
+import time
+from collections import OrderedDict
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from compiler.main import compile_string
+from compiler.profiling import CompileProfile
+from ide.metrics import Registry, SIZE_BUCKETS
 
 app = Flask(__name__)
 
@@ -13,10 +23,44 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'md', 'markdown'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Report compile stage timings in a Server-Timing response header (browser devtools show them)
+app.config['SERVER_TIMING'] = os.environ.get('POWER_IDE_SERVER_TIMING', '') not in ('', '0')
+
+# Compiling runs the python-power blocks of the submitted page on this server, so
+# anyone who can reach /compile can run any code as the server's user. Only turn
+# this on for a server that only trusted users can reach.
+app.config['ALLOW_COMPILE'] = os.environ.get('POWER_IDE_ALLOW_COMPILE', '') not in ('', '0')
+# Compiled pages kept in memory, keyed by a hash of the source. Off (0) by default:
+# python-power output that depends on the clock, files or the network would be
+# served from the cache until the source changes.
+app.config['COMPILE_CACHE_SIZE'] = int(os.environ.get('POWER_IDE_COMPILE_CACHE_SIZE', '0'))
 
 # Ensure upload folder exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+compile_cache = OrderedDict()
+compile_cache_lock = threading.Lock()
+# python-power output is captured by swapping sys.stdout, which is process-wide,
+# so compiles run one at a time on the request threads
+compile_lock = threading.Lock()
+
+# Metrics served at /metrics
+metrics = Registry()
+compile_requests = metrics.counter('powerpy_compile_requests_total', 'Compile requests handled.', ['result'])
+compile_errors = metrics.counter('powerpy_compile_errors_total', 'Compiles that raised an exception.', ['type'])
+compile_duration = metrics.histogram('powerpy_compile_duration_seconds', 'Time spent compiling a document.')
+python_power_duration = metrics.histogram('powerpy_python_power_duration_seconds',
+                                          'Execution time of a single python-power block.')
+request_bytes = metrics.histogram('powerpy_compile_request_bytes', 'Size of the submitted markdown.',
+                                  buckets=SIZE_BUCKETS)
+response_bytes = metrics.histogram('powerpy_compile_response_bytes', 'Size of the compiled HTML.',
+                                   buckets=SIZE_BUCKETS)
+cache_lookups = metrics.counter('powerpy_compile_cache_lookups_total', 'Compile cache lookups.', ['result'])
+cache_entries = metrics.gauge('powerpy_compile_cache_entries', 'Compiled pages held in the cache.')
+compiles_in_progress = metrics.gauge('powerpy_compiles_in_progress', 'Compiles running at the moment (at most 1).')
+compiles_waiting = metrics.gauge('powerpy_compiles_waiting', 'Compiles waiting for the running one to finish.')
+queue_wait = metrics.histogram('powerpy_compile_queue_wait_seconds', 'Time a compile waited for the running one.')
+
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
@@ -30,28 +74,86 @@ def index():
     return render_template('index.html')
 
 
+def run_compile(markdown_content):
+    """Compile once no other compile is running, recording the wait, duration and python-power timings."""
+    compiles_waiting.inc()
+    submitted = time.perf_counter()
+    with compile_lock:
+        compiles_waiting.dec()
+        queue_wait.observe(time.perf_counter() - submitted)
+        compiles_in_progress.inc()
+        try:
+            profile = CompileProfile(track_allocations=False)
+            start = time.perf_counter()
+            html_output = compile_string(markdown_content, profile)
+            compile_duration.observe(time.perf_counter() - start)
+            for record in profile.records:
+                if record.category == 'python-power':
+                    python_power_duration.observe(record.duration)
+            return html_output, profile
+        finally:
+            compiles_in_progress.dec()
+
+
+def cached_compile(markdown_content):
+    """Return (html, profile) for the content; profile is None for cache hits."""
+    cache_size = app.config['COMPILE_CACHE_SIZE']
+    key = hashlib.sha256(markdown_content.encode('utf-8')).hexdigest()
+    if cache_size > 0:
+        with compile_cache_lock:
+            html_output = compile_cache.get(key)
+            if html_output is not None:
+                compile_cache.move_to_end(key)
+        if html_output is not None:
+            cache_lookups.inc(result='hit')
+            return html_output, None
+        cache_lookups.inc(result='miss')
+
+    html_output, profile = run_compile(markdown_content)
+
+    if cache_size > 0:
+        with compile_cache_lock:
+            compile_cache[key] = html_output
+            while len(compile_cache) > cache_size:
+                compile_cache.popitem(last=False)
+            cache_entries.set(len(compile_cache))
+    return html_output, profile
+
+
 @app.route('/compile', methods=['POST'])
 def compile_file():
     """Compile a markdown file and return the HTML output."""
+    if not app.config['ALLOW_COMPILE']:
+        compile_requests.inc(result='disabled')
+        return jsonify({'success': False,
+                        'error': 'Compiling is disabled on this server because it runs the '
+                                 'python-power code it is sent. Set POWER_IDE_ALLOW_COMPILE=1 to enable it.'}), 403
     try:
         # Get the markdown content from the request
         markdown_content = request.json.get('content', '')
+        request_bytes.observe(len(markdown_content.encode('utf-8')))
         
-        # Save to a temporary file
-        temp_md_path = os.path.join(app.config['UPLOAD_FOLDER'], 'temp.md')
-        with open(temp_md_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        # Compile the markdown in memory
+        html_output, profile = cached_compile(markdown_content)
+        response_bytes.observe(len(html_output.encode('utf-8')))
+        compile_requests.inc(result='ok')
         
-        # Compile the markdown file
-        # Note: In a full implementation, you would import and use the compiler functions directly
-        # For now, we'll simulate the output
-        html_output = f"<h1>Compiled Output</h1><p>{markdown_content[:100]}...</p>"
-        
-        return jsonify({'success': True, 'html': html_output})
+        response = jsonify({'success': True, 'html': html_output})
+        if profile is not None and app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = profile.server_timing()
+        return response
     except Exception as e:
+        compile_requests.inc(result='error')
+        compile_errors.inc(type=type(e).__name__)
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose server metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/save', methods=['POST'])
 def save_file():
     """Save markdown content to a file."""
@@ -0,0 +1,126 @@
+"""
+Background compile worker for the Power Python Desktop IDE.
+Runs the compiler in a separate process so compiles don't block the Tk main
+loop and can be cancelled while python-power blocks are still executing.
+"""
+
+import multiprocessing
+import time
+
+
+def fallback_html(content):
+    """Build a plain page for when the compiler can't be imported."""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Compiled Output</title>
+</head>
+<body>
+    <h1>Compiled Output</h1>
+    <pre>{content}</pre>
+</body>
+</html>"""
+
+
+def _compile_in_child(content, conn):
+    """Worker process entry point: compile content and send the result back."""
+    import io
+    from contextlib import redirect_stdout
+
+    try:
+        try:
+            from compiler.main import compile_string
+        except ImportError as e:
+            # Fallback: use the content as-is if compiler is not available
+            print(f"Warning: Could not import compiler: {e}")
+            conn.send(("ok", fallback_html(content)))
+            return
+
+        # Keep anything the compiler prints out of the IDE's console
+        with redirect_stdout(io.StringIO()):
+            compiled_html = compile_string(content)
+        conn.send(("ok", compiled_html))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+class CompileWorker:
+    """Runs one compile at a time in a child process.
+
+    Submitting a new compile while another is in flight terminates the old
+    one, so the newest request always wins. Results are collected with poll(),
+    which the IDE calls from Tk after() callbacks on the UI thread.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.job_id = 0
+        self.started_at = None
+
+    @property
+    def busy(self):
+        """Whether a compile is currently in flight."""
+        return self.process is not None
+
+    def elapsed(self):
+        """Seconds since the current compile was submitted."""
+        if self.started_at is None:
+            return 0.0
+        return time.monotonic() - self.started_at
+
+    def submit(self, content):
+        """Start compiling content, superseding any compile in flight. Returns the job id."""
+        self.cancel()
+
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_compile_in_child, args=(content, child_conn), daemon=True)
+        self.process.start()
+        # The child owns its end of the pipe now
+        child_conn.close()
+
+        self.conn = parent_conn
+        self.job_id += 1
+        self.started_at = time.monotonic()
+        return self.job_id
+
+    def poll(self):
+        """Return (status, payload) once the current compile finishes, otherwise None.
+
+        status is "ok" with the compiled HTML as payload, or "error" with a message.
+        """
+        if not self.busy:
+            return None
+
+        try:
+            if self.conn.poll():
+                result = self.conn.recv()
+            elif self.process.exitcode is not None:
+                result = ("error", f"Compiler process exited unexpectedly (exit code {self.process.exitcode})")
+            else:
+                return None
+        except (EOFError, OSError) as e:
+            result = ("error", f"Lost connection to compiler process: {e}")
+
+        self._cleanup()
+        return result
+
+    def cancel(self):
+        """Terminate the compile in flight, if any. Returns True if one was cancelled."""
+        if not self.busy:
+            return False
+
+        if self.process.is_alive():
+            self.process.terminate()
+        self._cleanup()
+        return True
+
+    def _cleanup(self):
+        """Release the process and pipe of the current compile."""
+        self.process.join(timeout=1)
+        self.conn.close()
+        self.process = None
+        self.conn = None
+        self.started_at = None
@@ -3,22 +3,56 @@ Main application for the Power Python Desktop IDE.
 A GUI-based IDE built with Tkinter and Pygments.
 """
 
+import time
+# Taken before the other imports so the startup timings in the debug log include them
+STARTUP_STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 import os
 import sys
 import webbrowser
 import json
+import logging
+import mmap
+import codecs
+import hashlib
+import bisect
+import re
+import threading
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-# Try to import SyntaxHighlighter, but handle missing dependencies gracefully
-try:
-    from ide.syntax.highlighter import SyntaxHighlighter
-    HIGHLIGHTING_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: Syntax highlighting not available: {e}")
-    SyntaxHighlighter = None
-    HIGHLIGHTING_AVAILABLE = False
+from ide.compile_worker import CompileWorker
+from ide.preview_renderer import render_preview, PREVIEW_TAG_STYLES
+from ide.find_engine import FindWorker, compile_search_pattern, touched_line_ranges
+from ide.session import HighlightCache, load_session, save_session, restore_nav_history
+from ide.tabs import TabRecord, TabLRU
+# The syntax highlighter (Pygments) and the Find in Files index (watchdog) are
+# imported after the window has been drawn, see finish_startup()
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this (in bytes) are opened in large-file mode:
+# loaded in chunks without syntax highlighting
+LARGE_FILE_THRESHOLD = 5 * 1024 * 1024
+
+# Number of bytes inserted into the editor per idle callback in large-file mode
+LARGE_FILE_CHUNK_SIZE = 256 * 1024
+
+# Undo steps kept per editor (Tk keeps an unlimited history by default)
+EDITOR_MAX_UNDO = 1000
+
+# Search options used when a search doesn't specify its own
+DEFAULT_SEARCH_OPTIONS = {"regex": False, "case_sensitive": True, "whole_word": False}
+
+# IDE configuration file
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".power_python_ide_config.json")
+
+# Default idle time (in milliseconds) before live preview recompiles
+DEFAULT_LIVE_PREVIEW_DELAY = 1000
+
+# Live preview always writes to this file in the working directory
+LIVE_PREVIEW_FILENAME = "render_preview.html"
 
 
 class PowerPythonIDE:
@@ -27,16 +61,49 @@ class PowerPythonIDE:
         self.root.title("Power Python IDE")
         self.root.geometry("1200x800")
         
-        # Track open files
+        # Track open files: file id -> TabRecord, and notebook tab -> file id
         self.open_files = {}
+        self.tab_files = {}
         self.current_file = None
+        self.untitled_count = 0
+        # Tabs that have editor widgets, least recently used first; the rest are hibernated
+        self.live_tabs = TabLRU()
         
         # Navigation history for file explorer
         self.nav_history = []
         self.nav_history_index = -1
         
-        # Working directory for saving files
-        self.working_directory = self.get_or_set_working_directory()
+        # Working directory for saving files; if none is configured yet the user
+        # is asked for one once the window is up
+        self.config = self.load_config()
+        self.working_directory = self.get_saved_working_directory() or os.getcwd()
+        
+        # Syntax highlighter class, set once it has been imported
+        self.highlighter_class = None
+        self.highlight_cache = HighlightCache()
+        self.started = False
+        
+        # Compiles run in a background process
+        self.compile_worker = CompileWorker()
+        self.compile_source = None
+        # "compile" for F5 compiles, "live" for live preview recompiles
+        self.compile_kind = None
+        
+        # Live preview state
+        self.live_preview_var = tk.BooleanVar(value=self.config.get("live_preview", False))
+        self.live_preview_delay = self.config.get("live_preview_delay", DEFAULT_LIVE_PREVIEW_DELAY)
+        self.live_preview_after_id = None
+        self.live_preview_hash = None
+        self.live_preview_pending_hash = None
+        
+        # Find/replace state: matches of the last search in the current buffer
+        self.find_worker = FindWorker()
+        self.search = None
+        
+        # Find in Files index of the working directory, built on first use
+        self.search_index = None
+        self.search_index_ready = False
+        self.search_index_observer = None
         
         # Create the UI
         self.create_menu()
@@ -47,22 +114,188 @@ class PowerPythonIDE:
         # Create a new empty document by default
         self.new_file()
         
-        # Start periodic file explorer refresh
+        # Everything else waits until the window has been drawn
+        self.root.bind("<Map>", self.on_first_map, add="+")
+        
+        # Save the session when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def on_first_map(self, event):
+        """Schedule the rest of startup once the main window is mapped."""
+        # The root's bindings also see <Map> events of every child widget
+        if event.widget is not self.root or self.started:
+            return
+        self.started = True
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        """Load the deferred parts of the IDE after the first paint."""
+        # Let Tk finish drawing the window before doing anything slow
+        self.root.update_idletasks()
+        logger.debug("First paint %.1f ms after startup", (time.perf_counter() - STARTUP_STARTED) * 1000)
+        
+        if not self.get_saved_working_directory():
+            self.working_directory = self.get_or_set_working_directory()
+        
+        # Reopen the previous session, or list the working directory
+        if not self.restore_session():
+            self.open_directory(self.working_directory)
         self.start_periodic_refresh()
+        logger.debug("File explorer listed %.1f ms after startup", (time.perf_counter() - STARTUP_STARTED) * 1000)
+        
+        self.load_highlighter()
     
-    def get_or_set_working_directory(self):
-        """Get the working directory from config or prompt user to select one."""
-        config_file = os.path.join(os.path.expanduser("~"), ".power_python_ide_config.json")
+    def load_highlighter(self):
+        """Import the syntax highlighter on a background thread and attach it to the open tabs."""
+        result = {}
+        
+        def load():
+            start = time.perf_counter()
+            try:
+                from ide.syntax.highlighter import SyntaxHighlighter
+                result["class"] = SyntaxHighlighter
+            except ImportError as e:
+                result["error"] = e
+            result["elapsed"] = time.perf_counter() - start
+        
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(50, poll)
+                return
+            if "error" in result:
+                print(f"Warning: Syntax highlighting not available: {result['error']}")
+                return
+            
+            logger.debug("Syntax highlighter imported in %.1f ms, ready %.1f ms after startup",
+                         result["elapsed"] * 1000, (time.perf_counter() - STARTUP_STARTED) * 1000)
+            self.highlighter_class = result["class"]
+            for file_id, file_info in self.open_files.items():
+                if file_info.highlighter is None and not file_info.hibernated:
+                    file_info.highlighter = self.highlighter_class(file_info.text_widget)
+                    self.apply_syntax_highlighting(file_id, use_cache=True)
+        
+        self.root.after(50, poll)
+    
+    def restore_session(self):
+        """Reopen the tabs and explorer location of the last session.
+        
+        Returns True if the file explorer was restored.
+        """
+        session = load_session()
+        if not session:
+            return False
+        
+        working_directory = session.get("working_directory")
+        if working_directory and os.path.isdir(working_directory):
+            self.working_directory = working_directory
+        
+        explorer_restored = False
+        history, index = restore_nav_history(session.get("nav_history"), session.get("nav_history_index", -1))
+        if history:
+            self.nav_history = history
+            self.nav_history_index = index
+            self.show_directory(history[index])
+            self.update_nav_buttons()
+            explorer_restored = True
+        
+        # Replace the empty tab created at startup
+        initial_file = self.current_file
+        restored = []
+        for tab in session.get("tabs", []):
+            filepath = tab.get("filepath")
+            if not filepath or not os.path.isfile(filepath):
+                continue
+            self.open_file_path(filepath)
+            file_info = self.open_files.get(filepath)
+            if not file_info:
+                continue
+            restored.append(filepath)
+            # Large files are still loading; their cursor starts at the top
+            if not file_info.loading:
+                text_widget = file_info.text_widget
+                text_widget.mark_set(tk.INSERT, tab.get("cursor", "1.0"))
+                text_widget.yview_moveto(tab.get("yview", 0.0))
+        
+        if restored:
+            initial_info = self.open_files.get(initial_file)
+            if initial_info and initial_info.filepath is None and not self.get_tab_text(initial_info):
+                self.remove_tab(initial_file)
+            
+            current = session.get("current_tab")
+            if current not in restored:
+                current = restored[-1]
+            self.activate_tab(current)
+            self.status_bar.config(text=f"Restored {len(restored)} file(s) from the last session")
         
-        # Try to load existing configuration
-        if os.path.exists(config_file):
+        return explorer_restored
+    
+    def save_session(self):
+        """Record the open tabs and explorer location for the next start."""
+        tabs = []
+        for tab in self.notebook.tabs():
+            file_info = self.open_files[self.tab_files[str(tab)]]
+            # Unsaved buffers and files still loading aren't restored
+            if not file_info.filepath or file_info.loading:
+                continue
+            if not file_info.hibernated:
+                file_info.cursor = file_info.text_widget.index(tk.INSERT)
+                file_info.yview = file_info.text_widget.yview()[0]
+            tabs.append({
+                "filepath": file_info.filepath,
+                "cursor": file_info.cursor,
+                "yview": file_info.yview,
+            })
+            # Keep the highlighting so the tab is colored instantly next time
+            if file_info.highlight_runs is not None:
+                self.highlight_cache.put(file_info.highlight_key, file_info.highlight_runs)
+        
+        current_info = self.open_files.get(self.current_file)
+        save_session({
+            "working_directory": self.working_directory,
+            "nav_history": self.nav_history,
+            "nav_history_index": self.nav_history_index,
+            "tabs": tabs,
+            "current_tab": current_info.filepath if current_info else None,
+        })
+    
+    def on_close(self):
+        """Save the session and quit."""
+        try:
+            self.save_session()
+        except OSError as e:
+            print(f"Error saving session: {e}")
+        self.root.destroy()
+    
+    def load_config(self):
+        """Load the IDE configuration, returning an empty dict if there is none."""
+        if os.path.exists(CONFIG_FILE):
             try:
-                with open(config_file, "r") as f:
-                    config = json.load(f)
-                    if "working_directory" in config and os.path.exists(config["working_directory"]):
-                        return config["working_directory"]
+                with open(CONFIG_FILE, "r") as f:
+                    return json.load(f)
             except Exception as e:
                 print(f"Error loading config: {e}")
+        return {}
+    
+    def save_config(self):
+        """Write the IDE configuration to disk."""
+        with open(CONFIG_FILE, "w") as f:
+            json.dump(self.config, f)
+    
+    def get_saved_working_directory(self):
+        """Return the configured working directory, or None if there is no valid one."""
+        directory = self.config.get("working_directory")
+        if directory and os.path.exists(directory):
+            return directory
+        return None
+    
+    def get_or_set_working_directory(self):
+        """Get the working directory from config or prompt user to select one."""
+        # Try the existing configuration
+        if self.get_saved_working_directory():
+            return self.config["working_directory"]
         
         # If no valid config, prompt user to select directory
         messagebox.showinfo("Welcome", "Please select a directory to store your Power Python files.")
@@ -71,9 +304,8 @@ class PowerPythonIDE:
         if directory and os.path.exists(directory):
             # Save the configuration
             try:
-                config = {"working_directory": directory}
-                with open(config_file, "w") as f:
-                    json.dump(config, f)
+                self.config["working_directory"] = directory
+                self.save_config()
                 return directory
             except Exception as e:
                 print(f"Error saving config: {e}")
@@ -102,9 +334,12 @@ class PowerPythonIDE:
         """Bind text change events for live syntax highlighting."""
         def on_text_change(event=None):
             # Schedule syntax highlighting to avoid performance issues
+            # (scheduled on the root window, which outlives hibernated editors)
             if hasattr(self, '_after_id'):
-                text_widget.after_cancel(self._after_id)
-            self._after_id = text_widget.after(300, self.apply_syntax_highlighting, file_id)
+                self.root.after_cancel(self._after_id)
+            self._after_id = self.root.after(300, self.apply_syntax_highlighting, file_id)
+            # Restart the live preview idle timer
+            self.schedule_live_preview()
         
         # Bind key events
         text_widget.bind('<KeyRelease>', on_text_change)
@@ -113,20 +348,46 @@ class PowerPythonIDE:
         # Bind paste event
         text_widget.bind('<<Paste>>', on_text_change)
         
-    def apply_syntax_highlighting(self, file_id):
-        """Apply syntax highlighting to the current file."""
+    def apply_syntax_highlighting(self, file_id, use_cache=False):
+        """Apply syntax highlighting to the current file.
+        
+        With use_cache, highlight runs are looked up in (and added to) the
+        on-disk highlight cache, which is how newly opened files are colored
+        without lexing when their content was seen before.
+        """
         if file_id in self.open_files:
             file_info = self.open_files[file_id]
-            # Only apply highlighting if highlighter is available
-            if file_info["highlighter"]:
-                content = file_info["text_widget"].get("1.0", tk.END)
-                file_info["highlighter"].highlight(content, file_info["language"])
+            # Only apply highlighting if highlighter is available and the file
+            # is not in large-file mode (hibernated tabs have no highlighter)
+            if file_info.highlighter and not file_info.large_file:
+                content = file_info.text_widget.get("1.0", tk.END)
+                key = self.highlight_cache.key(content, file_info.language)
+                # Nothing to do if the content hasn't changed since the last pass
+                if key == file_info.highlight_key:
+                    return
+                
+                runs = self.highlight_cache.get(key) if use_cache else None
+                if runs is not None:
+                    file_info.highlighter.apply_runs(runs)
+                else:
+                    runs = file_info.highlighter.highlight(content, file_info.language)
+                    if use_cache:
+                        try:
+                            self.highlight_cache.put(key, runs)
+                        except OSError as e:
+                            print(f"Error writing highlight cache: {e}")
+                file_info.highlight_key = key
+                file_info.highlight_runs = runs
     
     def update_line_numbers(self, text_widget, line_numbers):
         """Update line numbers for a text widget."""
         # Get the number of lines
         line_count = int(text_widget.index('end-1c').split('.')[0])
         
+        # Nothing to do if the line count hasn't changed since the last update
+        if int(line_numbers.index('end-1c').split('.')[0]) == line_count and line_numbers.get('1.0', '1.end'):
+            return
+        
         # Generate line numbers
         line_numbers_text = "\n".join(str(i) for i in range(1, line_count + 1))
         
@@ -185,7 +446,7 @@ class PowerPythonIDE:
         file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         file_menu.add_command(label="Save As", command=self.save_file_as)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
         
         # Edit menu
         edit_menu = tk.Menu(menubar, tearoff=0)
@@ -199,10 +460,12 @@ class PowerPythonIDE:
         edit_menu.add_separator()
         edit_menu.add_command(label="Find", command=self.find_text, accelerator="Ctrl+F")
         edit_menu.add_command(label="Find and Replace", command=self.find_replace, accelerator="Ctrl+H")
+        edit_menu.add_command(label="Find in Files", command=self.find_in_files, accelerator="Ctrl+Shift+F")
         
         # Bind keyboard shortcuts
         self.root.bind('<Control-f>', lambda e: self.find_text())
         self.root.bind('<Control-h>', lambda e: self.find_replace())
+        self.root.bind('<Control-Shift-F>', lambda e: self.find_in_files())
         self.root.bind('<Control-z>', lambda e: self.undo())
         self.root.bind('<Control-y>', lambda e: self.redo())
         self.root.bind('<Control-x>', lambda e: self.cut())
@@ -214,17 +477,22 @@ class PowerPythonIDE:
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Toggle File Explorer", command=self.toggle_file_explorer)
         view_menu.add_command(label="Refresh File Explorer", command=self.refresh_file_explorer)
+        view_menu.add_separator()
+        view_menu.add_checkbutton(label="Live Preview", variable=self.live_preview_var, command=self.toggle_live_preview)
+        view_menu.add_command(label="Live Preview Delay...", command=self.set_live_preview_delay)
         
         # Run menu
         run_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Run", menu=run_menu)
         run_menu.add_command(label="Compile", command=self.compile_file, accelerator="F5")
+        run_menu.add_command(label="Cancel Compile", command=self.cancel_compile, accelerator="Esc")
         
         # Additional useful shortcuts
         self.root.bind('<Control-n>', lambda e: self.new_file())
         self.root.bind('<Control-o>', lambda e: self.open_file())
         self.root.bind('<Control-s>', lambda e: self.save_file())
         self.root.bind('<F5>', lambda e: self.compile_file())
+        self.root.bind('<Escape>', lambda e: self.cancel_compile())
         
         # Save As shortcut
         self.root.bind('<Control-Shift-S>', lambda e: self.save_file_as())
@@ -256,6 +524,9 @@ class PowerPythonIDE:
         compile_btn = ttk.Button(toolbar, text="Compile", command=self.compile_file)
         compile_btn.pack(side=tk.LEFT, padx=2)
         
+        self.cancel_compile_btn = ttk.Button(toolbar, text="Cancel", command=self.cancel_compile, state=tk.DISABLED)
+        self.cancel_compile_btn.pack(side=tk.LEFT, padx=2)
+        
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
         
         undo_btn = ttk.Button(toolbar, text="Undo", command=self.undo)
@@ -329,9 +600,12 @@ class PowerPythonIDE:
         
         # Bind tree events
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.tree.bind("<Double-1>", self.on_tree_double_click)
         
-        # Open working directory
-        self.open_directory(self.working_directory)
+        # Directory shown at the root of the tree; the working directory is
+        # listed by finish_startup()
+        self.current_directory = None
     
     def create_editor(self, parent):
         """Create the editor area."""
@@ -356,17 +630,32 @@ class PowerPythonIDE:
         preview_scroll = ttk.Scrollbar(self.preview_frame, orient=tk.VERTICAL, command=self.preview_text.yview)
         preview_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.preview_text.configure(yscrollcommand=preview_scroll.set)
+        
+        # Styles used by the preview renderer
+        for tag, options in PREVIEW_TAG_STYLES.items():
+            self.preview_text.tag_configure(tag, **options)
+        self.preview_text.tag_configure("preview_info", foreground="#808080")
     
     def create_status_bar(self):
         """Create the status bar."""
         self.status_bar = ttk.Label(self.root, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
     
-    def new_file(self):
-        """Create a new file."""
+    def create_editor_tab(self, file_id, filename, filepath=None, language="python"):
+        """Create a notebook tab with an editor and line numbers and register it in open_files."""
         # Create a new tab
         tab = ttk.Frame(self.notebook)
-        self.notebook.add(tab, text="Untitled")
+        self.notebook.add(tab, text=filename)
+        
+        file_info = TabRecord(file_id, tab, filename, filepath, language)
+        self.open_files[file_id] = file_info
+        self.tab_files[str(tab)] = file_id
+        self.create_editor_widgets(file_info)
+        return file_info
+    
+    def create_editor_widgets(self, file_info):
+        """Create the editor, line numbers and highlighter inside a tab."""
+        tab = file_info.tab
         
         # Create frame for text widget and line numbers
         text_frame = ttk.Frame(tab)
@@ -378,7 +667,7 @@ class PowerPythonIDE:
         line_numbers.pack(side=tk.LEFT, fill=tk.Y)
         
         # Create main text widget
-        text_widget = tk.Text(text_frame, wrap=tk.WORD, undo=True)
+        text_widget = tk.Text(text_frame, wrap=tk.WORD, undo=True, maxundo=EDITOR_MAX_UNDO)
         text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Add scrollbar
@@ -391,33 +680,97 @@ class PowerPythonIDE:
         text_widget.bind('<Button-1>', lambda e: self.update_line_numbers(text_widget, line_numbers))
         text_widget.bind('<MouseWheel>', lambda e: self.update_line_numbers(text_widget, line_numbers))
         
-        # Create syntax highlighter if available
-        highlighter = SyntaxHighlighter(text_widget) if HIGHLIGHTING_AVAILABLE else None
-        
-        # Store reference
-        file_id = f"untitled_{len(self.open_files)}"
-        self.open_files[file_id] = {
-            "tab": tab,
-            "text_widget": text_widget,
-            "line_numbers": line_numbers,
-            "highlighter": highlighter,
-            "filepath": None,
-            "filename": "Untitled",
-            "language": "python"
-        }
+        # Create syntax highlighter if it has been loaded
+        file_info.text_widget = text_widget
+        file_info.line_numbers = line_numbers
+        file_info.highlighter = self.highlighter_class(text_widget) if self.highlighter_class else None
         
         # Bind text change events for live syntax highlighting
-        self.bind_text_events(text_widget, file_id)
+        self.bind_text_events(text_widget, file_info.file_id)
         
         # Bind key events for auto-indentation
         self.bind_auto_indent(text_widget)
+    
+    def hibernate_tab(self, file_id):
+        """Destroy a tab's editor widgets, keeping its text, cursor and scroll position.
+        
+        The undo history is lost; the tab is rebuilt by wake_tab when selected.
+        """
+        file_info = self.open_files[file_id]
+        if file_info.hibernated:
+            return
+        text_widget = file_info.text_widget
+        file_info.hibernated_text = text_widget.get("1.0", "end-1c")
+        file_info.cursor = text_widget.index(tk.INSERT)
+        file_info.yview = text_widget.yview()[0]
+        if self.search and self.search["file_id"] == file_id:
+            self.search = None
+        
+        for child in file_info.tab.winfo_children():
+            child.destroy()
+        file_info.text_widget = None
+        file_info.line_numbers = None
+        file_info.highlighter = None
+    
+    def wake_tab(self, file_id):
+        """Rebuild the editor of a hibernated tab."""
+        file_info = self.open_files[file_id]
+        if not file_info.hibernated:
+            return
+        self.create_editor_widgets(file_info)
+        text_widget = file_info.text_widget
+        text_widget.insert("1.0", file_info.hibernated_text)
+        text_widget.edit_reset()
+        text_widget.mark_set(tk.INSERT, file_info.cursor)
+        text_widget.yview_moveto(file_info.yview)
+        file_info.hibernated_text = None
+        self.update_line_numbers(text_widget, file_info.line_numbers)
+        
+        if file_info.highlighter:
+            # Reuse the runs of the last pass if the text hasn't changed since
+            content = text_widget.get("1.0", tk.END)
+            if file_info.highlight_runs is not None and self.highlight_cache.key(content, file_info.language) == file_info.highlight_key:
+                file_info.highlighter.apply_runs(file_info.highlight_runs)
+            else:
+                file_info.highlight_key = None
+                self.apply_syntax_highlighting(file_id)
+    
+    def get_tab_text(self, file_info):
+        """Return the text of a tab, whether or not it is hibernated."""
+        if file_info.hibernated:
+            return file_info.hibernated_text
+        return file_info.text_widget.get("1.0", "end-1c")
+    
+    def touch_tab(self, file_id):
+        """Mark a tab as most recently used and hibernate the least recently used ones."""
+        def can_hibernate(candidate):
+            file_info = self.open_files[candidate]
+            # Large files would be slow to rebuild
+            return not file_info.loading and not file_info.large_file
+        
+        for evicted in self.live_tabs.touch(file_id, can_hibernate):
+            self.hibernate_tab(evicted)
+    
+    def activate_tab(self, file_id):
+        """Select a tab, waking it up first if it is hibernated."""
+        file_info = self.open_files[file_id]
+        self.wake_tab(file_id)
+        self.notebook.select(file_info.tab)
+        self.current_file = file_id
+        self.touch_tab(file_id)
+        return file_info
+    
+    def new_file(self):
+        """Create a new file."""
+        file_id = f"untitled_{self.untitled_count}"
+        self.untitled_count += 1
+        file_info = self.create_editor_tab(file_id, "Untitled")
         
         # Initialize line numbers
-        self.update_line_numbers(text_widget, line_numbers)
+        self.update_line_numbers(file_info.text_widget, file_info.line_numbers)
         
         # Select the new tab
-        self.notebook.select(tab)
-        self.current_file = file_id
+        self.activate_tab(file_id)
         
         # Update status
         self.status_bar.config(text="New file created")
@@ -437,78 +790,7 @@ class PowerPythonIDE:
         )
         
         if filepath:
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Create a new tab
-                tab = ttk.Frame(self.notebook)
-                self.notebook.add(tab, text=os.path.basename(filepath))
-                
-                # Create frame for text widget and line numbers
-                text_frame = ttk.Frame(tab)
-                text_frame.pack(fill=tk.BOTH, expand=True)
-                
-                # Create line numbers text widget
-                line_numbers = tk.Text(text_frame, width=4, padx=3, takefocus=0, border=0,
-                                      state='disabled', wrap='none', font=('Consolas', 10))
-                line_numbers.pack(side=tk.LEFT, fill=tk.Y)
-                
-                # Create main text widget
-                text_widget = tk.Text(text_frame, wrap=tk.WORD, undo=True)
-                text_widget.insert("1.0", content)
-                text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-                
-                # Add scrollbar
-                scroll = ttk.Scrollbar(tab, orient=tk.VERTICAL, command=text_widget.yview)
-                scroll.pack(side=tk.RIGHT, fill=tk.Y)
-                text_widget.configure(yscrollcommand=scroll.set)
-                
-                # Sync line numbers with text widget
-                text_widget.bind('<KeyRelease>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-                text_widget.bind('<Button-1>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-                text_widget.bind('<MouseWheel>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-                
-                # Determine language from file extension
-                language = self.get_language_from_extension(filepath)
-                
-                # Create syntax highlighter if available
-                highlighter = SyntaxHighlighter(text_widget) if HIGHLIGHTING_AVAILABLE else None
-                
-                # Store reference
-                file_id = filepath
-                self.open_files[file_id] = {
-                    "tab": tab,
-                    "text_widget": text_widget,
-                    "line_numbers": line_numbers,
-                    "highlighter": highlighter,
-                    "filepath": filepath,
-                    "filename": os.path.basename(filepath),
-                    "language": language
-                }
-                
-                # Apply initial syntax highlighting if available
-                if highlighter:
-                    highlighter.highlight(content, language)
-                
-                # Initialize line numbers
-                self.update_line_numbers(text_widget, line_numbers)
-                
-                # Bind text change events for live syntax highlighting
-                self.bind_text_events(text_widget, file_id)
-                
-                # Bind key events for auto-indentation
-                self.bind_auto_indent(text_widget)
-                
-                # Select the new tab
-                self.notebook.select(tab)
-                self.current_file = file_id
-                
-                # Update status
-                self.status_bar.config(text=f"Opened {filepath}")
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file: {str(e)}")
+            self.open_file_path(filepath)
     
     def save_file(self):
         """Save the current file."""
@@ -517,22 +799,26 @@ class PowerPythonIDE:
         
         file_info = self.open_files[self.current_file]
         
-        if file_info["filepath"]:
+        # Saving a partially loaded buffer would truncate the file
+        if file_info.loading:
+            self.status_bar.config(text=f"Cannot save {file_info.filename} while it is still loading")
+            return
+        
+        if file_info.filepath:
             # Save to existing file
             try:
-                content = file_info["text_widget"].get("1.0", tk.END)
-                with open(file_info["filepath"], "w", encoding="utf-8") as f:
+                content = file_info.text_widget.get("1.0", tk.END)
+                with open(file_info.filepath, "w", encoding="utf-8") as f:
                     f.write(content)
                 
                 # Update tab title if needed
-                self.notebook.tab(file_info["tab"], text=file_info["filename"])
+                self.notebook.tab(file_info.tab, text=file_info.filename)
                 
                 # Update status
-                self.status_bar.config(text=f"Saved {file_info['filepath']}")
+                self.status_bar.config(text=f"Saved {file_info.filepath}")
                 
                 # Re-apply syntax highlighting
-                content = file_info["text_widget"].get("1.0", tk.END)
-                file_info["highlighter"].highlight(content, file_info["language"])
+                self.apply_syntax_highlighting(self.current_file)
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save file: {str(e)}")
@@ -546,6 +832,10 @@ class PowerPythonIDE:
             return
         
         file_info = self.open_files[self.current_file]
+        if file_info.loading:
+            self.status_bar.config(text=f"Cannot save {file_info.filename} while it is still loading")
+            return
+        
         filepath = filedialog.asksaveasfilename(
             title="Save File As",
             initialdir=self.working_directory,
@@ -562,39 +852,31 @@ class PowerPythonIDE:
         
         if filepath:
             try:
-                content = file_info["text_widget"].get("1.0", tk.END)
+                content = file_info.text_widget.get("1.0", tk.END)
                 with open(filepath, "w", encoding="utf-8") as f:
                     f.write(content)
                 
                 # Update file info
-                file_info["filepath"] = filepath
-                file_info["filename"] = os.path.basename(filepath)
+                file_info.filepath = filepath
+                file_info.filename = os.path.basename(filepath)
                 
                 # Update tab title
-                self.notebook.tab(file_info["tab"], text=file_info["filename"])
+                self.notebook.tab(file_info.tab, text=file_info.filename)
                 
                 # Update status
                 self.status_bar.config(text=f"Saved as {filepath}")
                 
                 # Update language if needed
-                file_info["language"] = self.get_language_from_extension(filepath)
+                file_info.language = self.get_language_from_extension(filepath)
                 
                 # Re-apply syntax highlighting
-                content = file_info["text_widget"].get("1.0", tk.END)
-                file_info["highlighter"].highlight(content, file_info["language"])
+                self.apply_syntax_highlighting(self.current_file)
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save file: {str(e)}")
     
     def open_directory(self, directory):
         """Open a directory in the file explorer."""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Update current directory label
-        self.current_dir_label.config(text=f"Current Directory: {os.path.abspath(directory)}")
-        
         # Add to navigation history if it's a new directory
         if not self.nav_history or self.nav_history[self.nav_history_index] != directory:
             # Remove forward history if we're not at the end
@@ -604,24 +886,82 @@ class PowerPythonIDE:
             self.nav_history.append(directory)
             self.nav_history_index = len(self.nav_history) - 1
         
-        # Add directory contents
-        try:
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
-                if os.path.isdir(item_path):
-                    self.tree.insert("", "end", text=f"📁 {item}", values=[item_path, "dir"])
-                else:
-                    self.tree.insert("", "end", text=f"📄 {item}", values=[item_path, "file"])
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not read directory: {str(e)}")
+        self.show_directory(directory)
         
         # Update navigation buttons
         self.update_nav_buttons()
     
+    def show_directory(self, directory, report_errors=True):
+        """Show a directory at the root of the file explorer tree.
+        
+        Showing the directory that is already displayed updates the tree in
+        place, keeping expanded folders and the selection.
+        """
+        if directory != self.current_directory:
+            # Clear existing items
+            self.tree.delete(*self.tree.get_children())
+            self.current_directory = directory
+            
+            # Update current directory label
+            self.current_dir_label.config(text=f"Current Directory: {os.path.abspath(directory)}")
+        
+        self.sync_tree_children("", directory, report_errors)
+    
+    def scan_directory(self, directory):
+        """List a directory as (name, path, is_dir) tuples, folders first, sorted by name."""
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    # Uses the file type cached by scandir, so usually no extra stat
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name, entry.path, is_dir))
+        entries.sort(key=lambda entry: (not entry[2], entry[0].lower(), entry[0]))
+        return entries
+    
+    def sync_tree_children(self, parent, directory, report_errors=False):
+        """Update the children of a tree item to match the contents of directory.
+        
+        Only differences are applied: vanished entries are deleted and new ones
+        inserted in sorted position. Expanded subfolders are synced recursively;
+        collapsed ones are listed again when they are next expanded.
+        """
+        try:
+            entries = self.scan_directory(directory)
+        except OSError as e:
+            if report_errors:
+                messagebox.showerror("Error", f"Could not read directory: {str(e)}")
+            return
+        
+        wanted = {path: ("dir" if is_dir else "file") for _, path, is_dir in entries}
+        
+        # Remove entries that are gone (or changed type), and the placeholder of
+        # a folder that hasn't been listed yet
+        for item in self.tree.get_children(parent):
+            values = self.tree.item(item, "values")
+            if wanted.get(item) != (values[1] if len(values) > 1 else None):
+                self.tree.delete(item)
+        
+        # Insert new entries; existing ones are already in sorted order
+        for index, (name, path, is_dir) in enumerate(entries):
+            if self.tree.exists(path):
+                if is_dir and self.tree.item(path, "open"):
+                    self.sync_tree_children(path, path)
+                continue
+            
+            if is_dir:
+                self.tree.insert(parent, index, iid=path, text=f"📁 {name}", values=[path, "dir"])
+                # Placeholder child so the folder can be expanded before it is listed
+                self.tree.insert(path, "end", text="...", values=["", "placeholder"])
+            else:
+                self.tree.insert(parent, index, iid=path, text=f"📄 {name}", values=[path, "file"])
+    
     def refresh_file_explorer(self):
         """Refresh the file explorer to show current directory contents."""
-        if hasattr(self, 'working_directory'):
-            self.open_directory(self.working_directory)
+        if getattr(self, 'current_directory', None):
+            self.show_directory(self.current_directory, report_errors=False)
     
     def start_periodic_refresh(self):
         """Start periodic refresh of the file explorer."""
@@ -644,9 +984,21 @@ class PowerPythonIDE:
             if item_type == "file":
                 # Open file
                 self.open_file_path(item_path)
-            elif item_type == "dir":
-                # Navigate to directory
+    
+    def on_tree_open(self, event):
+        """List a folder's contents when it is expanded."""
+        item = self.tree.focus()
+        if item and self.tree.item(item, "values")[1] == "dir":
+            self.sync_tree_children(item, item)
+    
+    def on_tree_double_click(self, event):
+        """Navigate into a folder when it is double-clicked."""
+        item = self.tree.identify_row(event.y)
+        if item:
+            item_path, item_type = self.tree.item(item, "values")
+            if item_type == "dir":
                 self.open_directory(item_path)
+                return "break"
     
     def go_back(self):
         """Navigate to the previous directory in history."""
@@ -666,23 +1018,7 @@ class PowerPythonIDE:
     
     def open_directory_no_history(self, directory):
         """Open a directory without adding to history."""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Update current directory label
-        self.current_dir_label.config(text=f"Current Directory: {os.path.abspath(directory)}")
-        
-        # Add directory contents
-        try:
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
-                if os.path.isdir(item_path):
-                    self.tree.insert("", "end", text=f"📁 {item}", values=[item_path, "dir"])
-                else:
-                    self.tree.insert("", "end", text=f"📄 {item}", values=[item_path, "file"])
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not read directory: {str(e)}")
+        self.show_directory(directory)
     
     def update_nav_buttons(self):
         """Update the state of navigation buttons."""
@@ -702,77 +1038,36 @@ class PowerPythonIDE:
         """Open a file by its path."""
         # Check if file is already open
         if filepath in self.open_files:
-            file_info = self.open_files[filepath]
-            self.notebook.select(file_info["tab"])
-            self.current_file = filepath
+            self.activate_tab(filepath)
             return
         
         # Open file
         try:
+            # Big files are streamed into the editor instead of read in one go
+            if os.path.getsize(filepath) > LARGE_FILE_THRESHOLD:
+                self.open_large_file(filepath)
+                return
+            
             with open(filepath, "r", encoding="utf-8") as f:
                 content = f.read()
             
-            # Create a new tab
-            tab = ttk.Frame(self.notebook)
-            self.notebook.add(tab, text=os.path.basename(filepath))
-            
-            # Create frame for text widget and line numbers
-            text_frame = ttk.Frame(tab)
-            text_frame.pack(fill=tk.BOTH, expand=True)
-            
-            # Create line numbers text widget
-            line_numbers = tk.Text(text_frame, width=4, padx=3, takefocus=0, border=0,
-                                  state='disabled', wrap='none', font=('Consolas', 10))
-            line_numbers.pack(side=tk.LEFT, fill=tk.Y)
-            
-            # Create main text widget
-            text_widget = tk.Text(text_frame, wrap=tk.WORD, undo=True)
-            text_widget.insert("1.0", content)
-            text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            # Add scrollbar
-            scroll = ttk.Scrollbar(tab, orient=tk.VERTICAL, command=text_widget.yview)
-            scroll.pack(side=tk.RIGHT, fill=tk.Y)
-            text_widget.configure(yscrollcommand=scroll.set)
-            
-            # Sync line numbers with text widget
-            text_widget.bind('<KeyRelease>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-            text_widget.bind('<Button-1>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-            text_widget.bind('<MouseWheel>', lambda e: self.update_line_numbers(text_widget, line_numbers))
-            
             # Determine language from file extension
             language = self.get_language_from_extension(filepath)
             
-            # Create syntax highlighter if available
-            highlighter = SyntaxHighlighter(text_widget) if HIGHLIGHTING_AVAILABLE else None
-            
-            # Store reference
-            self.open_files[filepath] = {
-                "tab": tab,
-                "text_widget": text_widget,
-                "line_numbers": line_numbers,
-                "highlighter": highlighter,
-                "filepath": filepath,
-                "filename": os.path.basename(filepath),
-                "language": language
-            }
+            file_info = self.create_editor_tab(filepath, os.path.basename(filepath), filepath, language)
+            text_widget = file_info.text_widget
+            text_widget.insert("1.0", content)
+            # Loading the file shouldn't be undoable
+            text_widget.edit_reset()
             
             # Apply initial syntax highlighting if available
-            if highlighter:
-                highlighter.highlight(content, language)
+            self.apply_syntax_highlighting(filepath, use_cache=True)
             
             # Initialize line numbers
-            self.update_line_numbers(text_widget, line_numbers)
-            
-            # Bind text change events for live syntax highlighting
-            self.bind_text_events(text_widget, filepath)
-            
-            # Bind key events for auto-indentation
-            self.bind_auto_indent(text_widget)
+            self.update_line_numbers(text_widget, file_info.line_numbers)
             
             # Select the new tab
-            self.notebook.select(tab)
-            self.current_file = filepath
+            self.activate_tab(filepath)
             
             # Update status
             self.status_bar.config(text=f"Opened {filepath}")
@@ -780,116 +1075,143 @@ class PowerPythonIDE:
         except Exception as e:
             messagebox.showerror("Error", f"Could not open file: {str(e)}")
     
+    def open_large_file(self, filepath):
+        """Open a file above LARGE_FILE_THRESHOLD in large-file mode.
+        
+        The file is memory-mapped and inserted into the editor in chunks from
+        after() callbacks so the UI stays responsive while it loads. Syntax
+        highlighting is disabled for the tab.
+        """
+        with open(filepath, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        total = len(mapped)
+        # Incremental decoder so multi-byte characters split across chunks decode correctly
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        
+        filename = os.path.basename(filepath)
+        file_info = self.create_editor_tab(filepath, f"{filename} (0%)", filepath,
+                                          self.get_language_from_extension(filepath))
+        file_info.large_file = True
+        file_info.loading = True
+        text_widget = file_info.text_widget
+        # Keep the chunk inserts out of the undo stack and the buffer read-only until loaded
+        text_widget.config(undo=False, state=tk.DISABLED)
+        
+        self.activate_tab(filepath)
+        
+        def load_chunk(offset):
+            scheduled = False
+            try:
+                # Stop if the tab was closed or its editor destroyed while loading
+                if self.open_files.get(filepath) is not file_info or not text_widget.winfo_exists():
+                    return
+                
+                end = min(offset + LARGE_FILE_CHUNK_SIZE, total)
+                text = decoder.decode(mapped[offset:end], final=(end == total))
+                text_widget.config(state=tk.NORMAL)
+                text_widget.insert("end-1c", text)
+                text_widget.config(state=tk.DISABLED)
+                
+                percent = end * 100 // total
+                if end < total:
+                    self.notebook.tab(file_info.tab, text=f"{filename} ({percent}%)")
+                    self.status_bar.config(text=f"Loading {filepath}... {percent}%")
+                    # Give the event loop a chance to run between chunks. Scheduled on
+                    # the root window, which outlives the tab
+                    self.root.after(1, load_chunk, end)
+                    scheduled = True
+                    return
+                
+                # Loading finished
+                text_widget.config(state=tk.NORMAL, undo=True)
+                text_widget.edit_reset()
+                text_widget.mark_set(tk.INSERT, "1.0")
+                file_info.loading = False
+                self.notebook.tab(file_info.tab, text=filename)
+                self.update_line_numbers(text_widget, file_info.line_numbers)
+                self.status_bar.config(text=f"Opened {filepath} (large file, highlighting disabled)")
+            finally:
+                # Finished, cancelled or failed
+                if not scheduled:
+                    mapped.close()
+        
+        self.status_bar.config(text=f"Loading {filepath}...")
+        self.root.after(1, load_chunk, 0)
+    
     def on_tab_changed(self, event):
         """Handle tab change events."""
-        selected_tab = event.widget.select()
+        file_id = self.tab_files.get(event.widget.select())
+        if file_id is None:
+            return
         
-        # Find the file associated with this tab
-        for file_id, file_info in self.open_files.items():
-            if file_info["tab"] == selected_tab:
-                self.current_file = file_id
-                self.status_bar.config(text=f"Selected: {file_info['filename']}")
-                break
+        # Tabs selected by clicking may be hibernated
+        file_info = self.activate_tab(file_id)
+        self.status_bar.config(text=f"Selected: {file_info.filename}")
+        self.schedule_live_preview()
     
     def compile_file(self):
-        """Compile the current file and open the result in the browser."""
+        """Compile the current file in the background and open the result in the browser."""
         if not self.current_file:
             messagebox.showwarning("Warning", "No file to compile")
             return
         
         file_info = self.open_files[self.current_file]
+
+        # A partially loaded buffer would compile a truncated page
+        if file_info.loading:
+            self.status_bar.config(text=f"Cannot compile {file_info.filename} while it is still loading")
+            return
+
         # Get content without the extra newline that tkinter adds
-        content = file_info["text_widget"].get("1.0", "end-1c")
+        content = file_info.text_widget.get("1.0", "end-1c")
+
+        # A newer compile supersedes any compile still in flight
+        superseded = self.compile_worker.busy
+        job_id = self.compile_worker.submit(content)
+        self.compile_source = file_info.filename
+        self.compile_kind = "compile"
+        self.cancel_compile_btn.config(state=tk.NORMAL)
+        
+        if superseded:
+            self.status_bar.config(text=f"Restarted compile of {self.compile_source}")
+        else:
+            self.status_bar.config(text=f"Compiling {self.compile_source}...")
         
-        # Initialize compiled_html to ensure it's not carrying over content from previous compilations
-        compiled_html = ""
+        self.root.after(100, self.poll_compile, job_id)
+    
+    def poll_compile(self, job_id):
+        """Check on a background compile and handle its result on the UI thread."""
+        # Stop polling for compiles that were superseded or cancelled
+        if job_id != self.compile_worker.job_id or not self.compile_worker.busy:
+            return
         
-        # Try to import the Power Python compiler
-        try:
-            # Add the project root to sys.path to import compiler modules
-            project_root = os.path.join(os.path.dirname(__file__), '..')
-            if project_root not in sys.path:
-                sys.path.insert(0, project_root)
-            
-            from compiler.main import compile_markdown
-            
-            # Save content to a temporary file
-            import tempfile
-            import io
-            temp_file = None
-            html_file = None
-            try:
-                # Create a temporary file with .md extension
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as f:
-                    f.write(content)
-                    temp_file = f.name
-                
-                # Ensure we're not importing or calling the compiler multiple times
-                # Compile the temporary file exactly once
-                old_stdout = sys.stdout
-                sys.stdout = io.StringIO()
-                
-                try:
-                    # Call compile_markdown exactly once
-                    compile_markdown(temp_file)
-                    output = sys.stdout.getvalue()
-                finally:
-                    sys.stdout = old_stdout
-                
-                # Read the compiled HTML exactly once
-                html_file = temp_file.rsplit('.', 1)[0] + '.html'
-                # Force a fresh read of the file to avoid any caching issues
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    compiled_html = f.read()
-                
-                # Clean up temporary files immediately after reading
-                try:
-                    if temp_file and os.path.exists(temp_file):
-                        os.unlink(temp_file)
-                    if html_file and os.path.exists(html_file):
-                        os.unlink(html_file)
-                except:
-                    pass
-                
-                # Additional check to ensure no duplication in the content
-                # This is a workaround for the duplication issue
-                if compiled_html.count('<!DOCTYPE html>') > 1:
-                    # If we find multiple DOCTYPE declarations, take only the first complete HTML document
-                    first_doctype = compiled_html.find('<!DOCTYPE html>')
-                    second_doctype = compiled_html.find('<!DOCTYPE html>', first_doctype + 1)
-                    if second_doctype != -1:
-                        # Take only the content up to the second DOCTYPE
-                        compiled_html = compiled_html[:second_doctype]
-                
-            except Exception as e:
-                # Clean up temporary file if it exists
-                try:
-                    if temp_file and os.path.exists(temp_file):
-                        os.unlink(temp_file)
-                    if html_file and os.path.exists(html_file):
-                        os.unlink(html_file)
-                except:
-                    pass
-                raise e
-            
-        except ImportError as e:
-            # Fallback: use the content as-is if compiler is not available
-            print(f"Warning: Could not import compiler: {e}")
-            compiled_html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Compiled Output</title>
-</head>
-<body>
-    <h1>Compiled Output</h1>
-    <pre>{content}</pre>
-</body>
-</html>"""
-        except Exception as e:
-            # Handle compilation errors
-            messagebox.showerror("Compilation Error", f"Error compiling file: {str(e)}")
+        result = self.compile_worker.poll()
+        if result is None:
+            # Still running: show progress and check again shortly
+            if self.compile_kind == "compile":
+                self.status_bar.config(text=f"Compiling {self.compile_source}... {self.compile_worker.elapsed():.1f}s")
+            self.root.after(100, self.poll_compile, job_id)
             return
         
+        self.cancel_compile_btn.config(state=tk.DISABLED)
+        status, payload = result
+        if self.compile_kind == "live":
+            self.finish_live_preview(status, payload)
+        elif status == "ok":
+            self.show_compiled_html(payload)
+        else:
+            # Handle compilation errors
+            self.status_bar.config(text="Compilation failed")
+            messagebox.showerror("Compilation Error", f"Error compiling file: {payload}")
+    
+    def cancel_compile(self):
+        """Cancel the compile in flight, if any."""
+        if self.compile_worker.cancel():
+            self.cancel_compile_btn.config(state=tk.DISABLED)
+            self.status_bar.config(text=f"Compile of {self.compile_source} cancelled")
+    
+    def show_compiled_html(self, compiled_html):
+        """Save compiled HTML to the working directory, preview it and open it in the browser."""
         # Generate a unique filename in the working directory
         base_name = "render"
         extension = ".html"
@@ -906,35 +1228,7 @@ class PowerPythonIDE:
             with open(filename, "w", encoding="utf-8") as f:
                 f.write(compiled_html)
             
-            # Show in preview as rendered text (stripped of HTML tags)
-            self.preview_text.config(state=tk.NORMAL)
-            self.preview_text.delete("1.0", tk.END)
-            
-            # Extract just the body content for preview
-            import re
-            body_match = re.search(r'<body[^>]*>(.*?)</body>', compiled_html, re.DOTALL | re.IGNORECASE)
-            if body_match:
-                body_content = body_match.group(1)
-                # Remove script tags for preview
-                body_content = re.sub(r'<script[^>]*>.*?</script>', '', body_content, flags=re.DOTALL | re.IGNORECASE)
-                # Remove style tags for preview
-                body_content = re.sub(r'<style[^>]*>.*?</style>', '', body_content, flags=re.DOTALL | re.IGNORECASE)
-                # Remove HTML tags and decode HTML entities
-                preview_content = re.sub(r'<[^>]+>', '', body_content)
-                # Decode common HTML entities
-                preview_content = preview_content.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&').replace('&quot;', '"').replace('&#39;', "'")
-                # Clean up extra whitespace
-                preview_content = re.sub(r'\s+', ' ', preview_content).strip()
-            else:
-                # Fallback to showing first 500 characters if no body tag found
-                preview_content = compiled_html[:500] + "..."
-                # Still strip HTML tags for fallback
-                preview_content = re.sub(r'<[^>]+>', '', preview_content)
-                preview_content = preview_content.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&').replace('&quot;', '"').replace('&#39;', "'")
-                preview_content = re.sub(r'\s+', ' ', preview_content).strip()
-            
-            self.preview_text.insert("1.0", f"Compiled HTML saved as: {filename}\n\nPreview:\n{preview_content}")
-            self.preview_text.config(state=tk.DISABLED)
+            self.update_preview(compiled_html, filename)
             
             # Open in browser
             file_path = os.path.abspath(filename)
@@ -943,11 +1237,120 @@ class PowerPythonIDE:
             self.status_bar.config(text=f"File compiled and saved as {filename}")
             
             # Refresh file explorer to show new file
-            self.open_directory(self.working_directory)
+            self.refresh_file_explorer()
             
         except Exception as e:
             messagebox.showerror("Error", f"Could not save compiled file: {str(e)}")
     
+    def update_preview(self, compiled_html, filename):
+        """Show compiled HTML in the preview pane as rendered text."""
+        # Keep the scroll position so repeated updates don't jump back to the top
+        scroll_position = self.preview_text.yview()[0]
+        
+        # Show in preview as rendered text
+        self.preview_text.config(state=tk.NORMAL)
+        self.preview_text.delete("1.0", tk.END)
+        
+        # Render the compiled HTML into styled text runs in a single pass
+        runs = render_preview(compiled_html)
+        
+        self.preview_text.insert("1.0", f"Compiled HTML saved as: {filename}\n\n", ("preview_info",))
+        # Insert all runs with one Tk call: insert index text tags text tags ...
+        if runs:
+            self.preview_text.insert(tk.END, *[item for run in runs for item in run])
+        self.preview_text.config(state=tk.DISABLED)
+        self.preview_text.yview_moveto(scroll_position)
+    
+    def toggle_live_preview(self):
+        """Turn live preview on or off."""
+        enabled = self.live_preview_var.get()
+        self.config["live_preview"] = enabled
+        try:
+            self.save_config()
+        except Exception as e:
+            print(f"Error saving config: {e}")
+        
+        if enabled:
+            self.status_bar.config(text="Live preview enabled")
+            self.schedule_live_preview()
+        else:
+            if self.live_preview_after_id:
+                self.root.after_cancel(self.live_preview_after_id)
+                self.live_preview_after_id = None
+            self.status_bar.config(text="Live preview disabled")
+    
+    def set_live_preview_delay(self):
+        """Ask for the idle time before live preview recompiles."""
+        delay = simpledialog.askinteger("Live Preview Delay", "Recompile after this many milliseconds of idle time:",
+                                        initialvalue=self.live_preview_delay, minvalue=100, maxvalue=60000,
+                                        parent=self.root)
+        if delay:
+            self.live_preview_delay = delay
+            self.config["live_preview_delay"] = delay
+            try:
+                self.save_config()
+            except Exception as e:
+                print(f"Error saving config: {e}")
+    
+    def schedule_live_preview(self):
+        """(Re)start the idle timer that triggers a live preview recompile."""
+        if not self.live_preview_var.get():
+            return
+        
+        if self.live_preview_after_id:
+            self.root.after_cancel(self.live_preview_after_id)
+        self.live_preview_after_id = self.root.after(self.live_preview_delay, self.run_live_preview)
+    
+    def run_live_preview(self):
+        """Recompile the current buffer in the background if it changed since the last preview."""
+        self.live_preview_after_id = None
+        if not self.live_preview_var.get() or not self.current_file:
+            return
+        
+        file_info = self.open_files[self.current_file]
+        if file_info.loading:
+            return
+        
+        # Never supersede an explicit F5 compile; try again once it's done
+        if self.compile_worker.busy and self.compile_kind == "compile":
+            self.schedule_live_preview()
+            return
+        
+        content = file_info.text_widget.get("1.0", "end-1c")
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        # Skip the recompile if the buffer is unchanged since the last preview
+        # (or since the live compile already in flight)
+        if content_hash == self.live_preview_hash:
+            return
+        if self.compile_worker.busy and content_hash == self.live_preview_pending_hash:
+            return
+        
+        job_id = self.compile_worker.submit(content)
+        self.compile_source = file_info.filename
+        self.compile_kind = "live"
+        self.live_preview_pending_hash = content_hash
+        self.root.after(100, self.poll_compile, job_id)
+    
+    def finish_live_preview(self, status, payload):
+        """Update the preview pane in place with a live preview result."""
+        self.live_preview_hash = self.live_preview_pending_hash
+        
+        if status != "ok":
+            # Don't pop up dialogs while the user is typing
+            self.status_bar.config(text=f"Live preview failed: {payload}")
+            return
+        
+        filename = os.path.join(self.working_directory, LIVE_PREVIEW_FILENAME)
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(payload)
+        except Exception as e:
+            self.status_bar.config(text=f"Could not save live preview: {e}")
+            return
+        
+        self.update_preview(payload, filename)
+        self.status_bar.config(text=f"Live preview updated ({self.compile_source})")
+    
     def toggle_file_explorer(self):
         """Toggle the file explorer panel."""
         # Check if file explorer is currently visible
@@ -966,7 +1369,7 @@ class PowerPythonIDE:
         if self.current_file:
             file_info = self.open_files[self.current_file]
             try:
-                file_info["text_widget"].edit_undo()
+                file_info.text_widget.edit_undo()
             except tk.TclError:
                 pass  # Nothing to undo
     
@@ -975,7 +1378,7 @@ class PowerPythonIDE:
         if self.current_file:
             file_info = self.open_files[self.current_file]
             try:
-                file_info["text_widget"].edit_redo()
+                file_info.text_widget.edit_redo()
             except tk.TclError:
                 pass  # Nothing to redo
     
@@ -984,7 +1387,7 @@ class PowerPythonIDE:
         if self.current_file:
             file_info = self.open_files[self.current_file]
             try:
-                file_info["text_widget"].event_generate("<<Cut>>")
+                file_info.text_widget.event_generate("<<Cut>>")
             except tk.TclError:
                 pass
     
@@ -993,7 +1396,7 @@ class PowerPythonIDE:
         if self.current_file:
             file_info = self.open_files[self.current_file]
             try:
-                file_info["text_widget"].event_generate("<<Copy>>")
+                file_info.text_widget.event_generate("<<Copy>>")
             except tk.TclError:
                 pass
     
@@ -1002,7 +1405,7 @@ class PowerPythonIDE:
         if self.current_file:
             file_info = self.open_files[self.current_file]
             try:
-                file_info["text_widget"].event_generate("<<Paste>>")
+                file_info.text_widget.event_generate("<<Paste>>")
             except tk.TclError:
                 pass
     
@@ -1010,29 +1413,21 @@ class PowerPythonIDE:
         """Select all text in the current file."""
         if self.current_file:
             file_info = self.open_files[self.current_file]
-            file_info["text_widget"].tag_add(tk.SEL, "1.0", tk.END)
-            file_info["text_widget"].mark_set(tk.INSERT, "1.0")
-            file_info["text_widget"].see(tk.INSERT)
+            file_info.text_widget.tag_add(tk.SEL, "1.0", tk.END)
+            file_info.text_widget.mark_set(tk.INSERT, "1.0")
+            file_info.text_widget.see(tk.INSERT)
             return "break"  # Prevent default behavior
     
     def close_current_tab(self):
         """Close the current tab."""
         if self.current_file and self.current_file in self.open_files:
-            file_info = self.open_files[self.current_file]
-            tab = file_info["tab"]
-            
-            # Remove from notebook
-            self.notebook.forget(tab)
-            
-            # Remove from open files
-            del self.open_files[self.current_file]
+            self.remove_tab(self.current_file)
             
             # Update current file
             if self.open_files:
                 # Select first available file
-                first_file = list(self.open_files.keys())[0]
-                self.current_file = first_file
-                self.notebook.select(self.open_files[first_file]["tab"])
+                first_file = next(iter(self.open_files))
+                self.activate_tab(first_file)
             else:
                 self.current_file = None
                 # Create a new empty file
@@ -1040,6 +1435,37 @@ class PowerPythonIDE:
             
             self.status_bar.config(text="Tab closed")
     
+    def remove_tab(self, file_id):
+        """Remove a tab from the notebook and forget its file."""
+        file_info = self.open_files.pop(file_id)
+        del self.tab_files[str(file_info.tab)]
+        self.live_tabs.discard(file_id)
+        if self.current_file == file_id:
+            self.current_file = None
+        self.notebook.forget(file_info.tab)
+        file_info.tab.destroy()
+    
+    def create_search_options(self, dialog, row):
+        """Add regex / match case / whole word checkboxes to a search dialog and return their variables."""
+        options = {
+            "regex": tk.BooleanVar(value=DEFAULT_SEARCH_OPTIONS["regex"]),
+            "case_sensitive": tk.BooleanVar(value=DEFAULT_SEARCH_OPTIONS["case_sensitive"]),
+            "whole_word": tk.BooleanVar(value=DEFAULT_SEARCH_OPTIONS["whole_word"]),
+        }
+        
+        options_frame = ttk.Frame(dialog)
+        options_frame.grid(row=row, column=0, columnspan=2, padx=5, sticky="w")
+        ttk.Checkbutton(options_frame, text="Regex", variable=options["regex"]).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(options_frame, text="Match case", variable=options["case_sensitive"]).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(options_frame, text="Whole word", variable=options["whole_word"]).pack(side=tk.LEFT, padx=2)
+        
+        return options
+    
+    def close_search_dialog(self, dialog):
+        """Close a search dialog and remove the match highlights."""
+        self.clear_search_matches()
+        dialog.destroy()
+    
     def find_text(self):
         """Open a find dialog."""
         if not self.current_file:
@@ -1048,7 +1474,7 @@ class PowerPythonIDE:
         # Create find dialog
         find_dialog = tk.Toplevel(self.root)
         find_dialog.title("Find")
-        find_dialog.geometry("300x100")
+        find_dialog.geometry("340x110")
         find_dialog.transient(self.root)
         find_dialog.grab_set()
         
@@ -1058,18 +1484,21 @@ class PowerPythonIDE:
         search_entry.grid(row=0, column=1, padx=5, pady=5)
         search_entry.focus()
         
+        options = self.create_search_options(find_dialog, 1)
+        
         # Search button
         def do_search():
             search_term = search_entry.get()
             if search_term:
-                self.perform_search(search_term)
-                find_dialog.destroy()
+                self.perform_search(search_term, {name: var.get() for name, var in options.items()})
         
-        search_btn = tk.Button(find_dialog, text="Find", command=do_search)
-        search_btn.grid(row=1, column=1, padx=5, pady=5, sticky="e")
+        search_btn = tk.Button(find_dialog, text="Find Next", command=do_search)
+        search_btn.grid(row=2, column=1, padx=5, pady=5, sticky="e")
         
         # Bind Enter key
         search_entry.bind('<Return>', lambda e: do_search())
+        find_dialog.bind('<Escape>', lambda e: self.close_search_dialog(find_dialog))
+        find_dialog.protocol("WM_DELETE_WINDOW", lambda: self.close_search_dialog(find_dialog))
         
         # Center dialog
         find_dialog.update_idletasks()
@@ -1077,38 +1506,129 @@ class PowerPythonIDE:
         y = (find_dialog.winfo_screenheight() // 2) - (find_dialog.winfo_height() // 2)
         find_dialog.geometry(f"+{x}+{y}")
     
-    def perform_search(self, search_term):
-        """Perform the actual search in the current document."""
-        if not self.current_file:
+    def run_search(self, search_term, options, on_done, replacement=None):
+        """Scan the current buffer for search_term on a background thread.
+        
+        When the scan finishes, all matches are tagged in the editor and
+        on_done(matches, text) is called on the UI thread. If the buffer was
+        edited during the scan, the matches are dropped and it is scanned
+        again, so on_done only gets matches that are valid in the editor.
+        """
+        file_id = self.current_file
+        text_widget = self.open_files[file_id].text_widget
+        
+        try:
+            pattern = compile_search_pattern(search_term, **options)
+        except re.error as e:
+            messagebox.showerror("Find", f"Invalid regular expression: {e}")
             return
         
-        file_info = self.open_files[self.current_file]
-        text_widget = file_info["text_widget"]
+        text = text_widget.get("1.0", "end-1c")
+        # Any edit after this snapshot makes the matches stale
+        text_widget.edit_modified(False)
         
-        # Get current position
-        current_pos = text_widget.index(tk.INSERT)
+        generation = self.find_worker.submit(text, pattern, replacement, options["regex"])
+        self.search = {
+            "file_id": file_id,
+            "key": (search_term, tuple(sorted(options.items()))),
+            "matches": None,
+            "positions": None,
+        }
+        self.status_bar.config(text=f"Searching for '{search_term}'...")
+        
+        def poll():
+            # A newer search has been started
+            if generation != self.find_worker.generation:
+                return
+            result = self.find_worker.poll()
+            if result is None:
+                self.root.after(20, poll)
+                return
+            
+            status, payload = result
+            if status != "ok":
+                messagebox.showerror("Find", f"Search failed: {payload}")
+                return
+            # The tab was closed, switched or hibernated while searching
+            if (self.current_file != file_id or file_id not in self.open_files
+                    or self.open_files[file_id].text_widget is not text_widget):
+                return
+            # Edited since the snapshot: the match indices may point at other text
+            if text_widget.edit_modified():
+                self.run_search(search_term, options, on_done, replacement)
+                return
+            
+            self.search["matches"] = payload
+            self.search["positions"] = [tuple(map(int, match.start_index.split("."))) for match in payload]
+            self.tag_search_matches(text_widget, payload)
+            on_done(payload, text)
         
-        # Search from current position to end
-        pos = text_widget.search(search_term, current_pos, tk.END)
+        self.root.after(1, poll)
+    
+    def tag_search_matches(self, text_widget, matches):
+        """Highlight all matches in the editor."""
+        text_widget.tag_configure("search_match", background="#FFF59D")
+        text_widget.tag_remove("search_match", "1.0", tk.END)
+        # Add the ranges in batches rather than one Tk call per match
+        batch_size = 500
+        for i in range(0, len(matches), batch_size):
+            ranges = []
+            for match in matches[i:i + batch_size]:
+                ranges.extend((match.start_index, match.end_index))
+            text_widget.tag_add("search_match", *ranges)
+        text_widget.tag_raise("search_match")
+    
+    def clear_search_matches(self):
+        """Remove match highlights and forget the last search."""
+        if self.search and self.search["file_id"] in self.open_files:
+            text_widget = self.open_files[self.search["file_id"]].text_widget
+            if text_widget is not None:
+                text_widget.tag_remove("search_match", "1.0", tk.END)
+        self.search = None
+    
+    def perform_search(self, search_term, options=None):
+        """Move to the next match of search_term in the current document."""
+        if not self.current_file:
+            return
         
-        # If not found, search from beginning
-        if not pos:
-            pos = text_widget.search(search_term, "1.0", current_pos)
+        options = options or DEFAULT_SEARCH_OPTIONS
+        text_widget = self.open_files[self.current_file].text_widget
+        key = (search_term, tuple(sorted(options.items())))
         
-        # If found, highlight and move cursor
-        if pos:
-            end_pos = f"{pos}+{len(search_term)}c"
-            text_widget.tag_remove(tk.SEL, "1.0", tk.END)
-            text_widget.tag_add(tk.SEL, pos, end_pos)
-            text_widget.mark_set(tk.INSERT, pos)
-            text_widget.see(pos)
-            
-            # Update status
-            line, col = pos.split('.')
-            self.status_bar.config(text=f"Found '{search_term}' at line {line}, column {col}")
+        # Reuse the matches of the last scan unless the search or the buffer changed
+        search = self.search
+        if (search and search["file_id"] == self.current_file and search["key"] == key
+                and search["matches"] is not None and not text_widget.edit_modified()):
+            self.goto_next_match(search_term)
         else:
+            self.run_search(search_term, options, lambda matches, text: self.goto_next_match(search_term))
+    
+    def goto_next_match(self, search_term):
+        """Select the first match after the cursor, wrapping around to the start."""
+        text_widget = self.open_files[self.current_file].text_widget
+        matches = self.search["matches"]
+        
+        if not matches:
             self.status_bar.config(text=f"'{search_term}' not found")
             messagebox.showinfo("Find", f"'{search_term}' not found")
+            return
+        
+        # The cursor sits at the start of the selected match, so skip past it
+        line, column = map(int, text_widget.index(tk.INSERT).split("."))
+        if text_widget.tag_ranges(tk.SEL):
+            column += 1
+        index = bisect.bisect_left(self.search["positions"], (line, column)) % len(matches)
+        match = matches[index]
+        
+        # Highlight and move cursor
+        text_widget.tag_remove(tk.SEL, "1.0", tk.END)
+        text_widget.tag_add(tk.SEL, match.start_index, match.end_index)
+        text_widget.mark_set(tk.INSERT, match.start_index)
+        text_widget.see(match.start_index)
+        
+        # Update status
+        line, col = match.start_index.split('.')
+        self.status_bar.config(text=f"Match {index + 1} of {len(matches)}: '{search_term}' at line {line}, column {col}")
     
     def find_replace(self):
         """Open a find and replace dialog."""
@@ -1118,7 +1638,7 @@ class PowerPythonIDE:
         # Create find/replace dialog
         replace_dialog = tk.Toplevel(self.root)
         replace_dialog.title("Find and Replace")
-        replace_dialog.geometry("350x150")
+        replace_dialog.geometry("360x170")
         replace_dialog.transient(self.root)
         replace_dialog.grab_set()
         
@@ -1133,28 +1653,33 @@ class PowerPythonIDE:
         replace_entry = tk.Entry(replace_dialog, width=30)
         replace_entry.grid(row=1, column=1, padx=5, pady=5)
         
+        options = self.create_search_options(replace_dialog, 2)
+        
+        def get_options():
+            return {name: var.get() for name, var in options.items()}
+        
         # Buttons
         def do_find():
             search_term = search_entry.get()
             if search_term:
-                self.perform_search(search_term)
+                self.perform_search(search_term, get_options())
         
         def do_replace():
             search_term = search_entry.get()
             replace_term = replace_entry.get()
-            if search_term and replace_term:
-                self.perform_replace(search_term, replace_term)
+            if search_term:
+                self.perform_replace(search_term, replace_term, get_options())
                 
         def do_replace_all():
             search_term = search_entry.get()
             replace_term = replace_entry.get()
-            if search_term and replace_term:
-                self.perform_replace_all(search_term, replace_term)
+            if search_term:
+                self.perform_replace_all(search_term, replace_term, get_options())
                 replace_dialog.destroy()
         
         # Button frame
         button_frame = ttk.Frame(replace_dialog)
-        button_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=3, column=0, columnspan=2, pady=10)
         
         find_btn = tk.Button(button_frame, text="Find", command=do_find)
         find_btn.pack(side=tk.LEFT, padx=5)
@@ -1167,6 +1692,8 @@ class PowerPythonIDE:
         
         # Bind Enter key to find
         search_entry.bind('<Return>', lambda e: do_find())
+        replace_dialog.bind('<Escape>', lambda e: self.close_search_dialog(replace_dialog))
+        replace_dialog.protocol("WM_DELETE_WINDOW", lambda: self.close_search_dialog(replace_dialog))
         
         # Center dialog
         replace_dialog.update_idletasks()
@@ -1174,64 +1701,204 @@ class PowerPythonIDE:
         y = (replace_dialog.winfo_screenheight() // 2) - (replace_dialog.winfo_height() // 2)
         replace_dialog.geometry(f"+{x}+{y}")
     
-    def perform_replace(self, search_term, replace_term):
-        """Replace the current occurrence of search_term with replace_term."""
+    def perform_replace(self, search_term, replace_term, options=None):
+        """Replace the selected occurrence of search_term with replace_term and move to the next one."""
         if not self.current_file:
             return
         
+        options = options or DEFAULT_SEARCH_OPTIONS
         file_info = self.open_files[self.current_file]
-        text_widget = file_info["text_widget"]
+        text_widget = file_info.text_widget
+        
+        try:
+            pattern = compile_search_pattern(search_term, **options)
+        except re.error as e:
+            messagebox.showerror("Replace", f"Invalid regular expression: {e}")
+            return
         
         # Get current selection
         try:
+            start = text_widget.index(tk.SEL_FIRST)
             current_text = text_widget.get(tk.SEL_FIRST, tk.SEL_LAST)
-            if current_text == search_term:
-                # Replace selected text
-                text_widget.delete(tk.SEL_FIRST, tk.SEL_LAST)
-                text_widget.insert(tk.INSERT, replace_term)
-                self.status_bar.config(text=f"Replaced '{search_term}' with '{replace_term}'")
-                # Move to next occurrence
-                self.perform_search(search_term)
-            else:
-                # Find the term first
-                self.perform_search(search_term)
         except tk.TclError:
             # No selection, find the term first
-            self.perform_search(search_term)
+            self.perform_search(search_term, options)
+            return
+        
+        match = pattern.fullmatch(current_text)
+        if match:
+            # Replace selected text as a single undo step
+            new_text = match.expand(replace_term) if options["regex"] else replace_term
+            text_widget.edit_separator()
+            text_widget.delete(tk.SEL_FIRST, tk.SEL_LAST)
+            text_widget.insert(start, new_text)
+            text_widget.edit_separator()
+            text_widget.mark_set(tk.INSERT, f"{start}+{len(new_text)}c")
+            self.status_bar.config(text=f"Replaced '{search_term}' with '{new_text}'")
+        
+        # Move to next occurrence
+        self.perform_search(search_term, options)
     
-    def perform_replace_all(self, search_term, replace_term):
+    def perform_replace_all(self, search_term, replace_term, options=None):
         """Replace all occurrences of search_term with replace_term."""
         if not self.current_file:
             return
         
-        file_info = self.open_files[self.current_file]
-        text_widget = file_info["text_widget"]
+        options = options or DEFAULT_SEARCH_OPTIONS
+        file_id = self.current_file
         
-        # Get all content
-        content = text_widget.get("1.0", tk.END)
+        def apply(matches, text):
+            if not matches:
+                self.clear_search_matches()
+                self.status_bar.config(text=f"'{search_term}' not found")
+                messagebox.showinfo("Replace All", f"'{search_term}' not found")
+                return
+            
+            self.apply_replacements(self.open_files[file_id], text, matches)
+            self.clear_search_matches()
+            self.status_bar.config(text=f"Replaced {len(matches)} occurrences of '{search_term}' with '{replace_term}'")
+        
+        self.run_search(search_term, options, apply, replacement=replace_term)
+    
+    def get_search_index(self):
+        """Return the Find in Files index for the working directory, starting it if needed.
+        
+        The persisted index is loaded immediately; bringing it up to date with
+        the files on disk happens on a background thread, after which it is
+        kept current from file-change events.
+        """
+        if self.search_index and self.search_index.root == os.path.abspath(self.working_directory):
+            return self.search_index
         
-        # Count occurrences
-        count = content.count(search_term)
+        # Stop watching a previous working directory
+        if self.search_index_observer:
+            self.search_index_observer.stop()
+            self.search_index_observer = None
         
-        if count > 0:
-            # Replace all occurrences
-            new_content = content.replace(search_term, replace_term)
+        from ide.search_index import TrigramIndex, watch_index
+        
+        index = TrigramIndex(self.working_directory)
+        index.load()
+        self.search_index = index
+        self.search_index_ready = False
+        
+        def build():
+            try:
+                index.update()
+                if index.dirty:
+                    index.save()
+            except OSError as e:
+                print(f"Error updating search index: {e}")
+            if self.search_index is index:
+                self.search_index_ready = True
+                self.search_index_observer = watch_index(index)
+        
+        threading.Thread(target=build, daemon=True).start()
+        return index
+    
+    def find_in_files(self):
+        """Open a dialog to search all files in the working directory."""
+        index = self.get_search_index()
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Find in Files")
+        dialog.geometry("700x400")
+        dialog.transient(self.root)
+        
+        # Query
+        query_frame = ttk.Frame(dialog)
+        query_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(query_frame, text="Find:").pack(side=tk.LEFT)
+        query_entry = ttk.Entry(query_frame)
+        query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        query_entry.focus()
+        
+        # Results
+        results_frame = ttk.Frame(dialog)
+        results_frame.pack(fill=tk.BOTH, expand=True, padx=5)
+        results_list = tk.Listbox(results_frame, font=('Consolas', 10))
+        results_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        results_scroll = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=results_list.yview)
+        results_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        results_list.configure(yscrollcommand=results_scroll.set)
+        
+        status_label = ttk.Label(dialog, text="Indexing..." if not self.search_index_ready else "")
+        status_label.pack(fill=tk.X, padx=5, pady=5)
+        
+        results = []
+        
+        def do_search():
+            query = query_entry.get()
+            if not query:
+                return
             
-            # Update text widget
-            text_widget.delete("1.0", tk.END)
-            text_widget.insert("1.0", new_content)
+            start = time.perf_counter()
+            results[:] = index.search(query)
+            elapsed = (time.perf_counter() - start) * 1000
             
-            # Re-apply syntax highlighting if available
-            if file_info["highlighter"]:
-                file_info["highlighter"].highlight(new_content, file_info["language"])
+            results_list.delete(0, tk.END)
+            for result in results:
+                relative_path = os.path.relpath(result.path, index.root)
+                results_list.insert(tk.END, f"{relative_path}:{result.line}: {result.preview}")
             
-            self.status_bar.config(text=f"Replaced {count} occurrences of '{search_term}' with '{replace_term}'")
-        else:
-            self.status_bar.config(text=f"'{search_term}' not found")
-            messagebox.showinfo("Replace All", f"'{search_term}' not found")
+            note = "" if self.search_index_ready else " (index still updating)"
+            status_label.config(text=f"{len(results)} results in {elapsed:.1f} ms{note}")
+        
+        def open_result(event=None):
+            selection = results_list.curselection()
+            if selection:
+                result = results[selection[0]]
+                self.open_file_path(result.path)
+                self.goto_position(result.path, result.line, result.column, len(query_entry.get()))
+        
+        query_entry.bind('<Return>', lambda e: do_search())
+        results_list.bind('<Double-1>', open_result)
+        results_list.bind('<Return>', open_result)
+        dialog.bind('<Escape>', lambda e: dialog.destroy())
+    
+    def goto_position(self, file_id, line, column, length=0):
+        """Move the cursor of an open file to line/column, selecting length characters."""
+        if file_id not in self.open_files:
+            return
+        text_widget = self.activate_tab(file_id).text_widget
+        position = f"{line}.{column}"
+        text_widget.tag_remove(tk.SEL, "1.0", tk.END)
+        if length:
+            text_widget.tag_add(tk.SEL, position, f"{position}+{length}c")
+        text_widget.mark_set(tk.INSERT, position)
+        text_widget.see(position)
+        text_widget.focus_set()
+    
+    def apply_replacements(self, file_info, text, matches):
+        """Apply replacements as minimal edits forming a single undo step.
+        
+        text is the buffer snapshot the matches were found in. Only the lines
+        touched by a replacement are re-highlighted.
+        """
+        text_widget = file_info.text_widget
+        
+        # Group every edit into one undo step
+        text_widget.config(autoseparators=False)
+        text_widget.edit_separator()
+        # Work backwards so the indices of earlier matches stay valid
+        for match in reversed(matches):
+            text_widget.delete(match.start_index, match.end_index)
+            text_widget.insert(match.start_index, match.replacement)
+        text_widget.edit_separator()
+        text_widget.config(autoseparators=True)
+        
+        # Re-apply syntax highlighting to the touched lines only
+        if file_info.highlighter and not file_info.large_file:
+            for first_line, last_line in touched_line_ranges(text, matches):
+                file_info.highlighter.highlight_range(f"{first_line}.0", f"{last_line}.end", file_info.language)
+        
+        self.update_line_numbers(text_widget, file_info.line_numbers)
 
 
 def main():
+    # POWER_IDE_DEBUG=1 logs startup timings
+    logging.basicConfig(level=logging.DEBUG if os.environ.get("POWER_IDE_DEBUG") else logging.WARNING,
+                        format="%(asctime)s %(name)s %(levelname)s: %(message)s")
     root = tk.Tk()
     app = PowerPythonIDE(root)
     root.mainloop()
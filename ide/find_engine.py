@@ -0,0 +1,143 @@
+"""
+Find/replace engine for the Power Python Desktop IDE.
+Scans a snapshot of the buffer once (optionally on a background thread) and
+returns every match as Tk text indices, so the editor can tag all matches,
+show "n of m" and apply replacements as minimal edits.
+"""
+
+import bisect
+import queue
+import re
+import threading
+
+
+# Characters outside the Basic Multilingual Plane; Tk counts each as two columns
+NON_BMP = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def compile_search_pattern(term, regex=False, case_sensitive=True, whole_word=False):
+    """Build the compiled pattern for a search term. Raises re.error for invalid regexes."""
+    pattern = term if regex else re.escape(term)
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+class LineIndex:
+    """Maps character offsets in a string to Tk "line.column" indices.
+
+    Tk columns are UTF-16 code units, so a character outside the BMP (most
+    emoji) takes two columns while Python counts it as one.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.has_wide = NON_BMP.search(text) is not None
+        self.line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def line_col(self, offset):
+        """Return the (line, column) of an offset; lines start at 1."""
+        line = bisect.bisect_right(self.line_starts, offset)
+        line_start = self.line_starts[line - 1]
+        column = offset - line_start
+        if self.has_wide:
+            column += len(NON_BMP.findall(self.text, line_start, offset))
+        return line, column
+
+    def index(self, offset):
+        """Return the Tk text index of an offset."""
+        line, column = self.line_col(offset)
+        return f"{line}.{column}"
+
+
+class Match:
+    """A single match: character offsets, Tk indices and the text it replaces with."""
+
+    __slots__ = ("start", "end", "start_index", "end_index", "replacement")
+
+    def __init__(self, start, end, start_index, end_index, replacement=None):
+        self.start = start
+        self.end = end
+        self.start_index = start_index
+        self.end_index = end_index
+        self.replacement = replacement
+
+
+def find_matches(text, pattern, replacement=None, regex=False):
+    """Find every non-empty match of pattern in text.
+
+    If replacement is given, each Match also carries its replacement text
+    (with group references expanded when regex is True).
+    """
+    line_index = LineIndex(text)
+    matches = []
+    for m in pattern.finditer(text):
+        start, end = m.span()
+        if start == end:
+            continue
+        new_text = None
+        if replacement is not None:
+            new_text = m.expand(replacement) if regex else replacement
+        matches.append(Match(start, end, line_index.index(start), line_index.index(end), new_text))
+    return matches
+
+
+def touched_line_ranges(text, matches):
+    """Return merged (first_line, last_line) ranges covering the replacements after they are applied."""
+    line_index = LineIndex(text)
+    ranges = []
+    line_shift = 0
+    for match in matches:
+        first_line = line_index.line_col(match.start)[0] + line_shift
+        last_line = first_line + match.replacement.count("\n")
+        line_shift += match.replacement.count("\n") - text.count("\n", match.start, match.end)
+
+        if ranges and first_line <= ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last_line))
+        else:
+            ranges.append((first_line, last_line))
+    return ranges
+
+
+class FindWorker:
+    """Runs find_matches on a background thread.
+
+    Only the newest search counts: results of a search superseded by a later
+    submit() are dropped. The UI thread collects results with poll().
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.results = queue.Queue()
+
+    def submit(self, text, pattern, replacement=None, regex=False):
+        """Start scanning text; returns the generation number of this search."""
+        self.generation += 1
+        generation = self.generation
+
+        def run():
+            try:
+                result = ("ok", find_matches(text, pattern, replacement, regex))
+            except Exception as e:
+                result = ("error", str(e))
+            self.results.put((generation,) + result)
+
+        threading.Thread(target=run, daemon=True).start()
+        return generation
+
+    def poll(self):
+        """Return (status, payload) for the newest search once it is done, otherwise None."""
+        while True:
+            try:
+                generation, status, payload = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if generation == self.generation:
+                return status, payload
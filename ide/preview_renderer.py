@@ -0,0 +1,252 @@
+"""
+Preview renderer for the Power Python Desktop IDE.
+Converts compiled HTML into styled text runs for the Tk preview pane in a
+single streaming pass over the document.
+"""
+
+import re
+from html.parser import HTMLParser
+
+
+# Tk text tag options for each style produced by the renderer
+PREVIEW_TAG_STYLES = {
+    "h1": {"font": ("Arial", 18, "bold"), "spacing1": 6, "spacing3": 4},
+    "h2": {"font": ("Arial", 15, "bold"), "spacing1": 6, "spacing3": 3},
+    "h3": {"font": ("Arial", 13, "bold"), "spacing1": 4, "spacing3": 2},
+    "h4": {"font": ("Arial", 11, "bold")},
+    "h5": {"font": ("Arial", 10, "bold")},
+    "h6": {"font": ("Arial", 10, "bold italic")},
+    "bold": {"font": ("Arial", 10, "bold")},
+    "italic": {"font": ("Arial", 10, "italic")},
+    "link": {"foreground": "#0645AD", "underline": True},
+    "code": {"font": ("Consolas", 10), "background": "#F0F0F0"},
+    "code_block": {"font": ("Consolas", 10), "background": "#F0F0F0", "lmargin1": 10, "lmargin2": 10},
+    "list_item": {"lmargin1": 10, "lmargin2": 25},
+    "blockquote": {"foreground": "#555555", "lmargin1": 20, "lmargin2": 20},
+    "python_output": {"background": "#F4F4F4", "foreground": "#005A9E", "lmargin1": 10, "lmargin2": 10},
+}
+
+# Elements whose content never shows up in the preview
+SKIP_TAGS = {"head", "script", "style", "template", "noscript"}
+
+# Elements that never have an end tag
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed", "source", "track", "wbr"}
+
+# Elements that start on a new line, and how many line breaks separate them
+BLOCK_BREAKS = {
+    "p": 2, "pre": 2, "blockquote": 2, "table": 2,
+    "h1": 2, "h2": 2, "h3": 2, "h4": 2, "h5": 2, "h6": 2,
+    "div": 1, "section": 1, "article": 1, "header": 1, "footer": 1, "nav": 1,
+    "ul": 1, "ol": 1, "li": 1, "tr": 1, "dl": 1, "dt": 1, "dd": 1, "figure": 1,
+}
+
+# Inline elements mapped to the style they apply
+INLINE_STYLES = {
+    "strong": "bold", "b": "bold", "th": "bold",
+    "em": "italic", "i": "italic",
+    "a": "link",
+    "code": "code",
+}
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class PreviewRenderer(HTMLParser):
+    """Streams HTML into a list of (text, tags) runs.
+
+    Whitespace is collapsed the way a browser would (except inside <pre>),
+    entities are decoded by the parser, and block structure is kept as line
+    breaks, list bullets and table cell separators.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Finished runs; the last run is collected in open_pieces and only
+        # joined once a differently styled run starts, so long runs of one
+        # style don't copy their text on every append
+        self.runs = []
+        self.open_pieces = []
+        self.open_tags = None
+        # Open elements as (tag, style or None)
+        self.stack = []
+        self.skip_depth = 0
+        self.pre_depth = 0
+        # One entry per open list: the next item number for <ol>, None for <ul>
+        self.lists = []
+        self.cells_in_row = 0
+        # Number of line breaks at the end of the output; starts "at a break"
+        # so the document doesn't begin with blank lines
+        self.trailing_newlines = 2
+
+    def current_tags(self):
+        """Styles applied by the currently open elements."""
+        return tuple(style for _, style in self.stack if style)
+
+    def emit(self, text, tags=None):
+        """Append text to the output, merging it with the previous run if the styles match."""
+        if not text:
+            return
+        tags = self.current_tags() if tags is None else tags
+        if self.open_pieces and self.open_tags == tags:
+            self.open_pieces.append(text)
+        else:
+            self.close_run()
+            self.open_pieces = [text]
+            self.open_tags = tags
+
+        stripped = text.rstrip("\n")
+        if stripped:
+            self.trailing_newlines = len(text) - len(stripped)
+        else:
+            self.trailing_newlines += len(text)
+
+    def close_run(self):
+        """Move the open run to the finished runs."""
+        if self.open_pieces:
+            self.runs.append(("".join(self.open_pieces), self.open_tags))
+            self.open_pieces = []
+
+    def ends_with_space(self):
+        return bool(self.open_pieces) and self.open_pieces[-1].endswith(" ")
+
+    def trim_trailing_space(self):
+        """Drop a dangling space at the end of the output."""
+        if not self.ends_with_space():
+            return
+        pieces = self.open_pieces
+        while pieces and not pieces[-1].strip(" "):
+            pieces.pop()
+        if pieces:
+            pieces[-1] = pieces[-1].rstrip(" ")
+            return
+
+        # The whole run was spaces: reopen the one before it
+        if self.runs:
+            text, self.open_tags = self.runs.pop()
+            pieces.append(text)
+        # Recount the line breaks now ending the output
+        last = pieces[-1] if pieces else "\n\n"
+        self.trailing_newlines = len(last) - len(last.rstrip("\n"))
+
+    def close(self):
+        super().close()
+        self.close_run()
+
+    def line_break(self, count):
+        """Make sure the output ends with at least count line breaks."""
+        if not self.open_pieces:
+            return
+        self.trim_trailing_space()
+        if self.trailing_newlines < count:
+            self.emit("\n" * (count - self.trailing_newlines), ())
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag in BLOCK_BREAKS:
+            self.line_break(BLOCK_BREAKS[tag])
+
+        style = INLINE_STYLES.get(tag)
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            style = tag
+        elif tag == "pre":
+            self.pre_depth += 1
+            style = "code_block"
+        elif tag == "code" and self.pre_depth:
+            # Code inside <pre> is already styled as a block
+            style = None
+        elif tag == "blockquote":
+            style = "blockquote"
+        elif tag == "div" and "python-power-output" in (dict(attrs).get("class") or "").split():
+            style = "python_output"
+        elif tag in ("ul", "ol"):
+            self.lists.append(1 if tag == "ol" else None)
+        elif tag == "li":
+            depth = max(len(self.lists), 1)
+            number = self.lists[-1] if self.lists else None
+            if number is None:
+                bullet = "• "
+            else:
+                bullet = f"{number}. "
+                self.lists[-1] += 1
+            self.emit("  " * (depth - 1) + bullet, self.current_tags() + ("list_item",))
+            style = "list_item"
+        elif tag == "tr":
+            self.cells_in_row = 0
+        elif tag in ("td", "th"):
+            if self.cells_in_row:
+                self.trim_trailing_space()
+                self.emit(" | ")
+            self.cells_in_row += 1
+        elif tag == "br":
+            self.emit("\n")
+        elif tag == "hr":
+            self.emit("—" * 20)
+            self.line_break(1)
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            self.emit(f"[image: {alt}]" if alt else "[image]")
+
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, style))
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+            return
+        if self.skip_depth or tag in VOID_TAGS:
+            return
+
+        # Close the element, along with anything left unclosed inside it
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, _ = self.stack.pop()
+            if open_tag == "pre":
+                self.pre_depth -= 1
+            elif open_tag in ("ul", "ol") and self.lists:
+                self.lists.pop()
+            if open_tag == tag:
+                break
+
+        if tag in BLOCK_BREAKS:
+            self.line_break(BLOCK_BREAKS[tag])
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.pre_depth:
+            self.emit(data)
+            return
+
+        text = WHITESPACE.sub(" ", data)
+        # No leading space at the start of a line or after another space
+        if self.trailing_newlines or self.ends_with_space():
+            text = text.lstrip(" ")
+        self.emit(text)
+
+
+def render_preview(html):
+    """Convert compiled HTML into a list of (text, tags) runs for the preview pane."""
+    # Nothing after the last ">" can be a complete tag, so escape it as text.
+    # HTMLParser would otherwise rescan to the end from every "<" in it when
+    # it is closed, which is quadratic on input like '<a "<a "<a "...'.
+    tail = html.find("<", html.rfind(">") + 1)
+    if tail >= 0:
+        html = html[:tail] + html[tail:].replace("<", "&lt;")
+
+    renderer = PreviewRenderer()
+    renderer.feed(html)
+    renderer.close()
+
+    runs = renderer.runs
+    # Trim trailing line breaks
+    while runs and not runs[-1][0].strip():
+        runs.pop()
+    if runs:
+        runs[-1] = (runs[-1][0].rstrip(), runs[-1][1])
+    return runs
@@ -0,0 +1,327 @@
+"""
+Project-wide search index for the Power Python Desktop IDE.
+Keeps an on-disk trigram index of the text files in a directory so "Find in
+Files" only has to read the few files that can contain the query.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# Use watchdog for file-change events when it is installed
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+
+# Where index files are stored, one per indexed directory
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".power_python_ide_index")
+
+# Files that get indexed
+INDEXED_EXTENSIONS = {".md", ".markdown", ".pyp", ".powerpy", ".py", ".html", ".htm", ".css", ".js", ".txt", ".json", ".yml", ".yaml"}
+MAX_INDEXED_FILE_SIZE = 4 * 1024 * 1024
+SKIPPED_DIRECTORIES = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox"}
+
+# Bump when the on-disk format changes so old indexes are rebuilt
+INDEX_VERSION = 1
+
+# Seconds to wait after the last change before writing the index to disk
+SAVE_DELAY = 5.0
+
+# Seconds to collect file-change events for before reindexing the files
+UPDATE_DELAY = 0.5
+
+# Watchdog events that change a file. Reading a file also produces events
+# (opened, closed_no_write), and the index reads the files it indexes.
+CHANGE_EVENTS = {"created", "modified", "deleted", "moved"}
+
+
+def trigrams(text):
+    """Return the set of lowercase three-character substrings of text."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def default_index_path(root):
+    """Index file used for a directory."""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(INDEX_DIR, f"{digest}.json")
+
+
+def is_indexed_file(path):
+    """Whether a file should be in the index."""
+    return os.path.splitext(path)[1].lower() in INDEXED_EXTENSIONS
+
+
+class SearchResult:
+    """A line containing a match."""
+
+    __slots__ = ("path", "line", "column", "preview")
+
+    def __init__(self, path, line, column, preview):
+        self.path = path
+        self.line = line
+        self.column = column
+        self.preview = preview
+
+
+class TrigramIndex:
+    """Maps every trigram to the files containing it.
+
+    A query is answered by intersecting the posting sets of its trigrams and
+    then scanning only the candidate files for the actual lines. The index is
+    persisted as JSON and brought up to date incrementally, either by
+    comparing modification times (update()) or from file-change events
+    (update_file() / remove_file()).
+    """
+
+    def __init__(self, root, index_path=None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or default_index_path(self.root)
+        # Relative path -> [file id, mtime, size]
+        self.files = {}
+        # Trigram -> set of file ids
+        self.postings = {}
+        self.next_id = 0
+        self.dirty = False
+        # Events from the file watcher arrive on another thread
+        self.lock = threading.RLock()
+
+    def load(self):
+        """Load the persisted index, if there is a usable one."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return False
+
+        with self.lock:
+            self.files = data["files"]
+            self.postings = {gram: set(ids) for gram, ids in data["postings"].items()}
+            self.next_id = data["next_id"]
+            self.dirty = False
+        return True
+
+    def save(self):
+        """Write the index to disk."""
+        with self.lock:
+            data = {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "files": dict(self.files),
+                "postings": {gram: sorted(ids) for gram, ids in self.postings.items()},
+                "next_id": self.next_id,
+            }
+            self.dirty = False
+
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated index
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.index_path)
+
+    def walk(self):
+        """Yield the absolute paths of all indexable files under the root."""
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [d for d in subdirectories if d not in SKIPPED_DIRECTORIES]
+            for filename in filenames:
+                if is_indexed_file(filename):
+                    yield os.path.join(directory, filename)
+
+    def update(self):
+        """Bring the index up to date with the files on disk. Returns the number of files changed."""
+        changed = 0
+        seen = set()
+        for path in self.walk():
+            relative_path = os.path.relpath(path, self.root)
+            seen.add(relative_path)
+            if self.update_file(path):
+                changed += 1
+
+        with self.lock:
+            removed = [p for p in self.files if p not in seen]
+        for relative_path in removed:
+            self.remove_file(os.path.join(self.root, relative_path))
+            changed += 1
+        return changed
+
+    def update_file(self, path):
+        """(Re)index a single file unless it is unchanged since it was indexed. Returns whether the index changed."""
+        relative_path = os.path.relpath(path, self.root)
+        try:
+            stat = os.stat(path)
+            entry = self.files.get(relative_path)
+            if entry and entry[1] == stat.st_mtime and entry[2] == stat.st_size:
+                return False
+            if stat.st_size > MAX_INDEXED_FILE_SIZE:
+                return self.remove_file(path)
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                grams = trigrams(f.read())
+        except OSError:
+            return self.remove_file(path)
+
+        with self.lock:
+            self._remove_postings(relative_path)
+            file_id = self.next_id
+            self.next_id += 1
+            self.files[relative_path] = [file_id, stat.st_mtime, stat.st_size]
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(file_id)
+            self.dirty = True
+        return True
+
+    def remove_file(self, path):
+        """Drop a file from the index. Returns whether it was in it."""
+        relative_path = os.path.relpath(path, self.root)
+        with self.lock:
+            if relative_path not in self.files:
+                return False
+            self._remove_postings(relative_path)
+            del self.files[relative_path]
+            self.dirty = True
+            return True
+
+    def _remove_postings(self, relative_path):
+        """Remove a file's id from every posting set."""
+        entry = self.files.get(relative_path)
+        if not entry:
+            return
+        file_id = entry[0]
+        empty = []
+        for gram, ids in self.postings.items():
+            ids.discard(file_id)
+            if not ids:
+                empty.append(gram)
+        for gram in empty:
+            del self.postings[gram]
+
+    def candidates(self, query):
+        """Return the relative paths of files that may contain query."""
+        grams = trigrams(query)
+        with self.lock:
+            if not grams:
+                # Queries shorter than a trigram can't be narrowed down
+                return sorted(self.files)
+
+            sets = []
+            for gram in grams:
+                ids = self.postings.get(gram)
+                if not ids:
+                    return []
+                sets.append(ids)
+            sets.sort(key=len)
+            ids = set.intersection(*sets)
+            return sorted(path for path, entry in self.files.items() if entry[0] in ids)
+
+    def search(self, query, max_results=1000):
+        """Find the lines containing query (case-insensitive) across the indexed files."""
+        needle = query.lower()
+        results = []
+        for relative_path in self.candidates(query):
+            path = os.path.join(self.root, relative_path)
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    for line_number, line in enumerate(f, 1):
+                        column = line.lower().find(needle)
+                        if column != -1:
+                            results.append(SearchResult(path, line_number, column, line.strip()[:200]))
+                            if len(results) >= max_results:
+                                return results
+            except OSError:
+                continue
+        return results
+
+
+class IndexUpdateHandler(FileSystemEventHandler):
+    """Applies watchdog file-change events to a TrigramIndex.
+
+    Changed paths are collected for UPDATE_DELAY seconds by one timer and
+    then reindexed once each, so an editor saving a file in several writes
+    doesn't reindex it several times.
+    """
+
+    def __init__(self, index, delay=UPDATE_DELAY):
+        super().__init__()
+        self.index = index
+        self.delay = delay
+        # Path -> whether it still exists, for the changes not applied yet
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.update_timer = None
+        self.save_timer = None
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+
+        with self.pending_lock:
+            for path, exists in self.affected_paths(event):
+                if not is_indexed_file(path):
+                    continue
+                if any(part in SKIPPED_DIRECTORIES for part in os.path.relpath(path, self.index.root).split(os.sep)):
+                    continue
+                self.pending[path] = exists
+            if self.pending and self.update_timer is None:
+                self.update_timer = threading.Timer(self.delay, self.apply_pending)
+                self.update_timer.daemon = True
+                self.update_timer.start()
+
+    def apply_pending(self):
+        """Reindex the files changed since the last call."""
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+            self.update_timer = None
+
+        changed = False
+        for path, exists in pending.items():
+            if exists and os.path.isfile(path):
+                changed |= self.index.update_file(path)
+            else:
+                changed |= self.index.remove_file(path)
+        if changed:
+            self.schedule_save()
+
+    def affected_paths(self, event):
+        """Return (path, still_exists) pairs for an event."""
+        if event.event_type == "moved":
+            return [(event.src_path, False), (event.dest_path, True)]
+        if event.event_type == "deleted":
+            return [(event.src_path, False)]
+        return [(event.src_path, True)]
+
+    def schedule_save(self):
+        """Write the index once changes have settled down."""
+        if self.save_timer:
+            self.save_timer.cancel()
+        self.save_timer = threading.Timer(SAVE_DELAY, self.save)
+        self.save_timer.daemon = True
+        self.save_timer.start()
+
+    def save(self):
+        if self.index.dirty:
+            try:
+                self.index.save()
+            except OSError as e:
+                print(f"Error saving search index: {e}")
+
+
+def watch_index(index, delay=UPDATE_DELAY):
+    """Keep index up to date from file-change events. Returns the observer, or None without watchdog."""
+    if not WATCHDOG_AVAILABLE:
+        return None
+
+    observer = Observer()
+    observer.schedule(IndexUpdateHandler(index, delay), index.root, recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
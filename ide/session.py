@@ -0,0 +1,117 @@
+"""
+Session persistence for the Power Python Desktop IDE.
+Saves the open tabs, cursor positions, working directory and explorer
+history between runs, and caches syntax highlight runs by content hash so
+reopened files are colored without lexing them again.
+"""
+
+import hashlib
+import json
+import os
+
+# Session file written when the IDE closes
+SESSION_FILE = os.path.join(os.path.expanduser("~"), ".power_python_ide_session.json")
+
+# Bump when the session layout changes; older sessions are ignored
+SESSION_VERSION = 1
+
+# Highlight runs cached by content hash, one JSON file per entry
+HIGHLIGHT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".power_python_ide_highlight_cache")
+
+# Bump when the highlighter output changes so cached runs are recomputed
+HIGHLIGHT_CACHE_VERSION = 1
+
+# Least recently used entries are removed beyond this many
+HIGHLIGHT_CACHE_SIZE = 200
+
+
+def load_session(path=SESSION_FILE):
+    """Return the saved session, or None if there is no usable one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+        return None
+    return session
+
+
+def save_session(session, path=SESSION_FILE):
+    """Write the session, replacing the previous one atomically."""
+    session = dict(session, version=SESSION_VERSION)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(session, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def restore_nav_history(history, index):
+    """Drop directories that no longer exist from the explorer history.
+
+    Returns the remaining history and the index of the entry that was current
+    (or the last remaining entry if it is gone).
+    """
+    history = history or []
+    current = history[index] if 0 <= index < len(history) else None
+    remaining = [directory for directory in history if os.path.isdir(directory)]
+    if current in remaining:
+        return remaining, remaining.index(current)
+    return remaining, len(remaining) - 1
+
+
+class HighlightCache:
+    """Highlight runs stored on disk, keyed by a hash of the content and language."""
+
+    def __init__(self, directory=HIGHLIGHT_CACHE_DIR, max_entries=HIGHLIGHT_CACHE_SIZE):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def key(self, content, language):
+        """Cache key for content highlighted as language."""
+        digest = hashlib.sha256(f"{HIGHLIGHT_CACHE_VERSION}\0{language}\0".encode("utf-8"))
+        digest.update(content.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached runs for key, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                runs = json.load(f)
+            # Mark as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return runs
+
+    def put(self, key, runs):
+        """Store runs under key and drop the least recently used entries."""
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.path(key) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(runs, f, separators=(",", ":"))
+        os.replace(temp_path, self.path(key))
+        self.prune()
+
+    def prune(self):
+        """Remove the least recently used entries beyond max_entries."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,84 @@
+"""
+Editor tab bookkeeping for the Power Python Desktop IDE.
+A compact record per open tab, and a least-recently-used list that decides
+which tabs keep their Tk widgets and which are hibernated.
+"""
+
+from collections import OrderedDict
+
+# Tabs beyond this many keep only their text until they are selected again
+MAX_LIVE_TABS = 12
+
+
+class TabRecord:
+    """State of one editor tab.
+
+    While a tab is hibernated its widgets are destroyed (text_widget is None)
+    and its content, cursor and scroll position are kept in hibernated_text,
+    cursor and yview.
+    """
+
+    __slots__ = (
+        "file_id", "tab", "text_widget", "line_numbers", "highlighter",
+        "filepath", "filename", "language", "large_file", "loading",
+        # Content hash and highlight runs of the last highlighting pass
+        "highlight_key", "highlight_runs",
+        # Snapshot kept while hibernated
+        "hibernated_text", "cursor", "yview",
+    )
+
+    def __init__(self, file_id, tab, filename, filepath=None, language="python"):
+        self.file_id = file_id
+        self.tab = tab
+        self.text_widget = None
+        self.line_numbers = None
+        self.highlighter = None
+        self.filepath = filepath
+        self.filename = filename
+        self.language = language
+        self.large_file = False
+        self.loading = False
+        self.highlight_key = None
+        self.highlight_runs = None
+        self.hibernated_text = None
+        self.cursor = "1.0"
+        self.yview = 0.0
+
+    @property
+    def hibernated(self):
+        return self.text_widget is None
+
+
+class TabLRU:
+    """Order of tab use, most recent last, capped at capacity live tabs."""
+
+    def __init__(self, capacity=MAX_LIVE_TABS):
+        self.capacity = capacity
+        self.order = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.order
+
+    def __len__(self):
+        return len(self.order)
+
+    def touch(self, key, can_evict=None):
+        """Mark key as used and return the keys to hibernate to stay within capacity.
+
+        can_evict(key) can veto evicting a tab (e.g. one that is still loading);
+        vetoed tabs stay live and count towards the capacity.
+        """
+        self.order[key] = None
+        self.order.move_to_end(key)
+
+        evicted = []
+        for candidate in list(self.order):
+            if len(self.order) <= self.capacity:
+                break
+            if candidate != key and (can_evict is None or can_evict(candidate)):
+                del self.order[candidate]
+                evicted.append(candidate)
+        return evicted
+
+    def discard(self, key):
+        self.order.pop(key, None)
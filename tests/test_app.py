@@ -0,0 +1,50 @@
+"""
+Test suite for the web IDE server's compiles.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+
+def setUpModule():
+    # The app creates its upload folder in the current directory when imported
+    global app_module
+    previous_cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        import ide.app as app_module
+    finally:
+        os.chdir(previous_cwd)
+
+
+class TestApp(unittest.TestCase):
+    """Test cases for compiling on the server's request threads."""
+
+    def test_concurrent_compiles(self):
+        """Test that compiles on two threads each get all of their own output and leave sys.stdout alone."""
+        stdout = sys.stdout
+        pages = {}
+
+        def compile_page(name):
+            source = f"```python-power\nimport time\nfor i in range(20):\n    print('{name}', i)\n    time.sleep(0.001)\n```\n"
+            pages[name] = app_module.run_compile(source)[0]
+
+        threads = [threading.Thread(target=compile_page, args=(name,)) for name in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(sys.stdout, stdout)
+        for name, other in (("first", "second"), ("second", "first")):
+            for i in range(20):
+                self.assertIn(f"{name} {i}\n", pages[name])
+            self.assertNotIn(other, pages[name])
+        self.assertEqual(app_module.compiles_waiting.get(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Test suite for writing large python-power outputs to content-hashed files.
+"""
+
+import base64
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from compiler.assets import PageAssets
+from compiler.main import compile_markdown
+
+IMAGE = base64.b64encode(bytes(range(256)) * 16).decode()
+
+
+class TestAssets(unittest.TestCase):
+    """Test cases for PageAssets and externalized output in compiled pages."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.page = os.path.join(self.work_dir, "page.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_images_and_large_outputs(self):
+        """Test that large data: URIs and outputs become lazily loaded files."""
+        assets = PageAssets(self.page, inline_limit=1000)
+        html = assets.externalize(f'<img alt="plot" src="data:image/png;base64,{IMAGE}"><img src="data:image/png;base64,AAAA">')
+        name = sorted(assets.names)[0]
+
+        self.assertEqual(html, f'<img loading="lazy" alt="plot" src="page_assets/{name}"><img src="data:image/png;base64,AAAA">')
+        with open(os.path.join(self.work_dir, "page_assets", name), "rb") as f:
+            self.assertEqual(f.read(), base64.b64decode(IMAGE))
+
+        html = assets.externalize("<table>" + "<tr><td>x</td></tr>" * 100 + f'</table><img src="data:image/png;base64,{IMAGE}">')
+        self.assertTrue(html.startswith('<iframe class="python-power-asset" src="page_assets/'))
+        self.assertIn('loading="lazy"', html)
+        fragment = [name for name in assets.names if name.endswith(".html")][0]
+        with open(os.path.join(self.work_dir, "page_assets", fragment), encoding="utf-8") as f:
+            # The fragment is in the asset directory, next to the image
+            self.assertIn(f'<img loading="lazy" src="{name}">', f.read())
+
+    def test_compile_markdown(self):
+        """Test that rebuilds keep unchanged assets and remove stale ones."""
+        source = os.path.join(self.work_dir, "page.md")
+        assets_dir = os.path.join(self.work_dir, "page_assets")
+
+        def build(count):
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(f"# Page\n\n```python-power\nprint('<p>row</p>' * {count})\n```\n")
+            with contextlib.redirect_stdout(io.StringIO()):
+                compile_markdown(source, inline_limit=1000)
+            return sorted(os.listdir(assets_dir)) if os.path.isdir(assets_dir) else []
+
+        first = build(500)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(build(500), first)
+        self.assertNotEqual(build(600), first)
+        self.assertEqual(build(5), [])
+        with open(self.page, encoding="utf-8") as f:
+            self.assertIn("<p>row</p>" * 5, f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Test suite for bounded capture of python-power block output.
+"""
+
+import unittest
+from compiler.capture import BoundedOutput
+from compiler.main import compile_string, execute_python_code
+
+
+class TestCapture(unittest.TestCase):
+    """Test cases for BoundedOutput and the output limit of blocks."""
+
+    def test_spill_and_truncate(self):
+        """Test that output spills to a file and stops at the limit with a notice."""
+        output = BoundedOutput(max_chars=100, spill_size=10)
+        self.assertEqual(output.write("a\r\n" * 5), 15)
+        self.assertTrue(output._buffer._rolled)
+        self.assertEqual(output.getvalue(), "a\r\n" * 5)
+
+        output.write("b" * 200)
+        output.write("c")
+        value = output.getvalue()
+        self.assertTrue(value.startswith("a\r\n" * 5 + "b" * 85 + "\n<p"))
+        self.assertIn("Output truncated after 100 characters.", value)
+        output.close()
+
+        # Late prints, e.g. from a thread the block started, are dropped
+        self.assertEqual(output.write("late"), 4)
+        print("late", file=output, flush=True)
+
+    def test_block_output_limit(self):
+        """Test that a block that prints in a loop is cut off."""
+        output = execute_python_code("for i in range(100000):\n    print(i)", max_output=1000)
+        self.assertEqual(output.split("\n<p")[0], "".join(f"{i}\n" for i in range(100000))[:1000])
+
+        html = compile_string("```python-power\nprint('<b>bold</b>')\n```\n")
+        self.assertIn('<div class="python-power-output"><b>bold</b>\n</div>', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Test suite for reading large markdown sources in chunks.
+"""
+
+import io
+import unittest
+from compiler.chunking import iter_body_chunks, read_frontmatter, scan_definitions
+
+
+class TestChunking(unittest.TestCase):
+    """Test cases for the frontmatter reader and the body chunker."""
+
+    def test_read_frontmatter(self):
+        """Test that only the header is read and the body offsets are returned."""
+        source = b"\n---\ntitle: Big Page\ncss: [a.css]\n---\n\n# Body\n"
+        f = io.BytesIO(source)
+        metadata, body_start, line_offset = read_frontmatter(f)
+
+        self.assertEqual(metadata, {"title": "Big Page", "css": ["a.css"]})
+        self.assertEqual(source[body_start:], b"\n# Body\n")
+        self.assertEqual(line_offset, 5)
+
+        self.assertEqual(read_frontmatter(io.BytesIO(b"# No header\n")), ({}, 0, 0))
+        self.assertEqual(read_frontmatter(io.BytesIO(b"---\nunterminated: yes\n")), ({}, 0, 0))
+
+    def test_chunks_keep_blocks_whole(self):
+        """Test that chunks are only cut between top-level blocks, and not between list items."""
+        source = (b"First paragraph.\n\n"
+                  b"```python\nx = 1\n\ny = 2\n```\n\n"
+                  b"- one\n\n- two\n\n"
+                  b"<!--\n\ncomment\n-->\n\n"
+                  b"1. item\n   ```\n   code\n   ```\n   ```\n\nLast paragraph.\n")
+        chunks = list(iter_body_chunks(source, chunk_size=1))
+
+        self.assertEqual("".join(text for text, _ in chunks), source.decode("utf-8"))
+        self.assertEqual([text.split("\n", 1)[0] for text, _ in chunks],
+                         ["First paragraph.", "```python", "<!--", "Last paragraph."])
+        self.assertEqual([line for _, line in chunks], [0, 2, 12, 23])
+
+        self.assertEqual(len(list(iter_body_chunks(source))), 1)
+
+    def test_scan_definitions(self):
+        """Test that footnotes, references and css-power blocks are found outside code."""
+        source = (b"Text[^a] and [link][ref].\n[^a]: A note.\n\n"
+                  b"[ref]: /target\n[other]: /other\n\n"
+                  b"```markdown\n[^b]: not a note\n\n[code]: /code\n```\n\n"
+                  b"```css-power\nh1 { color: red; }\n```\n")
+        footnotes, references, styles = scan_definitions(source)
+
+        self.assertEqual(footnotes, ["a"])
+        self.assertEqual(references, ["[ref]: /target\n", "[other]: /other\n"])
+        self.assertEqual(styles, ["h1 { color: red; }\n"])
+
+
+if __name__ == '__main__':
+    unittest.main()
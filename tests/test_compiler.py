@@ -2,10 +2,13 @@
 Test suite for the Power Python Compiler.
 """
 
+import contextlib
 import unittest
 import os
+import io
 import tempfile
-from compiler.main import compile_markdown
+from compiler.main import (compile_markdown, compile_string, load_post, load_template, process_enhanced_html_tags,
+                           render_post, render_post_stream)
 
 
 class TestCompiler(unittest.TestCase):
@@ -89,6 +92,110 @@ print("Hello, World!")
             if os.path.exists(html_filename):
                 os.unlink(html_filename)
 
+    def test_compile_string(self):
+        """Test that markdown source can be compiled without touching the filesystem."""
+        html = compile_string(self.test_md_content)
+        
+        self.assertIn('<title>Test Document</title>', html)
+        self.assertIn('<h1>Test Heading</h1>', html)
+
+    def test_render_post_stream(self):
+        """Test that streaming a page a block at a time produces the same HTML as rendering it in memory."""
+        content = """---
+title: Stream Test
+---
+
+# Heading {#top .title}
+
+A paragraph with a footnote.[^1] {.lead}
+
+A [link defined further down][later] and the same footnote again.[^1]
+
+- item one
+- item two
+
+```css-power
+h1 { color: red; }
+```
+
+```python-power
+print("<b>generated</b>")
+```
+
+[^1]: The footnote.
+
+[later]: /later
+"""
+        post, line_offset = load_post(content)
+        expected = render_post(post, load_template(), line_offset=line_offset)
+        
+        out = io.StringIO()
+        render_post_stream(post, load_template(), out, line_offset=line_offset, chunk_size=1)
+        
+        self.assertEqual(out.getvalue(), expected)
+        self.assertIn('<h1 id="top" class="title">', expected)
+        self.assertIn('<a href="/later">', expected)
+
+    def test_render_post_stream_attribute_boundaries(self):
+        """Test that attribute blocks that apply to an earlier block are applied the same when streaming."""
+        content = """# Intro
+
+<section>
+
+# Inside
+
+</section> {#inside}
+
+<div>
+
+A paragraph.
+
+</div>
+{.boxed}
+
+<p>An open paragraph
+
+that closes here {.lead}</p>
+
+Last paragraph.
+"""
+        post, line_offset = load_post(content)
+        expected = render_post(post, load_template(), line_offset=line_offset)
+        self.assertIn('<h1 id="inside">Inside</h1>', expected)
+        self.assertIn('<p class="boxed">A paragraph.</p>', expected)
+        self.assertIn('<p class="lead">An open paragraph', expected)
+        
+        for chunk_size in (1, 40):
+            out = io.StringIO()
+            render_post_stream(post, load_template(), out, line_offset=line_offset, chunk_size=chunk_size)
+            self.assertEqual(out.getvalue(), expected)
+
+        # A block without an opening tag between a paragraph and a block that reaches back to it,
+        # and the fixture page, whose attribute values contain braces
+        fixture = os.path.join(os.path.dirname(__file__), "phase1_comprehensive_test.md")
+        with open(fixture, encoding="utf-8") as f:
+            sources = ["<section>\n\ninner {.s}\n\n</section>\n\n</div> {.y}\n", f.read()]
+        for source in sources:
+            post, line_offset = load_post(source)
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = render_post(post, load_template(), line_offset=line_offset)
+                for chunk_size in (1, 40, 1000):
+                    with self.subTest(chunk_size=chunk_size):
+                        out = io.StringIO()
+                        render_post_stream(post, load_template(), out, line_offset=line_offset, chunk_size=chunk_size)
+                        self.assertEqual(out.getvalue(), expected)
+        self.assertIn('<p class="s y">inner </p>', render_post(load_post(sources[0])[0], load_template()))
+
+    def test_enhanced_html_tags(self):
+        """Test the !html[...] syntax with nested and escaped brackets, unclosed tags and code blocks."""
+        self.assertEqual(process_enhanced_html_tags('!html[<div data-x="[[1], [2]]">a</div>] b'),
+                         '<div data-x="[[1], [2]]">a</div> b')
+        self.assertEqual(process_enhanced_html_tags('!html[<b>\\[x</b>]'), '<b>[x</b>')
+        self.assertEqual(process_enhanced_html_tags('!html[a !html[b] c]'), 'a !html[b] c')
+        self.assertEqual(process_enhanced_html_tags('!html[open\n\n!html[<i>ok</i>]'), '!html[open\n\n<i>ok</i>')
+        self.assertEqual(process_enhanced_html_tags('```\n!html[<b>x</b>]\n```\n\n!html[<b>y</b>]\n'),
+                         '```\n!html[<b>x</b>]\n```\n\n<b>y</b>\n')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test suite for reusable HTML components.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from compiler.components import ComponentError, ComponentRegistry, parse_arguments
+from compiler.main import compile_markdown
+from compiler.templates import TemplateCache
+
+
+class TestComponents(unittest.TestCase):
+    """Test cases for component calls and ComponentRegistry."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.components = os.path.join(self.work_dir, "components")
+        os.makedirs(self.components)
+        with open(os.path.join(self.components, "card.html"), "w", encoding="utf-8") as f:
+            f.write('<div class="card">\n\n    <h3>$title</h3>\n    <p>$content</p>\n</div>\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_parse_arguments(self):
+        """Test quoted, escaped and unquoted argument values."""
+        text = '!component[card](title="A \\"B\\"", content=\'x, y\', n=3 ) rest'
+        args, end = parse_arguments(text, text.index("(") + 1, len(text))
+        self.assertEqual(args, {"title": 'A "B"', "content": "x, y", "n": "3"})
+        self.assertEqual(text[end:], " rest")
+
+        self.assertEqual(parse_arguments("()", 1, 2), ({}, 2))
+        for text in ('(title="unclosed)', "(title)", "(a=1 b=2)"):
+            with self.assertRaises(ComponentError):
+                parse_arguments(text, 1, len(text))
+
+    def test_memoized_renders(self):
+        """Test that a component is rendered once per set of arguments."""
+        registry = ComponentRegistry(TemplateCache())
+        text = '!component[card](title=T, content=C) and !component[card](content=C, title=T)'
+        for _ in range(3):
+            html = registry.replace_components(text, self.components)
+        self.assertEqual(registry.renders, 1)
+        self.assertEqual(registry.templates.compiles, 1)
+        card = '<div class="card">\n    <h3>T</h3>\n    <p>C</p>\n</div>'
+        self.assertEqual(html, f"{card} and {card}")
+
+        html = registry.replace_components("!component[card](title=T) !component[nope]() !component[card](", self.components)
+        self.assertIn("Error in component card", html)
+        self.assertIn("no value for $content", html)
+        self.assertIn("Error in component nope", html)
+        self.assertTrue(html.endswith("!component[card]("))
+
+    def test_compile_markdown(self):
+        """Test components in a compiled page, outside code blocks, in both compile modes."""
+        source = os.path.join(self.work_dir, "page.md")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write('# Page\n\n!component[card](title="Hello", content="World")\n\n'
+                    '```\n!component[card](title="code", content="x")\n```\n')
+        output = os.path.join(self.work_dir, "page.html")
+        streamed = os.path.join(self.work_dir, "streamed.html")
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_markdown(source, output)
+            compile_markdown(source, streamed, stream=True)
+
+        with open(output, encoding="utf-8") as f:
+            html = f.read()
+        self.assertIn('<div class="card">\n    <h3>Hello</h3>', html)
+        self.assertIn("!component[card](title=&quot;code&quot;", html)
+        with open(streamed, encoding="utf-8") as f:
+            self.assertEqual(f.read(), html)
+
+
+if __name__ == '__main__':
+    unittest.main()
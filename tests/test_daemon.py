@@ -0,0 +1,93 @@
+"""
+Test suite for the compile daemon and its command line client.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import compiler.main
+from compiler.daemon import forward_to_daemon, run_command, run_forked, send_request, serve
+
+
+class TestDaemon(unittest.TestCase):
+    """Test cases for running compiler command lines in the daemon."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.work_dir, "page.md"), "w", encoding="utf-8") as f:
+            f.write("# Page\n\n```python-power\nprint(6 * 7)\n```\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_run_command(self):
+        """Test that output, relative paths and exit codes are handled like a CLI run."""
+        reply = run_command(["page.md"], self.work_dir)
+        self.assertEqual(reply["exit_code"], 0)
+        self.assertIn("Successfully compiled page.md", reply["stdout"])
+        with open(os.path.join(self.work_dir, "page.html"), encoding="utf-8") as f:
+            self.assertIn("42", f.read())
+
+        reply = run_command(["missing.md"], self.work_dir)
+        self.assertEqual(reply["exit_code"], 1)
+        self.assertIn("File not found", reply["stderr"])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork()")
+    def test_run_forked(self):
+        """Test that a forked compile reports its preloads and leaves the daemon's state alone."""
+        with open(os.path.join(self.work_dir, "state.md"), "w", encoding="utf-8") as f:
+            f.write("---\npreload: [colorsys]\n---\n\n```python-power\nglobal leaked_from_block\nleaked_from_block = 1\n```\n")
+        reply = run_forked(["state.md"], self.work_dir)
+        self.assertEqual(reply["exit_code"], 0)
+        self.assertIn("Preloaded colorsys", reply["stdout"])
+        self.assertIn("colorsys", reply["preload"])
+        self.assertFalse(hasattr(compiler.main, "leaked_from_block"))
+
+    def test_fallback_without_daemon(self):
+        """Test that the client reports no daemon so the caller compiles itself."""
+        self.assertIsNone(forward_to_daemon(["page.md"], os.path.join(self.work_dir, "none.sock")))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix domain sockets")
+    def test_timeout_is_an_error(self):
+        """Test that a daemon that doesn't reply in time is reported, not compiled around."""
+        socket_path = os.path.join(self.work_dir, "slow.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(socket_path)
+            # Listening, but never accepting or replying
+            server.listen()
+            with mock.patch("compiler.daemon.CLIENT_TIMEOUT", 0.1), \
+                    contextlib.redirect_stderr(io.StringIO()) as stderr:
+                self.assertEqual(forward_to_daemon(["page.md"], socket_path), 1)
+        self.assertIn("didn't reply", stderr.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "page.html")))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix domain sockets")
+    def test_round_trip(self):
+        """Test compiling through a running daemon."""
+        socket_path = os.path.join(self.work_dir, "daemon.sock")
+        thread = threading.Thread(target=serve, args=(socket_path,), daemon=True)
+        thread.start()
+        try:
+            for _ in range(200):
+                if os.path.exists(socket_path):
+                    break
+                threading.Event().wait(0.05)
+            self.assertEqual(stat.S_IMODE(os.stat(socket_path).st_mode), 0o600)
+            reply = send_request({"command": "compile", "argv": ["page.md"], "cwd": self.work_dir}, socket_path)
+            self.assertEqual(reply["exit_code"], 0)
+            self.assertTrue(os.path.exists(os.path.join(self.work_dir, "page.html")))
+        finally:
+            send_request({"command": "stop"}, socket_path)
+            thread.join(timeout=10)
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
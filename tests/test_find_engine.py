@@ -0,0 +1,67 @@
+"""
+Test suite for the desktop IDE's find/replace engine.
+"""
+
+import time
+import unittest
+from ide.find_engine import FindWorker, compile_search_pattern, find_matches, touched_line_ranges
+
+
+class TestFindEngine(unittest.TestCase):
+    """Test cases for scanning a buffer and planning replacements."""
+
+    def test_modes_and_indices(self):
+        """Test plain, case-insensitive, whole-word and regex searches and their Tk indices."""
+        text = "cat Cat\ncatalog cat"
+
+        matches = find_matches(text, compile_search_pattern("cat"))
+        self.assertEqual([m.start_index for m in matches], ["1.0", "2.0", "2.8"])
+
+        matches = find_matches(text, compile_search_pattern("cat", case_sensitive=False, whole_word=True))
+        self.assertEqual([(m.start_index, m.end_index) for m in matches],
+                         [("1.0", "1.3"), ("1.4", "1.7"), ("2.8", "2.11")])
+
+        matches = find_matches(text, compile_search_pattern(r"c(a)t\w+", regex=True), r"d\1g", regex=True)
+        self.assertEqual([(m.start_index, m.replacement) for m in matches], [("2.0", "dag")])
+
+        # Regex metacharacters are literal unless regex mode is on
+        self.assertEqual(find_matches("a.b axb", compile_search_pattern("a.b"))[0].end, 3)
+        self.assertEqual(len(find_matches("a.b axb", compile_search_pattern("a.b", regex=True))), 2)
+
+    def test_columns_after_emoji(self):
+        """Test that characters outside the BMP count as two Tk columns."""
+        text = "x = '\U0001F600' + cat\ncat \U0001F600\U0001F600 cat"
+        matches = find_matches(text, compile_search_pattern("cat"), "dog")
+
+        self.assertEqual([(m.start_index, m.end_index) for m in matches],
+                         [("1.11", "1.14"), ("2.0", "2.3"), ("2.9", "2.12")])
+        self.assertEqual([m.replacement for m in matches], ["dog"] * 3)
+        self.assertEqual(touched_line_ranges(text, matches), [(1, 2)])
+
+    def test_touched_line_ranges(self):
+        """Test that replacement line ranges account for lines added by earlier replacements."""
+        text = "x\ny\nx\nz\nx"
+        matches = find_matches(text, compile_search_pattern("x"), "a\nb")
+
+        self.assertEqual(touched_line_ranges(text, matches), [(1, 2), (4, 5), (7, 8)])
+
+    def test_worker_keeps_newest_search(self):
+        """Test that the background worker only reports the newest search."""
+        worker = FindWorker()
+        worker.submit("aaa", compile_search_pattern("a"))
+        worker.submit("bbb", compile_search_pattern("b"))
+
+        result = None
+        deadline = time.monotonic() + 5
+        while result is None and time.monotonic() < deadline:
+            result = worker.poll()
+            time.sleep(0.01)
+
+        status, matches = result
+        self.assertEqual(status, "ok")
+        self.assertEqual([m.start for m in matches], [0, 1, 2])
+        self.assertEqual(worker.poll(), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
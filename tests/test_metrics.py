@@ -0,0 +1,60 @@
+"""
+Test suite for the web IDE's in-process metrics.
+"""
+
+import unittest
+from ide.metrics import Registry
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for counters, gauges, histograms and their text rendering."""
+
+    def test_counter_and_gauge(self):
+        """Test labelled counters and gauges."""
+        registry = Registry()
+        requests = registry.counter('requests_total', 'Requests.', ['result'])
+        busy = registry.gauge('busy', 'Busy workers.')
+
+        requests.inc(result='ok')
+        requests.inc(2, result='ok')
+        requests.inc(result='error')
+        busy.inc()
+        busy.inc()
+        busy.dec()
+
+        self.assertEqual(requests.get(result='ok'), 3)
+        with self.assertRaises(ValueError):
+            requests.inc(-1, result='ok')
+        with self.assertRaises(ValueError):
+            requests.inc(kind='ok')
+
+        text = registry.render()
+        self.assertIn('# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{result="error"} 1\n', text)
+        self.assertIn('requests_total{result="ok"} 3\n', text)
+        self.assertIn('busy 1\n', text)
+
+    def test_histogram(self):
+        """Test that histogram buckets are cumulative and include +Inf."""
+        registry = Registry()
+        latency = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum 3.65', lines)
+        self.assertIn('latency_seconds_count 4', lines)
+
+    def test_label_escaping(self):
+        """Test that quotes and newlines in label values are escaped."""
+        registry = Registry()
+        errors = registry.counter('errors_total', 'Errors.', ['message'])
+        errors.inc(message='bad "input"\n')
+        self.assertIn('errors_total{message="bad \\"input\\"\\n"} 1', registry.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
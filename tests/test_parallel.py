@@ -0,0 +1,87 @@
+"""
+Test suite for running independent python-power blocks in parallel.
+"""
+
+import contextlib
+import io
+import unittest
+from compiler.main import load_post, load_template, render_post
+from compiler.parallel import BlockPool, analyze_block
+
+
+SOURCE = """---
+title: Parallel
+---
+
+```python-power
+print("first", sum(range(10)))
+```
+
+```python-power
+global total
+total = 5
+```
+
+```python-power
+print("total", total)
+```
+
+- item
+
+  ```python-power
+  def double(x):
+      return x * 2
+  print("nested", double(21))
+  ```
+
+```python-power
+print(undefined_name)
+```
+"""
+
+
+class TestParallel(unittest.TestCase):
+    """Test cases for the block analysis and BlockPool."""
+
+    def test_analyze_block(self):
+        """Test that blocks with globals or side effects aren't independent."""
+        self.assertTrue(analyze_block("x = [1, 2]\nx.append(3)\nprint(x)").independent)
+        self.assertTrue(analyze_block("import math\nclass A:\n    def f(self, v):\n        self.v = v\nA().f(math.pi)").independent)
+        self.assertTrue(analyze_block("from collections import Counter\nprint(Counter('aab'))").independent)
+        self.assertTrue(analyze_block("data = [3, 1]\nprint([d * 2 for d in sorted(data)])").independent)
+
+        self.assertEqual(analyze_block("global total\ntotal = 1").writes, {"total"})
+        self.assertFalse(analyze_block("global total\ntotal = 1").independent)
+        self.assertFalse(analyze_block("import os\nprint(os.getcwd())").independent)
+        self.assertFalse(analyze_block("from pathlib import Path").independent)
+        self.assertFalse(analyze_block("print(open('data.csv').read())").independent)
+        self.assertFalse(analyze_block("import math\nmath.tau = 0").independent)
+        self.assertFalse(analyze_block("print(").independent)
+
+        # Names from the compiler's globals, and modules not known to be pure
+        self.assertFalse(analyze_block('os.remove("f")').independent)
+        self.assertFalse(analyze_block("sys.path.append(x)").independent)
+        self.assertFalse(analyze_block("TEMPLATES._entries.clear()").independent)
+        self.assertFalse(analyze_block("def f():\n    return total\nprint(f())").independent)
+        self.assertFalse(analyze_block("import numpy as np\nnp.random.seed(1)").independent)
+        self.assertFalse(analyze_block("from . import x").independent)
+        self.assertFalse(analyze_block("import math\ndef f():\n    os = 1\nos.remove('f')").independent)
+
+    def test_render_post_with_pool(self):
+        """Test that a page rendered with a pool is the same as a sequential render."""
+        post, line_offset = load_post(SOURCE)
+        template = load_template()
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = render_post(post, template, line_offset=line_offset)
+            with BlockPool(2) as pool:
+                html = render_post(post, template, line_offset=line_offset, pool=pool)
+
+        self.assertEqual(html, expected)
+        self.assertIn("first 45", html)
+        self.assertIn("total 5", html)
+        self.assertIn("nested 42", html)
+        self.assertIn("name 'undefined_name' is not defined", html)
+
+
+if __name__ == '__main__':
+    unittest.main()
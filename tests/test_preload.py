@@ -0,0 +1,47 @@
+"""
+Test suite for preloading the modules a page's python-power blocks use.
+"""
+
+import sys
+import unittest
+from compiler.main import compile_string
+from compiler.preload import format_preload_stats, page_preloads, preload_modules
+from compiler.profiling import CompileProfile
+
+
+class TestPreload(unittest.TestCase):
+    """Test cases for the preload frontmatter key."""
+
+    def test_page_preloads(self):
+        """Test that preload can be a list or a comma-separated string."""
+        self.assertEqual(page_preloads({"preload": ["json", " csv "]}), ["json", "csv"])
+        self.assertEqual(page_preloads({"preload": "json, csv"}), ["json", "csv"])
+        self.assertEqual(page_preloads({"title": "No preloads"}), [])
+
+    def test_preload_modules(self):
+        """Test that imports are timed, and failures and loaded modules reported."""
+        sys.modules.pop("wave", None)
+        stats = preload_modules(["wave", "sys", "no_such_module_here"])
+
+        self.assertEqual([name for name, _, _ in stats], ["wave", "sys", "no_such_module_here"])
+        self.assertIn("wave", sys.modules)
+        self.assertGreaterEqual(stats[0][1], 0)
+        self.assertIsNone(stats[1][1])
+        self.assertIn("ModuleNotFoundError", stats[2][2])
+
+        summary = format_preload_stats(stats)
+        self.assertIn("sys (already loaded)", summary)
+        self.assertIn("no_such_module_here (failed", summary)
+
+    def test_compile_profile(self):
+        """Test that preloads are profiled as their own stage."""
+        sys.modules.pop("colorsys", None)
+        profile = CompileProfile(track_allocations=False)
+        compile_string("---\npreload: [colorsys, json]\n---\n\n# Page\n", profile)
+
+        self.assertIn("preload", [record.name for record in profile.records if record.category == "stage"])
+        self.assertEqual([record.name for record in profile.records if record.category == "preload"], ["colorsys"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Test suite for the desktop IDE's HTML preview renderer.
+"""
+
+import unittest
+from ide.preview_renderer import render_preview
+
+
+class TestPreviewRenderer(unittest.TestCase):
+    """Test cases for converting compiled HTML into preview text runs."""
+
+    def render_text(self, html):
+        """Render HTML and return just the text."""
+        return "".join(text for text, _ in render_preview(html))
+
+    def test_structure_and_styles(self):
+        """Test that headings, code and python-power output get their own styles."""
+        html = """<html><head><title>T</title><style>body {}</style></head><body>
+<h1>Title</h1>
+<p>Some <code>code</code> here</p>
+<div class="python-power-output">42</div>
+<script>alert(1)</script>
+</body></html>"""
+        runs = render_preview(html)
+
+        self.assertIn(("Title", ("h1",)), runs)
+        self.assertIn(("code", ("code",)), runs)
+        self.assertIn(("42", ("python_output",)), runs)
+        self.assertEqual(self.render_text(html), "Title\n\nSome code here\n\n42")
+
+    def test_whitespace_entities_and_lists(self):
+        """Test whitespace collapsing, entity decoding, list bullets and preformatted text."""
+        html = """<p>a   &amp;
+b &lt;tag&gt;</p>
+<ul>
+<li>one</li>
+<li>two</li>
+</ul>
+<ol><li>first</li></ol>
+<pre><code>x = 1
+    y = 2
+</code></pre>"""
+        text = self.render_text(html)
+
+        self.assertIn("a & b <tag>", text)
+        self.assertIn("• one\n• two", text)
+        self.assertIn("1. first", text)
+        self.assertIn("x = 1\n    y = 2", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
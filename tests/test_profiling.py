@@ -0,0 +1,63 @@
+"""
+Test suite for the compiler's stage timing and profiling hooks.
+"""
+
+import unittest
+from compiler.main import compile_string
+from compiler.profiling import CompileProfile
+
+
+SOURCE = """---
+title: Profiled
+---
+
+# Heading
+
+```python-power
+print("<b>first</b>")
+```
+
+```python-power
+data = [0] * 100000
+print(len(data))
+```
+"""
+
+
+class TestProfiling(unittest.TestCase):
+    """Test cases for CompileProfile."""
+
+    def test_stages_and_python_power_blocks(self):
+        """Test that each stage and python-power block is recorded with its source line."""
+        profile = CompileProfile()
+        html = compile_string(SOURCE, profile)
+        self.assertIn("100000", html)
+
+        names = [record.name for record in profile.records if record.category == "stage"]
+        self.assertEqual(names, ["compile", "frontmatter_load", "process_enhanced_html_tags", "md_render",
+                                 "process_html_attributes", "template_substitute"])
+
+        blocks = [record for record in profile.records if record.category == "python-power"]
+        self.assertEqual([block.args["line"] for block in blocks], [7, 11])
+        # The second block allocates a large list
+        self.assertGreater(blocks[1].peak_bytes, 100000 * 8)
+        # Nested spans don't hide allocations from the enclosing stage
+        md_render = next(record for record in profile.records if record.name == "md_render")
+        self.assertGreaterEqual(md_render.peak_bytes, blocks[1].peak_bytes)
+
+    def test_exports(self):
+        """Test the Chrome trace and Server-Timing output formats."""
+        profile = CompileProfile(track_allocations=False)
+        compile_string(SOURCE, profile)
+
+        events = profile.chrome_trace()["traceEvents"]
+        self.assertEqual(len(events), len(profile.records))
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in events))
+
+        header = profile.server_timing()
+        self.assertIn("md_render;dur=", header)
+        self.assertIn("python-power-line-7;dur=", header)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Test suite for the desktop IDE's Find in Files trigram index.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from ide.search_index import TrigramIndex, WATCHDOG_AVAILABLE, watch_index
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for building, persisting and querying the index."""
+
+    def setUp(self):
+        """Create a small docs tree and an index location."""
+        self.root = tempfile.mkdtemp()
+        self.index_dir = tempfile.mkdtemp()
+        self.write("intro.md", "# Intro {#getting-started}\n\nSee the helper.\n")
+        self.write(os.path.join("guide", "usage.md"), "Call render_table() here\nand also RENDER_TABLE\n")
+        self.write("image.png", "render_table")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.index_dir)
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def new_index(self):
+        return TrigramIndex(self.root, os.path.join(self.index_dir, "index.json"))
+
+    def test_search_and_persistence(self):
+        """Test that queries find matching lines and survive a save/load round trip."""
+        index = self.new_index()
+        self.assertEqual(index.update(), 2)
+
+        results = index.search("render_table")
+        self.assertEqual([(os.path.basename(r.path), r.line, r.column) for r in results],
+                         [("usage.md", 1, 5), ("usage.md", 2, 9)])
+        self.assertEqual(index.candidates("{#getting-started}"), ["intro.md"])
+        self.assertEqual(index.search("not in any file"), [])
+
+        index.save()
+        reloaded = self.new_index()
+        self.assertTrue(reloaded.load())
+        self.assertEqual(reloaded.update(), 0)
+        self.assertEqual(len(reloaded.search("helper")), 1)
+
+    def test_incremental_updates(self):
+        """Test that changed and deleted files are reflected in the index."""
+        index = self.new_index()
+        index.update()
+
+        path = self.write("intro.md", "now mentions render_table too\n")
+        index.update_file(path)
+        self.assertEqual(index.search("helper"), [])
+        self.assertEqual(len(index.search("render_table")), 3)
+
+        os.unlink(path)
+        index.update()
+        self.assertEqual(len(index.search("render_table")), 2)
+
+    @unittest.skipUnless(WATCHDOG_AVAILABLE, "watchdog is not installed")
+    def test_watcher_ignores_reads(self):
+        """Test that reading indexed files doesn't reindex them, but changing one does."""
+        index = self.new_index()
+        index.update()
+        usage_id = index.files[os.path.join("guide", "usage.md")][0]
+
+        reindexed = []
+        update_file = index.update_file
+        index.update_file = lambda path: reindexed.append(path) or update_file(path)
+        observer = watch_index(index, delay=0.1)
+        try:
+            time.sleep(0.2)
+            for _ in range(3):
+                self.assertEqual(len(index.search("render_table")), 2)
+            time.sleep(0.5)
+            self.assertEqual(reindexed, [])
+
+            path = self.write("intro.md", "now mentions render_table too\n")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("and again\n")
+            deadline = time.time() + 5
+            while not reindexed and time.time() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)
+        finally:
+            observer.stop()
+            observer.join()
+
+        self.assertEqual(len(index.search("render_table")), 3)
+        # Both writes were applied in one reindex, and the other file was left alone
+        self.assertEqual(reindexed, [path])
+        self.assertEqual(index.files[os.path.join("guide", "usage.md")][0], usage_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test suite for the desktop IDE's session persistence and highlight cache.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from ide.session import HighlightCache, load_session, save_session, restore_nav_history
+from ide.syntax.highlighter import compute_runs
+
+
+class TestSession(unittest.TestCase):
+    """Test cases for saving and restoring sessions and cached highlight runs."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_session_round_trip(self):
+        """Test that a saved session loads back and bad files are ignored."""
+        path = os.path.join(self.work_dir, "session.json")
+        self.assertIsNone(load_session(path))
+
+        session = {"working_directory": self.work_dir, "tabs": [{"filepath": "a.md", "cursor": "3.4"}]}
+        save_session(session, path)
+        self.assertEqual(load_session(path)["tabs"], session["tabs"])
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertIsNone(load_session(path))
+
+    def test_restore_nav_history(self):
+        """Test that missing directories are dropped from the explorer history."""
+        missing = os.path.join(self.work_dir, "gone")
+        sub = os.path.join(self.work_dir, "sub")
+        os.mkdir(sub)
+
+        self.assertEqual(restore_nav_history([self.work_dir, missing, sub], 2), ([self.work_dir, sub], 1))
+        self.assertEqual(restore_nav_history([self.work_dir, sub, missing], 2), ([self.work_dir, sub], 1))
+        self.assertEqual(restore_nav_history([], -1), ([], -1))
+
+    def test_highlight_cache(self):
+        """Test cache keys, lookups and least-recently-used pruning."""
+        cache = HighlightCache(os.path.join(self.work_dir, "cache"), max_entries=2)
+        key = cache.key("x = 1\n", "python")
+        self.assertNotEqual(key, cache.key("x = 1\n", "markdown"))
+        self.assertIsNone(cache.get(key))
+
+        runs = compute_runs("x = 1\n")
+        cache.put(key, runs)
+        self.assertEqual(cache.get(key), runs)
+
+        for content in ("a\n", "b\n"):
+            other = cache.key(content, "python")
+            cache.put(other, compute_runs(content))
+            os.utime(cache.path(other), (0, 0))
+        self.assertEqual(len(os.listdir(cache.directory)), 2)
+        self.assertEqual(cache.get(key), runs)
+
+    def test_compute_runs(self):
+        """Test that run positions account for leading blank lines and offsets."""
+        runs = compute_runs("\n\ndef f():\n    return 1\n")
+        self.assertIn(["Token.Keyword", "3.0", "3.3"], runs)
+        self.assertIn(["Token.Keyword", "4.4", "4.10"], runs)
+        # Adjacent punctuation is merged into one run
+        self.assertIn(["Token.Punctuation", "3.5", "3.8"], runs)
+
+        self.assertEqual(compute_runs("x = 1", "python", 5, 4),
+                         [["Token.Operator", "5.6", "5.7"], ["Token.Literal.Number.Integer", "5.8", "5.9"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
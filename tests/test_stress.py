@@ -0,0 +1,160 @@
+"""
+Stress tests for the compiler and the preview on adversarial input.
+Each entry point that scans user content is timed on inputs built to make
+regex-style scanning super-linear (unclosed brackets, braces, tags and
+quotes) at doubling sizes. A test fails, printing the measured scaling
+curve, when the time grows faster than linearly or goes over the stage's
+time budget.
+"""
+
+import contextlib
+import io
+import time
+import unittest
+from compiler.main import compile_string, process_components, process_enhanced_html_tags, process_html_attributes
+from compiler.symbols import collect_raw_html_symbols, new_page_symbols
+from ide.preview_renderer import PreviewRenderer, render_preview
+
+# Input sizes in characters; the largest is 8x the smallest
+SIZES = (4000, 8000, 16000, 32000)
+
+# How much faster than the input the time may grow between the smallest and
+# the largest size: linear time grows about as fast as the input (1x),
+# quadratic time as many times faster as the input grew (8x for SIZES)
+MAX_SLOWDOWN = 3
+
+# Times below this are rounded up when computing the growth, so timer noise
+# on very fast stages doesn't count as growth
+MIN_TIME = 0.001
+
+
+def repeat_to(unit, size):
+    """unit repeated to about size characters."""
+    return unit * max(1, size // len(unit))
+
+
+def best_time(function, content, repeat=3):
+    """Best wall time in seconds of function(content) over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def collect_raw_symbols(html):
+    collect_raw_html_symbols(html, new_page_symbols())
+
+
+def emit_run(content):
+    # What a large table turns into: thousands of short pieces of one style
+    renderer = PreviewRenderer()
+    for start in range(0, len(content), 8):
+        renderer.emit(content[start:start + 8])
+    renderer.close()
+
+
+def compile_quietly(content):
+    # python-power output and compile messages aren't part of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        compile_string(content)
+
+
+class TestStress(unittest.TestCase):
+    """Scaling checks for each stage that scans user content."""
+
+    def assert_scales(self, stage, inputs, budget, sizes=SIZES):
+        """Check that stage takes linear time on each of inputs and stays within budget seconds."""
+        for name, make_input in inputs.items():
+            with self.subTest(input=name):
+                curve = []
+                for size in sizes:
+                    content = make_input(size)
+                    curve.append((len(content), best_time(stage, content)))
+
+                growth = curve[-1][1] / max(curve[0][1], MIN_TIME)
+                input_growth = curve[-1][0] / curve[0][0]
+                if growth > MAX_SLOWDOWN * input_growth or curve[-1][1] > budget:
+                    lines = [f"{stage.__name__} on {name}: {growth:.1f}x slower for {input_growth:.0f}x "
+                             f"the input (at most {MAX_SLOWDOWN * input_growth:.0f}x, "
+                             f"{budget * 1000:.0f} ms at the largest size)"]
+                    lines += [f"  {length:>8} chars {seconds * 1000:>10.2f} ms" for length, seconds in curve]
+                    self.fail("\n".join(lines))
+
+    def test_enhanced_html_tags(self):
+        """Test the !html[...] scanner."""
+        self.assert_scales(process_enhanced_html_tags, {
+            "unterminated tag with a long tail": lambda size: "!html[" + "a" * size,
+            "many unterminated tags": lambda size: repeat_to("!html[a ", size),
+            "unclosed nested groups": lambda size: repeat_to("!html[[" + "a" * 50, size),
+            "deep nesting": lambda size: "!html[" + "[" * (size // 2) + "]" * (size // 2) + "]",
+            "escaped brackets": lambda size: "!html[" + repeat_to("\\[x\\] ", size) + "]",
+            "tags in a code block": lambda size: "```\n" + repeat_to("!html[<b>x</b>]\n", size) + "```\n",
+        }, budget=0.25)
+
+    def test_components(self):
+        """Test the !component[...](...) scanner."""
+        def process(content):
+            process_components(content, "no-such-components-directory")
+
+        self.assert_scales(process, {
+            "unterminated calls": lambda size: repeat_to("!component[a](x=1, ", size),
+            "unclosed quotes": lambda size: '!component[a](x="' + repeat_to("!component[a](x='", size),
+            "escaped quotes": lambda size: repeat_to('!component[a](x="\\"', size),
+            "long unquoted argument": lambda size: "!component[a](x=" + "a" * size,
+        }, budget=0.25)
+
+    def test_html_attributes(self):
+        """Test the attribute block pass over rendered HTML."""
+        self.assert_scales(process_html_attributes, {
+            "unclosed braces": lambda size: "<p>" + repeat_to("{a ", size),
+            "paragraphs without </p>": lambda size: repeat_to("<p>x ", size),
+            "<p without >": lambda size: repeat_to("<p ", size),
+            "<a without >": lambda size: repeat_to("<a ", size) + "{.x}",
+            "many attribute blocks": lambda size: repeat_to("<h2>T</h2>\n<p>x {.a}</p>{#b .c}\n", size),
+            "many blocks on one tag": lambda size: "<h2>T " + repeat_to("{.a} ", size) + "</h2>",
+        }, budget=0.25)
+
+    def test_raw_html_symbols(self):
+        """Test the id and href scan of raw HTML."""
+        self.assert_scales(collect_raw_symbols, {
+            "<a without >": lambda size: repeat_to("<a ", size),
+            "<a without href": lambda size: repeat_to('<a title="x">', size),
+            "unclosed href": lambda size: repeat_to('<a href="x ', size),
+            "unclosed id": lambda size: repeat_to('id="x ', size),
+        }, budget=0.25)
+
+    def test_preview(self):
+        """Test the desktop preview renderer."""
+        self.assert_scales(render_preview, {
+            "unclosed tags": lambda size: repeat_to("<a ", size),
+            "unclosed quotes": lambda size: repeat_to('<a "', size),
+            "unclosed attributes": lambda size: repeat_to("<a x=", size),
+            "unclosed end tags": lambda size: repeat_to("</a ", size),
+            "many comments": lambda size: repeat_to("x<!---->", size),
+            "deep nesting": lambda size: repeat_to("<div>", size // 2) + "x" + repeat_to("</div>", size // 2),
+            "large table": lambda size: "<table>" + repeat_to("<tr><td>cell</td><td>value</td></tr>", size) + "</table>",
+        }, budget=0.5)
+
+    def test_preview_runs(self):
+        """Test that one long run of text is collected in linear time."""
+        # Copying the run on every append only shows at larger sizes
+        self.assert_scales(emit_run, {
+            "large table": lambda size: repeat_to("cell | v\n", size),
+        }, budget=0.5, sizes=tuple(size * 16 for size in SIZES))
+
+    def test_compile_string(self):
+        """Test whole compiles of untrusted content, as the web IDE server runs them."""
+        self.assert_scales(compile_quietly, {
+            "unclosed braces": lambda size: "# Title\n\n" + repeat_to("{a ", size),
+            "attribute paragraphs": lambda size: repeat_to("para {.x}\n\n", size),
+            "braces in a heading": lambda size: "# " + repeat_to("{", size),
+            "unterminated !html tags": lambda size: repeat_to("!html[<b> ", size),
+            "raw <a without >": lambda size: "<div>\n" + repeat_to("<a ", size) + "\n</div>\n",
+        }, budget=2.0, sizes=SIZES[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
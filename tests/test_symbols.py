@@ -0,0 +1,63 @@
+"""
+Test suite for the compiler's symbol index and link checker.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from compiler.main import compile_markdown
+from compiler.symbols import build_symbol_index, check_links, new_page_symbols
+
+
+class TestSymbols(unittest.TestCase):
+    """Test cases for collecting page symbols and checking links."""
+
+    def setUp(self):
+        """Create a two-page site."""
+        self.site = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.site, "guide"))
+        self.pages = {
+            "index.md": "# Home {#home}\n\n[Usage](guide/usage.html#usage) [Bad](guide/usage.html#missing)\n\nAgain {#home}\n",
+            os.path.join("guide", "usage.md"): "## Usage {#usage}\n\n[Back](../index.md#home) [Gone](nowhere.html)\n",
+        }
+        for relative_path, content in self.pages.items():
+            with open(os.path.join(self.site, relative_path), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.site)
+
+    def build_index(self):
+        pages = {}
+        for relative_path in self.pages:
+            input_file = os.path.join(self.site, relative_path)
+            symbols = new_page_symbols()
+            output_file = compile_markdown(input_file, symbols=symbols)
+            pages[(input_file, output_file)] = symbols
+        return build_symbol_index(pages, self.site)
+
+    def test_symbols_collected_while_rendering(self):
+        """Test that ids, headings and links end up in the index."""
+        index = self.build_index()
+        page = index["pages"]["index.html"]
+
+        self.assertEqual(page["source"], "index.md")
+        self.assertEqual(page["ids"], ["home", "home"])
+        self.assertEqual(page["headings"], [{"level": 1, "text": "Home", "id": "home"}])
+        self.assertEqual([link["href"] for link in page["links"]],
+                         ["guide/usage.html#usage", "guide/usage.html#missing"])
+
+    def test_check_links(self):
+        """Test that duplicate ids, missing anchors and missing pages are reported."""
+        problems = check_links(self.build_index(), self.site)
+
+        self.assertEqual(problems, [
+            "guide/usage.html: broken link 'nowhere.html' (no such page)",
+            "index.html: duplicate id 'home' (2 times)",
+            "index.html: broken link 'guide/usage.html#missing' (no id 'missing' in guide/usage.html)",
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Test suite for the desktop IDE's tab records and live-tab LRU.
+"""
+
+import unittest
+from ide.tabs import TabRecord, TabLRU
+
+
+class TestTabs(unittest.TestCase):
+    """Test cases for tab bookkeeping."""
+
+    def test_record(self):
+        """Test that tab records are compact and report hibernation."""
+        record = TabRecord("a.md", "tab1", "a.md", "/docs/a.md", "markdown")
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertTrue(record.hibernated)
+        record.text_widget = object()
+        self.assertFalse(record.hibernated)
+        with self.assertRaises(AttributeError):
+            record.unknown = 1
+
+    def test_lru_eviction(self):
+        """Test that the least recently used tabs are evicted beyond capacity."""
+        lru = TabLRU(capacity=2)
+        self.assertEqual(lru.touch("a"), [])
+        self.assertEqual(lru.touch("b"), [])
+        # Using "a" again makes "b" the oldest
+        self.assertEqual(lru.touch("a"), [])
+        self.assertEqual(lru.touch("c"), ["b"])
+        self.assertNotIn("b", lru)
+        self.assertEqual(len(lru), 2)
+
+        lru.discard("a")
+        self.assertEqual(lru.touch("d"), [])
+
+    def test_lru_veto(self):
+        """Test that vetoed tabs stay live and the next oldest is evicted instead."""
+        lru = TabLRU(capacity=2)
+        for key in ("loading", "b", "c"):
+            evicted = lru.touch(key, can_evict=lambda key: key != "loading")
+        self.assertEqual(evicted, ["b"])
+        self.assertIn("loading", lru)
+        # Nothing else can be evicted, so the list may exceed the capacity
+        self.assertEqual(lru.touch("d", can_evict=lambda key: key == "c"), ["c"])
+        self.assertEqual(lru.touch("e", can_evict=lambda key: False), [])
+        self.assertEqual(len(lru), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
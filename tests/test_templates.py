@@ -0,0 +1,125 @@
+"""
+Test suite for page layouts, partials and the template cache.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from compiler.main import compile_markdown, compile_string
+from compiler.templates import TemplateCache, TemplateError
+
+
+class TestTemplates(unittest.TestCase):
+    """Test cases for compiled layouts and TemplateCache."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.write("partials/header.html", "<header>$title</header>")
+        self.write("partials/wide.html", "<aside>wide $author</aside>")
+        self.write("layouts/docs.html",
+                   '<!--#include file="../partials/header.html" -->\n'
+                   '<!--#include file="../partials/$sidebar.html" -->\n'
+                   "<main>${html_content}</main><style>$custom_styles</style>$$5\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.work_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_render_and_split(self):
+        """Test placeholders, static and per-page includes, $$ and splitting around the body."""
+        cache = TemplateCache()
+        template = cache.load(os.path.join(self.work_dir, "layouts", "docs.html"))
+        values = {"title": "T", "sidebar": "wide", "author": "A", "html_content": "<p>x</p>", "custom_styles": ""}
+
+        self.assertEqual(template.render(values),
+                         "<header>T</header>\n<aside>wide A</aside>\n<main><p>x</p></main><style></style>$5\n")
+        head, tail = template.split("html_content")
+        self.assertEqual(head.render(values) + "<p>x</p>" + tail.render(values), template.render(values))
+
+        with self.assertRaises(TemplateError):
+            template.render({"title": "T"})
+
+    def test_cache(self):
+        """Test that files are compiled once, and again only when their content changes."""
+        cache = TemplateCache()
+        layout = os.path.join(self.work_dir, "layouts", "docs.html")
+        other = self.write("layouts/other.html", '<!--#include file="../partials/header.html" -->$html_content')
+        for _ in range(3):
+            cache.load(layout)
+            cache.load(other)
+        self.assertEqual(cache.compiles, 3)
+
+        # Same content with a new modification time
+        header = self.write("partials/header.html", "<header>$title</header>")
+        os.utime(header, ns=(0, 0))
+        cache.load(layout)
+        self.assertEqual(cache.compiles, 3)
+
+        self.write("partials/header.html", "<h1>$title</h1>")
+        os.utime(header, ns=(10 ** 9, 10 ** 9))
+        self.assertEqual(cache.load(other).render({"title": "T", "html_content": ""}), "<h1>T</h1>")
+        self.assertEqual(cache.compiles, 5)
+
+    def test_errors(self):
+        """Test invalid placeholders and include cycles."""
+        cache = TemplateCache()
+        with self.assertRaisesRegex(TemplateError, "line 2: invalid placeholder"):
+            cache.load(self.write("bad.html", "ok\ncosts $5"))
+        self.write("a.html", '<!--#include file="b.html" -->')
+        with self.assertRaisesRegex(TemplateError, "includes itself"):
+            cache.load(self.write("b.html", '<!--#include file="a.html" -->'))
+
+    def test_compile_markdown_with_layout(self):
+        """Test that a page's layout frontmatter key picks its layout, in both compile modes."""
+        source = self.write("page.md", "---\ntitle: Page\nlayout: layouts/docs\nsidebar: wide\nauthor: Sam\n---\n\n# Body\n")
+        output = os.path.join(self.work_dir, "page.html")
+        streamed = os.path.join(self.work_dir, "streamed.html")
+        with contextlib.redirect_stdout(io.StringIO()):
+            compile_markdown(source, output)
+            compile_markdown(source, streamed, stream=True)
+
+        with open(output, encoding="utf-8") as f:
+            html = f.read()
+        self.assertTrue(html.startswith("<header>Page</header>\n<aside>wide Sam</aside>\n<main><h1>Body</h1>"))
+        with open(streamed, encoding="utf-8") as f:
+            self.assertEqual(f.read(), html)
+
+        self.write("page.md", "---\nlayout: layouts/docs\n---\n\n# Body\n")
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            compile_markdown(source, output)
+        self.assertIn("no value for $sidebar", stderr.getvalue())
+
+    def test_render_time_errors(self):
+        """Test that errors in partials chosen per page are reported without a traceback in both modes."""
+        self.write("partials/narrow.html", "<aside>$missing</aside>")
+        output = os.path.join(self.work_dir, "page.html")
+        for sidebar, message in (("none", "File not found"), ("narrow", "no value for $missing")):
+            source = self.write("page.md", f"---\nlayout: layouts/docs\nsidebar: {sidebar}\nauthor: Sam\n---\n\n# Body\n")
+            for stream in (False, True):
+                with contextlib.redirect_stdout(io.StringIO()), \
+                        contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+                    compile_markdown(source, output, stream=stream)
+                self.assertIn(message, stderr.getvalue())
+
+    def test_compile_string_layout(self):
+        """Test that compile_string only uses a page's layout when given the directory to find it in."""
+        source = "---\ntitle: Page\nlayout: layouts/docs\nsidebar: wide\nauthor: Sam\n---\n\n# Body\n"
+        with contextlib.redirect_stdout(io.StringIO()):
+            html = compile_string(source, base_dir=self.work_dir)
+            default = compile_string(source)
+        self.assertTrue(html.startswith("<header>Page</header>"))
+        self.assertTrue(default.startswith("<!DOCTYPE html>"))
+        self.assertNotIn("<header>Page</header>", default)
+
+
+if __name__ == '__main__':
+    unittest.main()